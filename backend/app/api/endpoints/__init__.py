@@ -1,3 +1,3 @@
-from . import auth, content, quiz, search
+from . import auth, content, jobs, quiz, search
 
-__all__ = ['auth', 'content', 'quiz', 'search'] 
\ No newline at end of file
+__all__ = ['auth', 'content', 'jobs', 'quiz', 'search'] 
\ No newline at end of file
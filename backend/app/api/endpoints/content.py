@@ -1,13 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Header, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import AsyncIterator, List, Dict, Any, Optional
+import json
 from ...database.connection import get_db
 from ...services.ai_service import AIService
-from ...core.auth import get_current_user
+from ...services.content_events import content_saved, category_saved
+from ...services.content_ingest import ContentIngestService
+from ...services.generation_jobs import queue_prerequisite_analysis, queue_quiz_generation
+from ...services.job_queue import JobQueue
+from ...core.logging import logger
+from ...core.auth import get_current_admin, get_current_user
+from ...core.config import settings
+from ...core.dependencies import get_job_queue
 from ...models.user import User
 from ...models.content import Content, Category, DifficultyLevel
-from ...schemas.content_schema import ContentCreate, ContentResponse
+from ...schemas.content_schema import ContentCreate, ContentResponse, IngestReport
 from ...schemas.category_schema import CategoryCreate, CategoryResponse
+from ...schemas.job_schema import JobResponse
+from .jobs import enqueue_content_generation
 
 router = APIRouter()
 
@@ -29,6 +40,7 @@ async def create_category(
     db.add(db_category)
     db.commit()
     db.refresh(db_category)
+    category_saved(db, [db_category])
     return db_category
 
 @router.get("/content/{category_id}", response_model=List[ContentResponse])
@@ -40,13 +52,26 @@ async def get_content(
     contents = db.query(Content).filter(Content.category_id == category_id).all()
     return contents
 
-@router.post("/content/generate", response_model=ContentResponse)
+@router.post("/content/generate", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def create_ai_content(
+    category_id: int,
+    difficulty: DifficultyLevel,
+    idempotency_key: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    job_queue: JobQueue = Depends(get_job_queue)
+):
+    """Queue AI content generation; poll /jobs/{id} for the new content's id"""
+    return await enqueue_content_generation(category_id, difficulty, idempotency_key, db, current_user, job_queue)
+
+@router.post("/content/generate/stream")
+async def stream_ai_content(
     category_id: int,
     difficulty: DifficultyLevel,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    """Stream generated content as server-sent events, then persist it"""
     category = db.query(Category).filter(Category.id == category_id).first()
     if not category:
         raise HTTPException(
@@ -55,16 +80,95 @@ async def create_ai_content(
         )
 
     ai_service = AIService()
-    generated_content = await ai_service.generate_content(str(category.name), difficulty)
-    
-    content = Content(
-        title=generated_content["title"],
-        content=generated_content["content"],
-        difficulty=difficulty,
-        category_id=category_id
+    topic = str(category.name)
+
+    async def event_stream():
+        parts: List[str] = []
+        try:
+            async for fragment in ai_service.stream_content(topic, difficulty):
+                parts.append(fragment)
+                yield _sse_event("token", {"text": fragment})
+        except Exception as e:
+            logger.error(f"Content stream failed for category {category_id}: {str(e)}")
+            yield _sse_event("error", {"message": "Content generation failed"})
+            return
+
+        content = Content(
+            title=ai_service.content_title(topic),
+            content="".join(parts),
+            difficulty=difficulty,
+            category_id=category_id
+        )
+        db.add(content)
+        db.commit()
+        db.refresh(content)
+
+        await content_saved(db, ai_service, [content])
+        await queue_quiz_generation(content.id)
+        await queue_prerequisite_analysis([category_id])
+        yield _sse_event("done", ContentResponse.model_validate(content).model_dump(mode="json"))
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        # Stop proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
-    
-    db.add(content)
-    db.commit()
-    db.refresh(content)
-    return content 
\ No newline at end of file
+
+@router.post("/content/ingest", response_model=IngestReport)
+async def ingest_content(
+    request: Request,
+    batch_size: Optional[int] = None,
+    queue_quizzes: bool = True,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Bulk import a JSONL body of ContentCreate items, read as it streams in.
+
+    Staff only. Bodies over INGEST_MAX_BYTES or INGEST_MAX_LINES are refused
+    with 413; a body found too long while streaming keeps the batches already
+    inserted, so split large imports or use the ingest_content script.
+    """
+    return await ContentIngestService(db).ingest(
+        _request_lines(request),
+        batch_size=batch_size,
+        queue_quizzes=queue_quizzes
+    )
+
+async def _request_lines(request: Request) -> AsyncIterator[str]:
+    """Lines of the body as it streams in, within the ingest size and line limits"""
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > settings.INGEST_MAX_BYTES:
+        raise _too_large(f"Body exceeds {settings.INGEST_MAX_BYTES} bytes")
+
+    buffer = bytearray()
+    received = 0
+    line_count = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > settings.INGEST_MAX_BYTES:
+            raise _too_large(f"Body exceeds {settings.INGEST_MAX_BYTES} bytes")
+        # Only the new bytes are searched, and consumed lines are dropped once per chunk
+        position = len(buffer)
+        buffer += chunk
+        start = 0
+        while True:
+            end = buffer.find(b"\n", position)
+            if end < 0:
+                break
+            line_count += 1
+            if line_count > settings.INGEST_MAX_LINES:
+                raise _too_large(f"Body exceeds {settings.INGEST_MAX_LINES} lines")
+            yield buffer[start:end].decode("utf-8")
+            start = position = end + 1
+        del buffer[:start]
+    if buffer:
+        if line_count + 1 > settings.INGEST_MAX_LINES:
+            raise _too_large(f"Body exceeds {settings.INGEST_MAX_LINES} lines")
+        yield buffer.decode("utf-8")
+
+def _too_large(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail)
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
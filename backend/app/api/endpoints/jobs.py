@@ -0,0 +1,108 @@
+from fastapi import APIRouter, Depends, HTTPException, Header, status
+from sqlalchemy.orm import Session
+from typing import Any, Dict, Optional
+from ...database.connection import get_db
+from ...core.auth import get_current_user
+from ...core.dependencies import get_job_queue
+from ...models.user import User
+from ...models.content import Content, Category, DifficultyLevel
+from ...services.job_queue import JobQueue, JobStatus
+from ...services import generation_jobs  # noqa: F401 - registers the job handlers
+from ...schemas.job_schema import JobResponse
+
+router = APIRouter()
+
+@router.post("/content", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_content_generation(
+    category_id: int,
+    difficulty: DifficultyLevel,
+    idempotency_key: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    job_queue: JobQueue = Depends(get_job_queue)
+):
+    """Queue AI content generation and return the job immediately"""
+    category = db.query(Category).filter(Category.id == category_id).first()
+    if not category:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Category not found"
+        )
+
+    return await job_queue.enqueue(
+        "generate_content",
+        {
+            "category_id": category_id,
+            "topic": str(category.name),
+            "difficulty": difficulty.value,
+            "requested_by": current_user.id
+        },
+        idempotency_key=_user_scoped_key(current_user, idempotency_key)
+    )
+
+@router.post("/quiz/{content_id}", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_quiz_generation(
+    content_id: int,
+    idempotency_key: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    job_queue: JobQueue = Depends(get_job_queue)
+):
+    """Queue quiz generation for a content item and return the job immediately"""
+    content = db.query(Content.id).filter(Content.id == content_id).first()
+    if not content:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Content not found"
+        )
+
+    return await job_queue.enqueue(
+        "generate_quiz",
+        {"content_id": content_id, "requested_by": current_user.id},
+        idempotency_key=_user_scoped_key(current_user, idempotency_key)
+    )
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    job_queue: JobQueue = Depends(get_job_queue)
+):
+    return await _get_user_job(job_queue, job_id, current_user)
+
+@router.get("/{job_id}/result")
+async def get_job_result(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    job_queue: JobQueue = Depends(get_job_queue)
+) -> Dict[str, Any]:
+    job = await _get_user_job(job_queue, job_id, current_user)
+    if job["status"] == JobStatus.FAILED.value:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"message": "Job failed", "error": job["error"]}
+        )
+    if job["status"] != JobStatus.SUCCEEDED.value:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": "Job has not finished", "status": job["status"]}
+        )
+    return job["result"]
+
+# Jobs keyed by content rather than by user, e.g. the quiz GET /quiz/quizzes/{id} hands out with a 202
+_shared_kinds = {"generate_quiz"}
+
+async def _get_user_job(job_queue: JobQueue, job_id: str, current_user: User) -> Dict[str, Any]:
+    """The job if the user queued it or it is shared; 404 otherwise, so ids can't be probed"""
+    job = await job_queue.get(job_id)
+    if not job or (
+        job["kind"] not in _shared_kinds and job["payload"].get("requested_by") != current_user.id
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
+
+def _user_scoped_key(user: User, idempotency_key: Optional[str]) -> Optional[str]:
+    return f"user:{user.id}:{idempotency_key}" if idempotency_key else None
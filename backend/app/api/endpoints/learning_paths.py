@@ -46,7 +46,8 @@ async def update_learning_path_progress(
     category_id: int,
     content_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    cache_manager: CacheManager = Depends(get_cache_manager)
 ):
     """Update user's progress in a learning path"""
     try:
@@ -72,6 +73,8 @@ async def update_learning_path_progress(
             db.add(progress)
         
         db.commit()
+        # Progress feeds the user's learning paths and recommendations
+        await cache_manager.invalidate_tags(f"user:{user_id}")
         return {"status": "success"}
     except Exception as e:
         raise HTTPException(
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any
 from ...database.connection import get_db
@@ -7,18 +8,30 @@ from ...models.quiz_result import QuizResult
 from ...models.user import User
 from ...models.content import Content
 from ...core.auth import get_current_user
+from ...core.config import settings
+from ...core.dependencies import get_cache_manager
 from ...services.ai_service import AIService
+from ...services.cache_manager import CacheManager
+from ...services.generation_jobs import queue_quiz_generation
 from ...services.quiz_generator import QuizGenerator
+from ...services.quiz_service import QuizService
+from ...services.locks import LockTimeout
+from ...schemas.job_schema import JobResponse
 from ...schemas.quiz_schema import QuizResponse, QuizSubmission, QuizResultResponse
 
 router = APIRouter()
 
-@router.get("/quizzes/{content_id}", response_model=QuizResponse)
+@router.get(
+    "/quizzes/{content_id}",
+    response_model=QuizResponse,
+    responses={status.HTTP_202_ACCEPTED: {"model": JobResponse}}
+)
 async def get_quiz(
     content_id: int, 
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    """The content's quiz, or 202 with its generation job while another worker is generating it"""
     # Get content first
     content = db.query(Content).filter(Content.id == content_id).first()
     if not content:
@@ -27,20 +40,22 @@ async def get_quiz(
             detail="Content not found"
         )
 
-    # Get or create quiz
-    quiz = db.query(Quiz).filter(Quiz.content_id == content_id).first()
-    if not quiz:
-        ai_service = AIService()
-        content_text = str(getattr(content, 'content', ''))
-        questions = await ai_service.generate_quiz(content_text)
-        quiz = Quiz(
-            title=f"Quiz: {content.title}",
-            content_id=content_id,
-            questions=questions
+    # Generated once per content item, even under concurrent first views
+    try:
+        quiz = await QuizService(db, AIService()).get_or_create(content, lock_wait=settings.QUIZ_LOCK_WAIT)
+    except LockTimeout:
+        # Deduplicated against the job queued when the content was saved, if it still exists
+        job = await queue_quiz_generation(content_id)
+        if job is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Quiz is still being generated, please retry"
+            )
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=JobResponse(**job).model_dump(mode="json"),
+            headers={"Retry-After": str(max(1, int(settings.QUIZ_LOCK_WAIT)))}
         )
-        db.add(quiz)
-        db.commit()
-        db.refresh(quiz)
     return quiz
 
 @router.post("/quizzes/{quiz_id}/submit", response_model=QuizResultResponse)
@@ -48,7 +63,8 @@ async def submit_quiz(
     quiz_id: int,
     submission: QuizSubmission,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    cache_manager: CacheManager = Depends(get_cache_manager)
 ):
     quiz = db.query(Quiz).filter(Quiz.id == quiz_id).first()
     if not quiz:
@@ -86,6 +102,7 @@ async def submit_quiz(
     db.add(quiz_result)
     db.commit()
     db.refresh(quiz_result)
+    await cache_manager.invalidate_tags(f"user:{current_user.id}")
 
     return {
         "score": score,
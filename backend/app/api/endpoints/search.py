@@ -1,13 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List, Dict
+from typing import List, Dict, Literal, Optional
 from ...database.connection import get_db
 from ...services.ai_service import AIService
 from ...services.quiz_generator import QuizGenerator
 from ...models.category import Category
 from ...models.content import Content
-from ...schemas.search_schema import SearchQuery, SearchResponse
+from ...schemas.search_schema import SearchQuery, SearchResponse, AutocompleteSuggestion
 from ...services.search_service import SearchService
+from ...services.autocomplete_service import AutocompleteService
 import logging
 
 router = APIRouter()
@@ -26,14 +27,22 @@ async def search_topics(
         
         # Use search service
         logger.debug("Calling search service")
-        search_results = await search_service.search(query.query)
-        logger.info(f"Found {len(search_results)} results")
+        search_results = await search_service.search(
+            query.query,
+            mode=query.mode,
+            limit=query.limit,
+            cursor=query.cursor
+        )
+        logger.info(f"Found {len(search_results['results'])} results")
         
         return {
-            "existingContent": search_results,
+            "existingContent": search_results["results"],
             "generatedContent": [],
-            "categories": []
+            "categories": [],
+            "nextCursor": search_results["next_cursor"]
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception("Search failed with exception:")
         raise HTTPException(
@@ -43,4 +52,14 @@ async def search_topics(
                 "error": str(e),
                 "query": query.query
             }
-        ) 
\ No newline at end of file
+        ) 
+
+@router.get("/autocomplete", response_model=List[AutocompleteSuggestion])
+async def autocomplete(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=25),
+    type: Optional[Literal["content", "category"]] = None,
+    db: Session = Depends(get_db)
+):
+    """Title suggestions from the in-memory prefix index; no LLM or text search involved"""
+    return AutocompleteService(db).suggest(q, limit, type)
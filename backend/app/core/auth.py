@@ -26,4 +26,14 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     user = db.query(User).filter(User.email == email).first()
     if user is None:
         raise credentials_exception
-    return user 
\ No newline at end of file
+    return user
+
+async def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+    """The signed-in user, if their email is listed in ADMIN_EMAILS"""
+    admins = {email.strip().lower() for email in settings.ADMIN_EMAILS.split(",") if email.strip()}
+    if str(current_user.email or "").lower() not in admins:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user 
\ No newline at end of file
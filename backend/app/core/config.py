@@ -20,13 +20,188 @@ class Settings(BaseSettings):
     FRONTEND_URL: str = Field(
         default=os.getenv("FRONTEND_URL", "http://localhost:3000")
     )
+    ADMIN_EMAILS: str = Field(
+        default=os.getenv("ADMIN_EMAILS", ""),
+        description="Comma-separated emails of the staff allowed to use admin endpoints such as bulk ingest"
+    )
     
     # OpenAI
     OPENAI_API_KEY: str = Field(
         default=os.getenv("OPENAI_API_KEY", ""),
         description="OpenAI API key for content generation"
     )
-    
+    OPENAI_ASYNC_CLIENT: bool = Field(
+        default=os.getenv("OPENAI_ASYNC_CLIENT", "true").lower() == "true",
+        description="Use the asyncio OpenAI client instead of running the sync client in a thread"
+    )
+    OPENAI_MAX_CONCURRENCY: int = Field(
+        default=int(os.getenv("OPENAI_MAX_CONCURRENCY", "8")),
+        description="Maximum number of OpenAI calls in flight per worker"
+    )
+    OPENAI_TIMEOUT: float = Field(
+        default=float(os.getenv("OPENAI_TIMEOUT", "60")),
+        description="Default per-call timeout in seconds for OpenAI requests"
+    )
+    # Per-worker rate budgets; divide the organisation limits by the number of workers
+    OPENAI_REQUESTS_PER_MINUTE: int = Field(
+        default=int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "500")),
+        description="Chat completion requests per minute per worker"
+    )
+    OPENAI_TOKENS_PER_MINUTE: int = Field(
+        default=int(os.getenv("OPENAI_TOKENS_PER_MINUTE", "40000")),
+        description="Chat completion tokens per minute per worker"
+    )
+    OPENAI_EMBEDDING_REQUESTS_PER_MINUTE: int = Field(
+        default=int(os.getenv("OPENAI_EMBEDDING_REQUESTS_PER_MINUTE", "1000")),
+        description="Embedding requests per minute per worker"
+    )
+    OPENAI_EMBEDDING_TOKENS_PER_MINUTE: int = Field(
+        default=int(os.getenv("OPENAI_EMBEDDING_TOKENS_PER_MINUTE", "250000")),
+        description="Embedding tokens per minute per worker"
+    )
+    EMBEDDING_BATCH_SIZE: int = Field(
+        default=int(os.getenv("EMBEDDING_BATCH_SIZE", "256")),
+        description="Maximum number of inputs per embeddings request"
+    )
+    EMBEDDING_BATCH_MAX_TOKENS: int = Field(
+        default=int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "250000")),
+        description="Estimated token budget per embeddings request"
+    )
+    PREREQUISITE_CONTEXT_TOKENS: int = Field(
+        default=int(os.getenv("PREREQUISITE_CONTEXT_TOKENS", "8192")),
+        description="Context window of the prerequisite analysis model; the catalogue in each prompt is cut to fit it"
+    )
+    LLM_CACHE_MAX_SIZE: int = Field(
+        default=int(os.getenv("LLM_CACHE_MAX_SIZE", "2048")),
+        description="Maximum number of cached LLM responses per worker"
+    )
+
+    # Approximate nearest-neighbour index over content embeddings
+    ANN_INDEX_PATH: str = Field(
+        default=os.getenv("ANN_INDEX_PATH", "data/content_ann.npz"),
+        description="Where the content ANN index is persisted"
+    )
+    ANN_N_PROBE: int = Field(
+        default=int(os.getenv("ANN_N_PROBE", "8")),
+        description="Number of clusters scanned per ANN query"
+    )
+    ANN_MIN_ITEMS: int = Field(
+        default=int(os.getenv("ANN_MIN_ITEMS", "5000")),
+        description="Catalogue size above which recommendations use the ANN index instead of exact search"
+    )
+    ANN_SYNC_INTERVAL: int = Field(
+        default=int(os.getenv("ANN_SYNC_INTERVAL", "60")),
+        description="Seconds between pulls of embeddings written by other workers into the local index"
+    )
+
+    # In-process BM25 text index
+    BM25_INDEX_PATH: str = Field(
+        default=os.getenv("BM25_INDEX_PATH", "data/content_bm25.json.gz"),
+        description="Where the content BM25 index snapshot is persisted"
+    )
+    BM25_SYNC_INTERVAL: int = Field(
+        default=int(os.getenv("BM25_SYNC_INTERVAL", "60")),
+        description="Seconds between pulls of content written by other workers into the local BM25 index"
+    )
+
+    # Duplicate detection
+    DUPLICATE_INDEX_SYNC_INTERVAL: int = Field(
+        default=int(os.getenv("DUPLICATE_INDEX_SYNC_INTERVAL", "60")),
+        description="Seconds between pulls of titles written by other workers into the local duplicate index"
+    )
+
+    # Bulk ingestion
+    INGEST_BATCH_SIZE: int = Field(
+        default=int(os.getenv("INGEST_BATCH_SIZE", "1000")),
+        description="Content rows inserted per statement by bulk ingestion"
+    )
+    INGEST_DUPLICATE_THRESHOLD: float = Field(
+        default=float(os.getenv("INGEST_DUPLICATE_THRESHOLD", "0.85")),
+        description="Title similarity above which an ingested item is skipped as a duplicate"
+    )
+    INGEST_MAX_BYTES: int = Field(
+        default=int(os.getenv("INGEST_MAX_BYTES", str(50 * 1024 * 1024))),
+        description="Largest request body the ingest endpoint reads"
+    )
+    INGEST_MAX_LINES: int = Field(
+        default=int(os.getenv("INGEST_MAX_LINES", "100000")),
+        description="Most JSONL lines the ingest endpoint reads per request"
+    )
+
+    # Search results
+    SEARCH_PAGE_SIZE: int = Field(
+        default=int(os.getenv("SEARCH_PAGE_SIZE", "20")),
+        description="Search results per page when the request does not ask for a size"
+    )
+    SEARCH_MAX_PAGE_SIZE: int = Field(
+        default=int(os.getenv("SEARCH_MAX_PAGE_SIZE", "100")),
+        description="Upper bound on the page size a search request may ask for"
+    )
+    SEARCH_PREVIEW_LENGTH: int = Field(
+        default=int(os.getenv("SEARCH_PREVIEW_LENGTH", "200")),
+        description="Characters of body text returned with each search result"
+    )
+
+    # Search result cache
+    SEARCH_RESULT_CACHE_TTL: int = Field(
+        default=int(os.getenv("SEARCH_RESULT_CACHE_TTL", "600")),
+        description="Seconds a cached search page is served, at most the BM25 and ANN sync intervals; content writes invalidate sooner"
+    )
+    SEARCH_RESULT_CACHE_SIZE: int = Field(
+        default=int(os.getenv("SEARCH_RESULT_CACHE_SIZE", "2048")),
+        description="Search pages kept in process memory while Redis is unavailable"
+    )
+
+    # Autocomplete
+    AUTOCOMPLETE_SYNC_INTERVAL: int = Field(
+        default=int(os.getenv("AUTOCOMPLETE_SYNC_INTERVAL", "300")),
+        description="Seconds between refreshes of autocomplete titles and popularity from the database"
+    )
+
+    # Speculative search
+    SEARCH_ENHANCE_DEADLINE_MS: int = Field(
+        default=int(os.getenv("SEARCH_ENHANCE_DEADLINE_MS", "400")),
+        description="How long speculative search waits for the AI query rewrite before answering with raw-query results"
+    )
+    SEARCH_ENHANCEMENT_CACHE_SIZE: int = Field(
+        default=int(os.getenv("SEARCH_ENHANCEMENT_CACHE_SIZE", "10000")),
+        description="Normalized queries whose AI rewrite is kept in memory"
+    )
+    SEARCH_ENHANCEMENT_CACHE_TTL: int = Field(
+        default=int(os.getenv("SEARCH_ENHANCEMENT_CACHE_TTL", "86400")),
+        description="Seconds an AI query rewrite is reused"
+    )
+
+    # Hybrid search
+    SEARCH_HYBRID_LEXICAL_WEIGHT: float = Field(
+        default=float(os.getenv("SEARCH_HYBRID_LEXICAL_WEIGHT", "1.0")),
+        description="Weight of the keyword retriever in rank fusion"
+    )
+    SEARCH_HYBRID_SEMANTIC_WEIGHT: float = Field(
+        default=float(os.getenv("SEARCH_HYBRID_SEMANTIC_WEIGHT", "1.0")),
+        description="Weight of the embedding retriever in rank fusion"
+    )
+    SEARCH_RRF_K: int = Field(
+        default=int(os.getenv("SEARCH_RRF_K", "60")),
+        description="Reciprocal rank fusion constant; larger values flatten the advantage of top ranks"
+    )
+    SEARCH_HYBRID_CANDIDATES: int = Field(
+        default=int(os.getenv("SEARCH_HYBRID_CANDIDATES", "100")),
+        description="Results taken from each retriever before fusion"
+    )
+    SEARCH_LEXICAL_BUDGET_MS: int = Field(
+        default=int(os.getenv("SEARCH_LEXICAL_BUDGET_MS", "300")),
+        description="Time the keyword retriever may take before hybrid search answers without it"
+    )
+    SEARCH_SEMANTIC_BUDGET_MS: int = Field(
+        default=int(os.getenv("SEARCH_SEMANTIC_BUDGET_MS", "800")),
+        description="Time the embedding retriever may take before hybrid search answers without it"
+    )
+    SEARCH_SEMANTIC_MIN_SIMILARITY: float = Field(
+        default=float(os.getenv("SEARCH_SEMANTIC_MIN_SIMILARITY", "0.3")),
+        description="Cosine similarity below which the embedding retriever drops a match; depends on the embedding model"
+    )
+
     # CORS
     BACKEND_CORS_ORIGINS: list[str] = ["*"]
     
@@ -35,6 +210,96 @@ class Settings(BaseSettings):
         default=os.getenv("REDIS_URL", "redis://localhost:6379/0"),
         description="Redis URL for caching"
     )
+    REDIS_MAX_CONNECTIONS: int = Field(
+        default=int(os.getenv("REDIS_MAX_CONNECTIONS", "50")),
+        description="Connections to Redis per process, across both pools; callers wait for a free one beyond this"
+    )
+    REDIS_BINARY_CONNECTIONS: int = Field(
+        default=int(os.getenv("REDIS_BINARY_CONNECTIONS", "20")),
+        description="Share of REDIS_MAX_CONNECTIONS given to the bytes pool that cache entries are read and written through"
+    )
+    REDIS_POOL_TIMEOUT: float = Field(
+        default=float(os.getenv("REDIS_POOL_TIMEOUT", "2.0")),
+        description="Seconds to wait for a free pooled Redis connection"
+    )
+    REDIS_SOCKET_TIMEOUT: float = Field(
+        default=float(os.getenv("REDIS_SOCKET_TIMEOUT", "5.0")),
+        description="Seconds a Redis command may take; the job queue's blocking polls return a second sooner"
+    )
+    REDIS_CONNECT_TIMEOUT: float = Field(
+        default=float(os.getenv("REDIS_CONNECT_TIMEOUT", "1.0")),
+        description="Seconds to establish a Redis connection"
+    )
+    REDIS_RETRIES: int = Field(
+        default=int(os.getenv("REDIS_RETRIES", "2")),
+        description="Retries, with exponential backoff, of a Redis command that lost its connection"
+    )
+    CACHE_L1_ENABLED: bool = Field(
+        default=os.getenv("CACHE_L1_ENABLED", "true").lower() == "true",
+        description="Keep hot cache entries in process memory in front of Redis"
+    )
+    CACHE_L1_MAX_SIZE: int = Field(
+        default=int(os.getenv("CACHE_L1_MAX_SIZE", "10000")),
+        description="Entries in each worker's in-process cache before least recently used ones are evicted"
+    )
+    CACHE_STALE_SECONDS: int = Field(
+        default=int(os.getenv("CACHE_STALE_SECONDS", "300")),
+        description="Seconds past its TTL a cached value is still served while it is refreshed in the background"
+    )
+    CACHE_EARLY_REFRESH_BETA: float = Field(
+        default=float(os.getenv("CACHE_EARLY_REFRESH_BETA", "1.0")),
+        description="Eagerness of probabilistic early refresh; above 1 refreshes earlier, 0 disables it"
+    )
+    CACHE_LOCK_TTL: float = Field(
+        default=float(os.getenv("CACHE_LOCK_TTL", "60")),
+        description="Longest one worker may hold the right to recompute a cache key"
+    )
+    CACHE_LOCK_WAIT: float = Field(
+        default=float(os.getenv("CACHE_LOCK_WAIT", "10")),
+        description="Seconds a cache miss waits for another worker's recompute before fetching itself"
+    )
+    CACHE_INVALIDATION_MEMORY: int = Field(
+        default=int(os.getenv("CACHE_INVALIDATION_MEMORY", "600")),
+        description="Seconds a tag invalidation is remembered; values whose fetch took longer are not cached"
+    )
+    CACHE_RECONNECT_BACKOFF_MAX: float = Field(
+        default=float(os.getenv("CACHE_RECONNECT_BACKOFF_MAX", "30.0")),
+        description="Longest the cache manager waits before probing an unreachable Redis again"
+    )
+    CACHE_CODEC: str = Field(
+        default=os.getenv("CACHE_CODEC", "orjson"),
+        description="Encoding of cached values: json, orjson or msgpack; falls back to json if the module is missing"
+    )
+    CACHE_COMPRESS_MIN_BYTES: int = Field(
+        default=int(os.getenv("CACHE_COMPRESS_MIN_BYTES", "1024")),
+        description="Encoded size from which cached values are zlib-compressed, 0 to never compress"
+    )
+
+    # Background jobs
+    JOB_QUEUE_BACKEND: str = Field(
+        default=os.getenv("JOB_QUEUE_BACKEND", "redis"),
+        description="redis for shared worker processes, local to run jobs inside the API process"
+    )
+    JOB_WORKER_CONCURRENCY: int = Field(
+        default=int(os.getenv("JOB_WORKER_CONCURRENCY", "4")),
+        description="Jobs processed concurrently by each worker"
+    )
+    JOB_RESULT_TTL: int = Field(
+        default=int(os.getenv("JOB_RESULT_TTL", "86400")),
+        description="Seconds job status, results and idempotency keys are kept"
+    )
+    JOB_VISIBILITY_TIMEOUT: int = Field(
+        default=int(os.getenv("JOB_VISIBILITY_TIMEOUT", "300")),
+        description="Seconds without a lease renewal after which a running job's worker is presumed dead and the job requeued"
+    )
+    JOB_MAX_ATTEMPTS: int = Field(
+        default=int(os.getenv("JOB_MAX_ATTEMPTS", "3")),
+        description="Deliveries of a job whose worker keeps dying before it is marked failed"
+    )
+    QUIZ_LOCK_WAIT: float = Field(
+        default=float(os.getenv("QUIZ_LOCK_WAIT", "5")),
+        description="Seconds a quiz request waits for another worker's generation before answering 202 with a job"
+    )
     
     class Config:
         case_sensitive = True
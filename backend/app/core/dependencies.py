@@ -1,8 +1,13 @@
 from ..services.cache_manager import CacheManager
+from ..services.job_queue import JobQueue
 
 cache_manager = CacheManager()
+job_queue = JobQueue()
 
 async def get_cache_manager() -> CacheManager:
     if not cache_manager.redis:
         await cache_manager.init_cache()
-    return cache_manager 
\ No newline at end of file
+    return cache_manager
+
+async def get_job_queue() -> JobQueue:
+    return job_queue
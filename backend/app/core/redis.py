@@ -0,0 +1,35 @@
+from typing import Dict
+from redis import asyncio as aioredis
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialBackoff
+from redis.exceptions import ConnectionError, TimeoutError
+from .config import settings
+
+_clients: Dict[bool, aioredis.Redis] = {}
+
+def get_redis(binary: bool = False) -> aioredis.Redis:
+    """Shared asyncio Redis client over one bounded connection pool per process.
+
+    Connections are opened lazily. A command that hits a dropped connection
+    or a timeout is retried on a fresh connection with exponential backoff
+    before the error reaches the caller. Replies are decoded to str unless
+    binary is set, which gives a client on a second pool returning bytes.
+    The two pools split REDIS_MAX_CONNECTIONS between them, the bytes pool
+    taking REDIS_BINARY_CONNECTIONS, so a process never opens more than that.
+    """
+    client = _clients.get(binary)
+    if client is None:
+        binary_share = max(1, min(settings.REDIS_BINARY_CONNECTIONS, settings.REDIS_MAX_CONNECTIONS - 1))
+        pool = aioredis.BlockingConnectionPool.from_url(
+            settings.REDIS_URL,
+            decode_responses=not binary,
+            max_connections=binary_share if binary else max(1, settings.REDIS_MAX_CONNECTIONS - binary_share),
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+            health_check_interval=30,
+            retry=Retry(ExponentialBackoff(cap=1.0, base=0.05), settings.REDIS_RETRIES),
+            retry_on_error=[ConnectionError, TimeoutError]
+        )
+        client = _clients[binary] = aioredis.Redis(connection_pool=pool)
+    return client
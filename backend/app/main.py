@@ -1,9 +1,14 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.routing import APIRoute
-from .api.endpoints import auth, content, quiz, search
+from .api.endpoints import auth, content, jobs, quiz, search
 from .core.config import settings
 from .core.logging import logger
+from .services.ai_service import AIService
+from .services.openai_scheduler import scheduler_metrics
+from .services.search_cache import SearchResultCache
+from .services.index_warmup import start_index_refresh, warm_indexes
+from .core.dependencies import cache_manager
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -54,6 +59,12 @@ app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["aut
 app.include_router(content.router, prefix=f"{settings.API_V1_STR}/content", tags=["content"])
 app.include_router(quiz.router, prefix=f"{settings.API_V1_STR}/quiz", tags=["quiz"])
 app.include_router(search.router, prefix=f"{settings.API_V1_STR}/search", tags=["search"])
+app.include_router(jobs.router, prefix=f"{settings.API_V1_STR}/jobs", tags=["jobs"])
+
+@app.on_event("startup")
+async def startup():
+    await warm_indexes()
+    start_index_refresh()
 
 @app.get("/")
 async def root():
@@ -71,6 +82,15 @@ async def health_check():
         "environment": settings.ENVIRONMENT
     }
 
+@app.get("/metrics")
+async def metrics():
+    return {
+        "openai": scheduler_metrics(),
+        "llm_cache": AIService._response_cache.stats(),
+        "search_cache": SearchResultCache.stats(),
+        "cache": cache_manager.stats()
+    }
+
 # Debug endpoint
 @app.get("/debug-paths")
 async def debug_paths():
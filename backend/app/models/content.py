@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, ARRAY
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, ARRAY, Computed, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from ..database.connection import Base
 from datetime import datetime
 import enum
@@ -10,6 +11,12 @@ class DifficultyLevel(str, enum.Enum):
     ADVANCED = "advanced"
     EXPERT = "expert"
 
+SEARCH_TEXT_CONFIG = "english"
+SEARCH_VECTOR_EXPRESSION = (
+    f"setweight(to_tsvector('{SEARCH_TEXT_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_TEXT_CONFIG}', coalesce(content, '')), 'B')"
+)
+
 class Category(Base):
     __tablename__ = "categories"
 
@@ -34,8 +41,16 @@ class Content(Base):
     category_id = Column(Integer, ForeignKey("categories.id"))
     prerequisites = Column(ARRAY(Integer), default=[])  # IDs of content that should be completed first
     complexity_score = Column(Integer, default=1)  # 1-10 score for sorting within same difficulty
+    prerequisites_analyzed_at = Column(DateTime, nullable=True)  # Set by the prerequisite pipeline
+    # Maintained by Postgres on every write; titles rank above body text. Deferred so
+    # loading content rows never ships the vector.
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR_EXPRESSION, persisted=True)))
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     category = relationship("Category", back_populates="contents")
-    quizzes = relationship("Quiz", back_populates="content") 
\ No newline at end of file
+    quizzes = relationship("Quiz", back_populates="content")
+
+    __table_args__ = (
+        Index("ix_contents_search_vector", "search_vector", postgresql_using="gin"),
+    ) 
\ No newline at end of file
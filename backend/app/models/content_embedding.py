@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, LargeBinary
+from sqlalchemy.orm import relationship
+from ..database.connection import Base
+from datetime import datetime
+
+class ContentEmbedding(Base):
+    __tablename__ = "content_embeddings"
+
+    content_id = Column(Integer, ForeignKey("contents.id", ondelete="CASCADE"), primary_key=True)
+    text_hash = Column(String(64), nullable=False)  # sha256 of the embedded text
+    model = Column(String, nullable=False)
+    dimensions = Column(Integer, nullable=False)
+    vector = Column(LargeBinary, nullable=False)  # float32 bytes
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    content = relationship("Content")
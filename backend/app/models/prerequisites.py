@@ -1,14 +1,15 @@
-from sqlalchemy import Column, Integer, ForeignKey, String
+from sqlalchemy import Column, Integer, ForeignKey, String, UniqueConstraint
 from sqlalchemy.orm import relationship
-from ..database.base import Base
+from ..database.connection import Base
 
 class Prerequisites(Base):
     __tablename__ = "prerequisites"
+    __table_args__ = (UniqueConstraint("content_id", "prerequisite_id"),)
 
     id = Column(Integer, primary_key=True, index=True)
-    content_id = Column(Integer, ForeignKey("content.id"))
-    prerequisite_id = Column(Integer, ForeignKey("content.id"))
+    content_id = Column(Integer, ForeignKey("contents.id"), index=True)
+    prerequisite_id = Column(Integer, ForeignKey("contents.id"))
     relationship_type = Column(String)  # e.g., "required", "recommended"
 
     content = relationship("Content", foreign_keys=[content_id])
-    prerequisite = relationship("Content", foreign_keys=[prerequisite_id]) 
\ No newline at end of file
+    prerequisite = relationship("Content", foreign_keys=[prerequisite_id])
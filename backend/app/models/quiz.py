@@ -8,9 +8,9 @@ class Quiz(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
-    content_id = Column(Integer, ForeignKey("contents.id"))
+    content_id = Column(Integer, ForeignKey("contents.id"), unique=True, index=True)  # One quiz per content item
     questions = Column(JSON)  # Store quiz questions as JSON
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    content = relationship("Content", backref="quizzes") 
\ No newline at end of file
+    content = relationship("Content", back_populates="quizzes") 
\ No newline at end of file
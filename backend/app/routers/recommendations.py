@@ -1,15 +1,16 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from typing import List, Dict
+from typing import List
 from ..database.connection import get_db
 from ..core.auth import get_current_user
+from ..schemas.recommendation_schema import Recommendation
 from ..services.recommendation_service import RecommendationService
 from ..services.cache_manager import CacheManager
 from ..core.dependencies import get_cache_manager
 
 router = APIRouter()
 
-@router.get("/recommendations/{user_id}", response_model=List[Dict])
+@router.get("/recommendations/{user_id}", response_model=List[Recommendation])
 async def get_recommendations(
     user_id: int,
     db: Session = Depends(get_db),
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from .category_schema import CategoryResponse
 from ..models.content import DifficultyLevel
 
@@ -20,4 +20,17 @@ class ContentResponse(ContentBase):
     category: Optional[CategoryResponse]
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class IngestError(BaseModel):
+    line: int
+    error: str
+
+class IngestReport(BaseModel):
+    read: int
+    inserted: int
+    duplicates: int
+    invalid: int
+    errors: List[IngestError]
+    seconds: float
+    rows_per_second: float
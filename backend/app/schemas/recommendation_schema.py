@@ -0,0 +1,30 @@
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+from ..models.content import DifficultyLevel
+
+class ContentSummary(BaseModel):
+    # Mirrors the nullable Content columns, so any row can be summarized
+    id: int
+    title: Optional[str] = None
+    difficulty: Optional[DifficultyLevel] = None
+    category_id: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+class Recommendation(BaseModel):
+    """One recommended item as cached and returned by the recommendation services"""
+    content: ContentSummary
+    type: str
+    reason: str
+    similarity: Optional[float] = None
+
+    @classmethod
+    def build(cls, content: Any, type: str, reason: str, similarity: Optional[float] = None) -> Dict[str, Any]:
+        """Plain JSON-compatible dict for a Content row, safe to cache"""
+        return cls(
+            content=ContentSummary.model_validate(content),
+            type=type,
+            reason=reason,
+            similarity=similarity
+        ).model_dump(mode="json", exclude={"similarity"} if similarity is None else None)
@@ -1,12 +1,28 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 from .content_schema import ContentResponse
 
 class SearchQuery(BaseModel):
     query: str
     generateContent: bool = True
+    mode: Literal["hybrid", "speculative", "fulltext", "bm25", "substring"] = "hybrid"
+    limit: Optional[int] = Field(default=None, ge=1)  # Capped at SEARCH_MAX_PAGE_SIZE
+    cursor: Optional[str] = None  # nextCursor from the previous page
+
+class SearchResult(BaseModel):
+    id: int
+    title: Optional[str]
+    type: str
+    category_id: Optional[int]
+    preview: str
 
 class SearchResponse(BaseModel):
-    existingContent: List[ContentResponse]
+    existingContent: List[SearchResult]
     generatedContent: List[ContentResponse]
-    categories: List[str] 
\ No newline at end of file
+    categories: List[str]
+    nextCursor: Optional[str] = None
+
+class AutocompleteSuggestion(BaseModel):
+    text: str
+    type: Literal["content", "category"]
+    id: int
@@ -0,0 +1,30 @@
+"""Precompute the prerequisite graph for content that has not been analyzed yet.
+
+Usage: python -m app.scripts.analyze_prerequisites [--category-id ID] [--batch-size N] [--all]
+"""
+import argparse
+import asyncio
+from ..database.connection import SessionLocal
+from ..services.ai_service import AIService
+from ..services.prerequisite_service import PrerequisiteService
+from ..core.logging import logger
+
+async def main(category_id=None, batch_size: int = 20, reanalyze: bool = False):
+    db = SessionLocal()
+    try:
+        analyzed = await PrerequisiteService(db, AIService()).analyze_pending(
+            category_id=category_id,
+            batch_size=batch_size,
+            reanalyze=reanalyze
+        )
+        logger.info(f"Analyzed prerequisites for {analyzed} content items")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute content prerequisites")
+    parser.add_argument("--category-id", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=20, help="titles analyzed per LLM call")
+    parser.add_argument("--all", action="store_true", help="re-analyze content that was already analyzed")
+    args = parser.parse_args()
+    asyncio.run(main(args.category_id, args.batch_size, args.all))
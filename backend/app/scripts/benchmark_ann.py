@@ -0,0 +1,66 @@
+"""Compare ANN index recall and latency against exact search.
+
+Usage:
+    python -m app.scripts.benchmark_ann                  # stored content embeddings
+    python -m app.scripts.benchmark_ann --synthetic 50000
+"""
+import argparse
+import time
+import numpy as np
+from ..services.ann_index import IVFIndex
+
+def benchmark(ids, matrix, k: int = 10, queries: int = 200, n_probes=(1, 4, 8, 16, 32)):
+    rng = np.random.default_rng(1)
+    index = IVFIndex()
+    started = time.perf_counter()
+    index.build(ids, matrix)
+    print(f"Built index over {len(ids)} vectors in {time.perf_counter() - started:.2f}s")
+
+    query_rows = matrix[rng.choice(len(ids), min(queries, len(ids)), replace=False)]
+    # Perturb the queries so they are not exact copies of indexed vectors
+    query_rows = query_rows + rng.normal(scale=0.01, size=query_rows.shape).astype(np.float32)
+
+    started = time.perf_counter()
+    exact = [{content_id for content_id, _ in index.search_exact(q, k)} for q in query_rows]
+    exact_ms = (time.perf_counter() - started) * 1000 / len(query_rows)
+    print(f"exact        recall@{k}=1.000  {exact_ms:.3f} ms/query")
+
+    for n_probe in n_probes:
+        started = time.perf_counter()
+        approx = [{content_id for content_id, _ in index.search(q, k, n_probe=n_probe)} for q in query_rows]
+        elapsed_ms = (time.perf_counter() - started) * 1000 / len(query_rows)
+        recall = np.mean([len(a & e) / max(len(e), 1) for a, e in zip(approx, exact)])
+        print(f"n_probe={n_probe:<4} recall@{k}={recall:.3f}  {elapsed_ms:.3f} ms/query")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--synthetic", type=int, default=0, help="number of random clustered vectors to generate")
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        rng = np.random.default_rng(0)
+        centers = rng.normal(size=(max(1, args.synthetic // 100), args.dimensions))
+        matrix = (
+            centers[rng.integers(len(centers), size=args.synthetic)]
+            + rng.normal(scale=2.0, size=(args.synthetic, args.dimensions))
+        ).astype(np.float32)
+        ids = list(range(1, args.synthetic + 1))
+    else:
+        from ..database.connection import SessionLocal
+        from ..services.ai_service import AIService
+        from ..services.embedding_store import EmbeddingStore
+        db = SessionLocal()
+        try:
+            ids, matrix = EmbeddingStore(db, AIService()).get_matrix()
+        finally:
+            db.close()
+
+    if not ids:
+        print("No embeddings to benchmark")
+        return
+    benchmark(ids, matrix, k=args.k)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Compare cache codecs on representative cached values, per cache_type.
+
+For every codec that is installed, with and without zlib, prints the stored
+size and the mean encode and decode time of a full cache entry, to help pick
+CACHE_CODEC and CACHE_COMPRESS_MIN_BYTES.
+
+Usage:
+    python -m app.scripts.benchmark_cache_codecs
+    python -m app.scripts.benchmark_cache_codecs --nodes 500 --rounds 2000
+"""
+import argparse
+import random
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List
+from ..models.content import DifficultyLevel
+from ..schemas.recommendation_schema import Recommendation
+from ..services import cache_codec
+from ..services.cache_codec import CacheCodec
+
+def sample_content(rng: random.Random, content_id: int) -> SimpleNamespace:
+    words = ["python", "async", "generators", "closures", "decorators", "typing", "testing", "caching"]
+    return SimpleNamespace(
+        id=content_id,
+        title=" ".join(rng.choice(words).title() for _ in range(rng.randint(2, 6))),
+        difficulty=rng.choice(list(DifficultyLevel)),
+        category_id=rng.randint(1, 20)
+    )
+
+def sample_recommendations(rng: random.Random, count: int) -> List[Dict[str, Any]]:
+    return [
+        Recommendation.build(
+            sample_content(rng, content_id),
+            "nlp_recommended",
+            "Based on your learning patterns",
+            similarity=rng.random()
+        )
+        for content_id in range(1, count + 1)
+    ]
+
+def sample_learning_path(rng: random.Random, nodes: int) -> Dict[str, Any]:
+    contents = [sample_content(rng, content_id) for content_id in range(1, nodes + 1)]
+    path_nodes = [
+        {
+            "id": content.id,
+            "title": content.title,
+            "difficulty": content.difficulty.value,
+            "completed": rng.random() < 0.3,
+            "score": round(rng.random() * 100, 1)
+        }
+        for content in contents
+    ]
+    edges = [
+        {"from": rng.randint(1, content.id - 1), "to": content.id, "type": "prerequisite"}
+        for content in contents[1:]
+        if rng.random() < 0.5
+    ]
+    recommended = [
+        {**node, "recommendation_type": "prerequisite", "confidence": 1.0}
+        for node in path_nodes[:5]
+    ]
+    return {"nodes": path_nodes, "edges": edges, "recommended_next": recommended}
+
+def entry(value: Any) -> Dict[str, Any]:
+    """Value wrapped the way CacheManager stores it"""
+    return {"value": value, "fresh_until": time.time() + 3600, "delta": 0.25}
+
+def benchmark(values: Dict[str, Any], rounds: int):
+    available = [
+        name for name in CacheCodec.codecs
+        if name == "json" or getattr(cache_codec, name) is not None
+    ]
+    print(f"{'cache_type':<22} {'codec':<8} {'zlib':<5} {'bytes':>8} {'encode us':>10} {'decode us':>10}")
+    for cache_type, value in values.items():
+        for name in available:
+            # Threshold 1 compresses whenever that makes the entry smaller
+            for threshold in (0, 1):
+                codec = CacheCodec(name, compress_min_bytes=threshold)
+                started = time.perf_counter()
+                for _ in range(rounds):
+                    encoded = codec.encode(value, cache_type)
+                encode_us = (time.perf_counter() - started) * 1e6 / rounds
+                started = time.perf_counter()
+                for _ in range(rounds):
+                    codec.decode(encoded, cache_type)
+                decode_us = (time.perf_counter() - started) * 1e6 / rounds
+                compressed = "yes" if encoded[:1] == cache_codec.COMPRESSED else "no"
+                print(f"{cache_type:<22} {name:<8} {compressed:<5} {len(encoded):>8} {encode_us:>10.1f} {decode_us:>10.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recommendations", type=int, default=10, help="items per recommendations value")
+    parser.add_argument("--nodes", type=int, default=100, help="nodes in the large learning path")
+    parser.add_argument("--rounds", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    values = {
+        "recommendations": entry(sample_recommendations(rng, args.recommendations)),
+        "learning_path": entry(sample_learning_path(rng, 10)),
+        f"learning_path[{args.nodes}]": entry(sample_learning_path(rng, args.nodes))
+    }
+    benchmark(values, args.rounds)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Compare BM25 index search latency against the ilike substring scan, and
+measure autocomplete latency percentiles.
+
+Usage:
+    python -m app.scripts.benchmark_search                   # content in the configured database
+    python -m app.scripts.benchmark_search --synthetic 50000 # generated corpus in in-memory SQLite
+"""
+import argparse
+import time
+import numpy as np
+from sqlalchemy import Column, Integer, MetaData, String, Table, Text, create_engine, select
+from ..services.bm25_index import BM25Index
+from ..services.prefix_index import PrefixIndex
+
+def synthetic_corpus(size: int, vocabulary: int = 20000, words: int = 300):
+    rng = np.random.default_rng(0)
+    terms = [f"term{i}" for i in range(vocabulary)]
+    # Zipf-distributed word frequencies, like natural text
+    weights = 1.0 / np.arange(1, vocabulary + 1)
+    weights /= weights.sum()
+    for content_id in range(1, size + 1):
+        picks = rng.choice(vocabulary, size=words + 5, p=weights)
+        yield content_id, " ".join(terms[i] for i in picks[:5]), " ".join(terms[i] for i in picks[5:])
+
+def benchmark(connection, table, queries, k: int = 10):
+    rows = connection.execute(select(table.c.id, table.c.title, table.c.content)).all()
+    index = BM25Index()
+    started = time.perf_counter()
+    for content_id, title, body in rows:
+        index.add(content_id, title or "", body or "")
+    print(f"Built BM25 index over {len(rows)} documents in {time.perf_counter() - started:.2f}s")
+
+    started = time.perf_counter()
+    for query in queries:
+        connection.execute(
+            select(table.c.id).where(table.c.title.ilike(f"%{query}%") | table.c.content.ilike(f"%{query}%")).limit(k)
+        ).all()
+    ilike_ms = (time.perf_counter() - started) * 1000 / len(queries)
+    print(f"ilike        {ilike_ms:.3f} ms/query")
+
+    started = time.perf_counter()
+    for query in queries:
+        index.search(query, k)
+    bm25_ms = (time.perf_counter() - started) * 1000 / len(queries)
+    print(f"bm25         {bm25_ms:.3f} ms/query")
+
+def benchmark_autocomplete(titles, lookups: int = 2000, k: int = 10):
+    rng = np.random.default_rng(2)
+    index = PrefixIndex()
+    started = time.perf_counter()
+    for item_id, title in enumerate(titles, start=1):
+        index.add("content", item_id, title, weight=float(rng.integers(1, 1000)))
+    print(f"Built prefix index over {len(titles)} titles in {time.perf_counter() - started:.2f}s")
+
+    # Keystroke-style prefixes of 1-6 characters; repeats hit the per-prefix cache like real traffic
+    prefixes = []
+    for title in rng.choice(titles, size=lookups):
+        word = str(title).split()[int(rng.integers(len(str(title).split())))] if str(title).split() else ""
+        prefixes.append(word[:int(rng.integers(1, 7))])
+    timings = []
+    for prefix in prefixes:
+        started = time.perf_counter()
+        index.suggest(prefix, k)
+        timings.append((time.perf_counter() - started) * 1000)
+    p50, p99 = np.percentile(timings, [50, 99])
+    print(f"autocomplete p50={p50:.3f} ms  p99={p99:.3f} ms  max={max(timings):.3f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--synthetic", type=int, default=0, help="number of generated documents")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        engine = create_engine("sqlite://")
+        table = Table(
+            "contents", MetaData(),
+            Column("id", Integer, primary_key=True),
+            Column("title", String),
+            Column("content", Text)
+        )
+        table.metadata.create_all(engine)
+        with engine.begin() as connection:
+            connection.execute(table.insert(), [
+                {"id": content_id, "title": title, "content": body}
+                for content_id, title, body in synthetic_corpus(args.synthetic)
+            ])
+    else:
+        from ..database.connection import engine
+        table = Table("contents", MetaData(), autoload_with=engine)
+
+    with engine.connect() as connection:
+        titles = [row[0] for row in connection.execute(select(table.c.title).limit(args.queries)).all() if row[0]]
+        if not titles:
+            print("No content to benchmark")
+            return
+        # Two-word queries taken from real titles so both paths have matches
+        queries = [" ".join(str(title).split()[:2]) for title in titles]
+        benchmark(connection, table, queries, k=args.k)
+        all_titles = [str(row[0]) for row in connection.execute(select(table.c.title)).all() if row[0]]
+        benchmark_autocomplete(all_titles, k=args.k)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""Rebuild the BM25 content index and write its snapshot, so workers start from a
+recent snapshot instead of re-tokenizing the table.
+
+Usage: python -m app.scripts.build_search_index
+"""
+from ..database.connection import SessionLocal
+from ..services.content_search_index import ContentSearchIndex
+
+def main():
+    db = SessionLocal()
+    try:
+        ContentSearchIndex(db).build_index()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""Add the full-text search column and its GIN index to an existing contents table.
+
+Safe to re-run. Usage: python -m app.scripts.create_search_index
+"""
+from sqlalchemy import text
+from ..database.connection import engine
+from ..models.content import SEARCH_VECTOR_EXPRESSION
+from ..core.logging import logger
+
+def main():
+    with engine.begin() as connection:
+        connection.execute(text(
+            "ALTER TABLE contents ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS ({SEARCH_VECTOR_EXPRESSION}) STORED"
+        ))
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_contents_search_vector ON contents USING GIN (search_vector)"
+        ))
+    logger.info("Full-text search column and index are in place")
+
+if __name__ == "__main__":
+    main()
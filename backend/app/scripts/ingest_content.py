@@ -0,0 +1,38 @@
+"""Bulk import content from a JSONL file of ContentCreate items (one JSON object
+per line with title, content, difficulty and category_id).
+
+Usage: python -m app.scripts.ingest_content FILE [--batch-size N] [--no-quizzes]
+Use - as FILE to read from stdin.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from typing import AsyncIterator, Optional
+from ..database.connection import SessionLocal
+from ..services.content_ingest import ContentIngestService
+
+async def read_lines(path: str) -> AsyncIterator[str]:
+    with (sys.stdin if path == "-" else open(path, encoding="utf-8")) as f:
+        for line in f:
+            yield line
+
+async def main(path: str, batch_size: Optional[int] = None, queue_quizzes: bool = True):
+    db = SessionLocal()
+    try:
+        report = await ContentIngestService(db).ingest(
+            read_lines(path),
+            batch_size=batch_size,
+            queue_quizzes=queue_quizzes
+        )
+        print(json.dumps(report, indent=2))
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import content from JSONL")
+    parser.add_argument("path", help="JSONL file, or - for stdin")
+    parser.add_argument("--batch-size", type=int, default=None, help="rows per insert statement")
+    parser.add_argument("--no-quizzes", action="store_true", help="do not queue quiz generation")
+    args = parser.parse_args()
+    asyncio.run(main(args.path, args.batch_size, not args.no_quizzes))
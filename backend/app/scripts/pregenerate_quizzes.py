@@ -0,0 +1,60 @@
+"""Generate quizzes for every content item that does not have one yet, so first
+views of a quiz are a plain database read.
+
+Usage: python -m app.scripts.pregenerate_quizzes [--concurrency N] [--category-id ID]
+"""
+import argparse
+import asyncio
+from typing import List, Optional
+from ..database.connection import SessionLocal
+from ..models.content import Content
+from ..models.quiz import Quiz
+from ..services.ai_service import AIService
+from ..services.openai_scheduler import Priority
+from ..services.quiz_service import QuizService
+from ..core.logging import logger
+
+def pending_content_ids(category_id: Optional[int] = None) -> List[int]:
+    db = SessionLocal()
+    try:
+        query = db.query(Content.id).filter(
+            ~db.query(Quiz.id).filter(Quiz.content_id == Content.id).exists()
+        )
+        if category_id is not None:
+            query = query.filter(Content.category_id == category_id)
+        return [content_id for (content_id,) in query.order_by(Content.id).all()]
+    finally:
+        db.close()
+
+async def generate_one(content_id: int, ai_service: AIService, semaphore: asyncio.Semaphore) -> bool:
+    async with semaphore:
+        db = SessionLocal()
+        try:
+            content = db.query(Content).filter(Content.id == content_id).first()
+            if not content:
+                return False
+            await QuizService(db, ai_service).get_or_create(content, Priority.BACKGROUND)
+            return True
+        except Exception as e:
+            logger.error(f"Error generating quiz for content {content_id}: {str(e)}")
+            return False
+        finally:
+            db.close()
+
+async def main(concurrency: int = 4, category_id: Optional[int] = None):
+    content_ids = pending_content_ids(category_id)
+    logger.info(f"Generating quizzes for {len(content_ids)} content items")
+
+    ai_service = AIService()
+    semaphore = asyncio.Semaphore(concurrency)
+    results = await asyncio.gather(*[
+        generate_one(content_id, ai_service, semaphore) for content_id in content_ids
+    ])
+    logger.info(f"Generated {sum(results)} quizzes, {len(results) - sum(results)} failed")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-generate missing quizzes")
+    parser.add_argument("--concurrency", type=int, default=4, help="quizzes generated at once")
+    parser.add_argument("--category-id", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.category_id))
@@ -0,0 +1,26 @@
+"""Embed all content that is missing an embedding or whose text has changed,
+then retrain and persist the ANN index.
+
+Usage: python -m app.scripts.refresh_embeddings
+"""
+import asyncio
+from ..database.connection import SessionLocal
+from ..services.ai_service import AIService
+from ..services.content_events import content_embedded
+from ..services.embedding_store import EmbeddingStore
+from ..core.logging import logger
+
+async def main():
+    db = SessionLocal()
+    try:
+        store = EmbeddingStore(db, AIService())
+        refreshed = await store.refresh()
+        logger.info(f"Refreshed {refreshed} content embeddings")
+        store.build_index()
+        if refreshed:
+            await content_embedded()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,52 @@
+"""Bring an existing database up to the current models.
+
+Adds the contents.prerequisites_analyzed_at column, which every Content
+query selects, and the content_embeddings table. Merges duplicate quizzes
+for a content item into its oldest one, moving their results and progress
+over, then makes quizzes.content_id unique. Safe to re-run.
+Usage: python -m app.scripts.upgrade_schema
+"""
+from sqlalchemy import text
+from ..database.connection import engine
+from ..models.content_embedding import ContentEmbedding
+from ..core.logging import logger
+
+# Each quiz that is not the oldest for its content item, with the quiz it is merged into
+DUPLICATE_QUIZZES = """
+    SELECT id, keep_id FROM (
+        SELECT id, MIN(id) OVER (PARTITION BY content_id) AS keep_id
+        FROM quizzes WHERE content_id IS NOT NULL
+    ) ranked WHERE id <> keep_id
+"""
+
+def merge_duplicate_quizzes(connection) -> int:
+    for table in ("quiz_results", "user_progress"):
+        connection.execute(text(
+            f"UPDATE {table} SET quiz_id = duplicates.keep_id "
+            f"FROM ({DUPLICATE_QUIZZES}) duplicates WHERE {table}.quiz_id = duplicates.id"
+        ))
+    return connection.execute(text(
+        f"DELETE FROM quizzes WHERE id IN (SELECT id FROM ({DUPLICATE_QUIZZES}) duplicates)"
+    )).rowcount
+
+def main():
+    with engine.begin() as connection:
+        connection.execute(text(
+            "ALTER TABLE contents ADD COLUMN IF NOT EXISTS prerequisites_analyzed_at TIMESTAMP"
+        ))
+        ContentEmbedding.__table__.create(connection, checkfirst=True)
+
+        index = connection.execute(text(
+            "SELECT indexdef FROM pg_indexes WHERE tablename = 'quizzes' AND indexname = 'ix_quizzes_content_id'"
+        )).scalar()
+        if index is None or "UNIQUE" not in index:
+            # Serializes with quiz inserts until the unique index is in place
+            connection.execute(text("LOCK TABLE quizzes IN SHARE ROW EXCLUSIVE MODE"))
+            merged = merge_duplicate_quizzes(connection)
+            logger.info(f"Merged {merged} duplicate quizzes")
+            connection.execute(text("DROP INDEX IF EXISTS ix_quizzes_content_id"))
+            connection.execute(text("CREATE UNIQUE INDEX ix_quizzes_content_id ON quizzes (content_id)"))
+    logger.info("Database schema is up to date")
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,161 @@
-from typing import Dict, List, Optional, Any
-from openai import OpenAI
+from typing import Dict, List, Optional, Any, Callable, AsyncIterator
+from openai import OpenAI, AsyncOpenAI
+from datetime import timedelta
+from collections import Counter
+import asyncio
+import hashlib
 import json
+import weakref
 from ..core.config import settings
 from ..core.logging import logger
+from .ttl_cache import TTLCache, SingleFlight
+from .openai_scheduler import RateLimitScheduler, Priority, get_scheduler
 import openai
 from tenacity import retry, stop_after_attempt, wait_exponential
 import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
 
 class AIService:
-    def __init__(self):
+    # Shared across instances so the concurrency limit applies to the whole worker. Kept per
+    # event loop: the client's connections and the semaphore belong to the loop that made them,
+    # and scripts under asyncio.run or the job worker run on loops of their own
+    _async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = weakref.WeakKeyDictionary()
+    _semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+    _response_cache = TTLCache(max_size=settings.LLM_CACHE_MAX_SIZE)
+    _single_flight = SingleFlight()
+
+    cache_ttls = {
+        "generate_quiz": timedelta(days=7),
+        "analyze_prerequisites": timedelta(days=30),
+        "extract_concepts": timedelta(days=7),
+        "enhance_search_query": timedelta(days=1)
+    }
+
+    def __init__(self, use_async: Optional[bool] = None, timeout: Optional[float] = None):
         self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
         self.model = "gpt-4-turbo-preview"  # or your preferred model
         self.embedding_model = "text-embedding-3-small"
+        self.use_async = settings.OPENAI_ASYNC_CLIENT if use_async is None else use_async
+        self.timeout = timeout or settings.OPENAI_TIMEOUT
+
+    @classmethod
+    def _get_async_client(cls) -> AsyncOpenAI:
+        loop = asyncio.get_running_loop()
+        client = cls._async_clients.get(loop)
+        if client is None:
+            client = cls._async_clients[loop] = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        return client
+
+    @classmethod
+    def _get_semaphore(cls) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = cls._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = cls._semaphores[loop] = asyncio.Semaphore(settings.OPENAI_MAX_CONCURRENCY)
+        return semaphore
+
+    async def _call_openai(
+        self,
+        endpoint: Callable[[Any], Any],
+        timeout: Optional[float],
+        scheduler: RateLimitScheduler,
+        estimated_tokens: int,
+        priority: Priority,
+        **kwargs
+    ):
+        """Run an OpenAI call without blocking the event loop, within the rate and concurrency limits"""
+        timeout = timeout or self.timeout
+        # Queue for rate budget before taking a concurrency slot so waiting calls hold nothing
+        await scheduler.acquire(estimated_tokens, priority)
+        async with self._get_semaphore():
+            # The client enforces the timeout on each attempt
+            if self.use_async:
+                response = await endpoint(self._get_async_client())(timeout=timeout, **kwargs)
+            else:
+                response = await asyncio.to_thread(endpoint(self.client), timeout=timeout, **kwargs)
+
+        usage = getattr(response, "usage", None)
+        scheduler.record_usage(estimated_tokens, getattr(usage, "total_tokens", None))
+        return response
+
+    async def _chat_completion(
+        self,
+        timeout: Optional[float] = None,
+        priority: Priority = Priority.DEFAULT,
+        **kwargs
+    ):
+        return await self._call_openai(
+            lambda client: client.chat.completions.create,
+            timeout,
+            get_scheduler("chat"),
+            self._estimate_chat_tokens(kwargs),
+            priority,
+            **kwargs
+        )
+
+    async def _create_embedding(
+        self,
+        timeout: Optional[float] = None,
+        priority: Priority = Priority.DEFAULT,
+        **kwargs
+    ):
+        inputs = kwargs.get("input", [])
+        inputs = [inputs] if isinstance(inputs, str) else inputs
+        return await self._call_openai(
+            lambda client: client.embeddings.create,
+            timeout,
+            get_scheduler("embeddings"),
+            sum(self._estimate_tokens(str(text)) for text in inputs),
+            priority,
+            **kwargs
+        )
+
+    def _estimate_chat_tokens(self, request: Dict[str, Any]) -> int:
+        prompt = "".join(str(message.get("content", "")) for message in request.get("messages", []))
+        return self._estimate_tokens(prompt) + request.get("max_tokens", 500)
         
+    async def _cached_completion(
+        self,
+        method: str,
+        validate: Optional[Callable[[str], bool]] = None,
+        timeout: Optional[float] = None,
+        priority: Priority = Priority.DEFAULT,
+        **kwargs
+    ) -> Optional[str]:
+        """Chat completion text cached on model, prompt and parameters.
+
+        Concurrent identical calls share one upstream request. Empty responses
+        and responses rejected by validate are returned but not cached.
+        """
+        key = self._completion_cache_key(kwargs)
+        cached = self._response_cache.get(key)
+        if cached is not None:
+            return cached
+
+        async def fetch() -> Optional[str]:
+            response = await self._chat_completion(timeout=timeout, priority=priority, **kwargs)
+            message = response.choices[0].message if response.choices else None
+            text = message.content if message else None
+            if text and (validate is None or validate(text)):
+                ttl = self.cache_ttls.get(method)
+                self._response_cache.set(key, text, ttl.total_seconds() if ttl else None)
+            return text
+
+        return await self._single_flight.do(key, fetch)
+
+    @staticmethod
+    def _completion_cache_key(params: Dict[str, Any]) -> str:
+        payload = json.dumps(params, sort_keys=True, default=str)
+        return f"llm:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+    @staticmethod
+    def _is_json(text: str) -> bool:
+        try:
+            json.loads(text)
+            return True
+        except json.JSONDecodeError:
+            return False
+
     def _get_message_content(self, response) -> str:
         """Safely extract message content from OpenAI response"""
         if not response.choices:
@@ -21,8 +163,7 @@ class AIService:
         message = response.choices[0].message
         return message.content if message and message.content else "No content generated"
         
-    async def generate_content(self, topic: str, difficulty: str) -> Dict:
-        """Generate learning content using GPT-4"""
+    def _content_request(self, topic: str, difficulty: str) -> Dict[str, Any]:
         prompt = f"""Create a comprehensive learning module about {topic} at a {difficulty} level.
         Structure the response as follows:
         1. A catchy title
@@ -31,24 +172,58 @@ class AIService:
         4. Examples
         Make it engaging and conversational, similar to Duolingo's style."""
 
-        response = self.client.chat.completions.create(
-            model="gpt-4",
-            messages=[
+        return {
+            "model": "gpt-4",
+            "messages": [
                 {"role": "system", "content": "You are an expert teacher who creates engaging learning content."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.7,
-            max_tokens=1000
-        )
+            "temperature": 0.7,
+            "max_tokens": 1000
+        }
+
+    @staticmethod
+    def content_title(topic: str) -> str:
+        return f"Learning {topic}"
+
+    async def generate_content(self, topic: str, difficulty: str) -> Dict:
+        """Generate learning content using GPT-4"""
+        response = await self._chat_completion(**self._content_request(topic, difficulty))
         
         content = self._get_message_content(response)
         
         return {
-            "title": f"Learning {topic}",
+            "title": self.content_title(topic),
             "content": content
         }
 
-    async def generate_quiz(self, content: str) -> List[Dict]:
+    async def stream_content(self, topic: str, difficulty: str) -> AsyncIterator[str]:
+        """Generate learning content, yielding text fragments as the model produces them"""
+        request = self._content_request(topic, difficulty)
+        await get_scheduler("chat").acquire(self._estimate_chat_tokens(request), Priority.DEFAULT)
+        async with self._get_semaphore():
+            if self.use_async:
+                stream = await self._get_async_client().chat.completions.create(
+                    stream=True, timeout=self.timeout, **request
+                )
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        yield delta
+            else:
+                stream = await asyncio.to_thread(
+                    self.client.chat.completions.create, stream=True, timeout=self.timeout, **request
+                )
+                chunks = iter(stream)
+                while True:
+                    chunk = await asyncio.to_thread(next, chunks, None)
+                    if chunk is None:
+                        break
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        yield delta
+
+    async def generate_quiz(self, content: str, priority: Priority = Priority.DEFAULT) -> List[Dict]:
         """Generate quiz questions based on content"""
         prompt = f"""Based on this content: {content}
         Create 5 multiple-choice questions. Format as JSON with:
@@ -59,7 +234,10 @@ class AIService:
         Make questions engaging and varied in difficulty.
         Return ONLY valid JSON."""
 
-        response = self.client.chat.completions.create(
+        response_text = await self._cached_completion(
+            "generate_quiz",
+            validate=self._is_json,
+            priority=priority,
             model="gpt-4",
             messages=[
                 {"role": "system", "content": "You are an expert at creating educational assessments. Always return valid JSON."},
@@ -71,11 +249,10 @@ class AIService:
         
         # Parse the response into structured questions
         try:
-            content = self._get_message_content(response)
-            if content == "No content generated":
+            if not response_text:
                 raise ValueError("No content generated")
             
-            questions = json.loads(content)
+            questions = json.loads(response_text)
             if isinstance(questions, list):
                 return questions
             return [questions]  # Handle case where single question is returned
@@ -101,7 +278,10 @@ class AIService:
         3. Suggested difficulty (beginner/intermediate/advanced/expert)
         Return ONLY valid JSON."""
 
-        response = self.client.chat.completions.create(
+        response_text = await self._cached_completion(
+            "analyze_prerequisites",
+            validate=self._is_json,
+            priority=Priority.BACKGROUND,
             model="gpt-4",
             messages=[
                 {"role": "system", "content": "You are an expert at curriculum design and educational pathways. Always return valid JSON."},
@@ -112,11 +292,10 @@ class AIService:
         )
         
         try:
-            content = self._get_message_content(response)
-            if content == "No content generated":
+            if not response_text:
                 raise ValueError("No content generated")
                 
-            return json.loads(content)
+            return json.loads(response_text)
             
         except (json.JSONDecodeError, ValueError) as e:
             print(f"Error parsing prerequisites response: {e}")
@@ -126,18 +305,149 @@ class AIService:
                 "difficulty": "beginner"
             }
 
+    async def analyze_prerequisites_batch(self, topics: Dict[int, str], catalogue: Dict[int, str]) -> Dict[int, Dict]:
+        """Analyze many topics in one call, choosing prerequisites from a known catalogue.
+
+        Topics and catalogue entries are given by content id because titles
+        repeat; results are keyed by topic id. The model is asked for
+        prerequisite ids too, but may still answer with titles. The catalogue
+        goes most relevant first: entries past the prompt's token budget
+        (PREREQUISITE_CONTEXT_TOKENS less the reply) are left out.
+        """
+        system_message = "You are an expert at curriculum design and educational pathways. Always return valid JSON."
+        max_tokens = min(4000, 150 * len(topics) + 100)
+        topic_list = "\n".join(f"- [{topic_id}] {text}" for topic_id, text in topics.items())
+        template = """For each topic below, pick the prerequisites that should be learned first.
+        Every line starts with the item's id in brackets. Titles can repeat, so always refer to items by id.
+        Only choose prerequisites from the catalogue.
+        Topics:
+        {topic_list}
+        Catalogue:
+        {catalogue_list}
+        Provide a JSON object keyed by topic id, where each value has:
+        1. prerequisites (list of catalogue ids)
+        2. complexity (1-10)
+        3. difficulty (beginner/intermediate/advanced/expert)
+        Return ONLY valid JSON."""
+
+        budget = settings.PREREQUISITE_CONTEXT_TOKENS - max_tokens - self._estimate_tokens(
+            system_message + template.format(topic_list=topic_list, catalogue_list="")
+        )
+        catalogue_lines = []
+        for item_id, text in catalogue.items():
+            line = f"- [{item_id}] {text}"
+            budget -= self._estimate_tokens(line + "\n")
+            if budget < 0:
+                logger.debug(f"Prerequisite prompt holds {len(catalogue_lines)} of {len(catalogue)} catalogue items")
+                break
+            catalogue_lines.append(line)
+        prompt = template.format(topic_list=topic_list, catalogue_list="\n".join(catalogue_lines))
+
+        response_text = await self._cached_completion(
+            "analyze_prerequisites",
+            validate=self._is_json,
+            priority=Priority.BACKGROUND,
+            model="gpt-4",
+            messages=[
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.2,
+            max_tokens=max_tokens
+        )
+
+        try:
+            if not response_text:
+                raise ValueError("No content generated")
+
+            analysis = json.loads(response_text)
+            if not isinstance(analysis, dict):
+                raise ValueError("Expected a JSON object keyed by topic id")
+        except (json.JSONDecodeError, ValueError) as e:
+            logger.error(f"Error parsing batch prerequisites response: {str(e)}")
+            return {}
+
+        # A topic keyed by its text instead of its id is only usable if no other topic shares that text
+        text_counts = Counter(topics.values())
+        id_by_text = {text: topic_id for topic_id, text in topics.items() if text_counts[text] == 1}
+        results: Dict[int, Dict] = {}
+        for key, value in analysis.items():
+            if not isinstance(value, dict):
+                continue
+            topic_id = self.parse_item_id(key)
+            if topic_id not in topics:
+                topic_id = id_by_text.get(str(key).strip())
+            if topic_id is not None:
+                results[topic_id] = value
+        return results
+
+    @staticmethod
+    def parse_item_id(value: Any) -> Optional[int]:
+        """An item id as the model wrote it: 12, "12" or "[12]"; None for anything else"""
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        if isinstance(value, str):
+            text = value.strip().strip("[]").strip()
+            if text.isdigit():
+                return int(text)
+        return None
+
+    async def embed_texts(self, texts: List[str], priority: Priority = Priority.DEFAULT) -> List[List[float]]:
+        """Embed texts using as few requests as possible, preserving input order"""
+        # Truncate to fit the per-input token limit; the API rejects empty strings
+        inputs = [str(text)[:8000] or " " for text in texts]
+        batches = self._build_embedding_batches(inputs)
+        results = await asyncio.gather(*[self._embed_batch(batch, priority) for batch in batches])
+        return [embedding for batch_embeddings in results for embedding in batch_embeddings]
+
+    def _build_embedding_batches(self, inputs: List[str]) -> List[List[str]]:
+        """Pack inputs into batches within the per-request input and token limits"""
+        batches: List[List[str]] = []
+        current: List[str] = []
+        current_tokens = 0
+        for text in inputs:
+            tokens = self._estimate_tokens(text)
+            if current and (
+                len(current) >= settings.EMBEDDING_BATCH_SIZE
+                or current_tokens + tokens > settings.EMBEDDING_BATCH_MAX_TOKENS
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(text)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _estimate_tokens(self, text: str) -> int:
+        # Rough upper bound of ~3 characters per token for English text
+        return len(text) // 3 + 1
+
+    async def _embed_batch(self, batch: List[str], priority: Priority = Priority.DEFAULT) -> List[List[float]]:
+        """Embed one batch, splitting it in half if the API rejects it as too large"""
+        try:
+            response = await self._create_embedding(input=batch, model=self.embedding_model, priority=priority)
+        except openai.BadRequestError as e:
+            if len(batch) == 1:
+                raise
+            logger.warning(f"Embedding batch of {len(batch)} rejected, splitting: {str(e)}")
+            middle = len(batch) // 2
+            left, right = await asyncio.gather(
+                self._embed_batch(batch[:middle], priority),
+                self._embed_batch(batch[middle:], priority)
+            )
+            return left + right
+
+        # Results are not guaranteed to come back in input order
+        ordered = sorted(response.data, key=lambda item: item.index)
+        return [item.embedding for item in ordered]
+
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
     async def analyze_content_relationships(self, content_texts: List[str]) -> Dict[str, Any]:
         """Analyze relationships between content pieces using embeddings"""
         try:
             # Get embeddings for all content
-            embeddings = []
-            for text in content_texts:
-                response = self.client.embeddings.create(
-                    input=text[:8000],  # Truncate to fit token limit
-                    model=self.embedding_model
-                )
-                embeddings.append(response.data[0].embedding)
+            embeddings = await self.embed_texts(content_texts)
 
             # Convert list to numpy array for cosine similarity
             embeddings_array = np.array(embeddings)
@@ -161,24 +471,10 @@ class AIService:
     async def calculate_content_similarity(self, content: str, reference_texts: List[str]) -> float:
         """Calculate similarity between content and reference texts"""
         try:
-            # Get embedding for new content
-            content_embedding = self.client.embeddings.create(
-                input=str(content)[:8000],  # Convert to string and truncate
-                model=self.embedding_model
-            )
-            content_vector = np.array([content_embedding.data[0].embedding])
-
-            # Get embeddings for reference texts
-            reference_embeddings = []
-            for text in reference_texts:
-                response = self.client.embeddings.create(
-                    input=str(text)[:8000],  # Convert to string and truncate
-                    model=self.embedding_model
-                )
-                reference_embeddings.append(response.data[0].embedding)
-            
-            # Convert to numpy array
-            reference_array = np.array(reference_embeddings)
+            # Embed the new content and all reference texts together
+            embeddings = await self.embed_texts([content] + list(reference_texts))
+            content_vector = np.array(embeddings[:1])
+            reference_array = np.array(embeddings[1:])
 
             # Calculate similarity
             similarity = cosine_similarity(content_vector, reference_array)[0]
@@ -192,14 +488,15 @@ class AIService:
         """Extract key concepts from texts using GPT"""
         try:
             combined_text = " ".join(str(text) for text in texts)[:4000]
-            response = self.client.chat.completions.create(
+            content = await self._cached_completion(
+                "extract_concepts",
+                priority=Priority.BACKGROUND,
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "Extract key concepts from the following text. Return them as a comma-separated list."},
                     {"role": "user", "content": combined_text}
                 ]
             )
-            content = response.choices[0].message.content
             if not content:
                 return []
             concepts = content.split(",")
@@ -213,14 +510,16 @@ class AIService:
         Enhances search query using AI to improve search results
         """
         try:
-            response = self.client.chat.completions.create(
+            enhanced = await self._cached_completion(
+                "enhance_search_query",
+                timeout=10.0,  # Interactive path, fall back to the raw query quickly
+                priority=Priority.INTERACTIVE,
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "Enhance this search query for educational content search. Keep it concise."},
                     {"role": "user", "content": query}
                 ]
             )
-            enhanced = response.choices[0].message.content
             return enhanced if enhanced else query
         except Exception as e:
             logger.error(f"Query enhancement failed: {str(e)}")
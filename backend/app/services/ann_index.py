@@ -0,0 +1,210 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import os
+import tempfile
+import numpy as np
+from ..core.logging import logger
+
+class IVFIndex:
+    """Inverted-file approximate nearest-neighbour index over cosine similarity.
+
+    Vectors are clustered with spherical k-means; a query only scores the
+    vectors in its n_probe closest clusters. Inserts and deletes touch a single
+    cluster, so the index can follow content changes without a rebuild.
+    """
+
+    _ALL = -1  # Packed-cache key for the whole index
+
+    def __init__(self, n_lists: Optional[int] = None, n_probe: int = 8, seed: int = 0):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self._vectors: Dict[int, np.ndarray] = {}
+        self._assignments: Dict[int, int] = {}
+        self._lists: List[Dict[int, None]] = [{}]
+        self._packed: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def __contains__(self, content_id: int) -> bool:
+        return content_id in self._vectors
+
+    def ids(self) -> List[int]:
+        return list(self._vectors)
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        matrix = np.asarray(matrix, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def build(self, ids: List[int], matrix: np.ndarray, iterations: int = 10):
+        """Train the clusters on the given vectors and index all of them"""
+        self._vectors.clear()
+        self._assignments.clear()
+        self._packed.clear()
+        if not ids:
+            self.centroids = None
+            self._lists = [{}]
+            return
+
+        vectors = self._normalize(matrix)
+        n_lists = self.n_lists or max(1, int(np.sqrt(len(ids))))
+        n_lists = min(n_lists, len(ids))
+
+        rng = np.random.default_rng(self.seed)
+        sample = vectors
+        if len(vectors) > n_lists * 256:
+            sample = vectors[rng.choice(len(vectors), n_lists * 256, replace=False)]
+
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)]
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for list_no in range(n_lists):
+                members = sample[labels == list_no]
+                if len(members):
+                    centroids[list_no] = members.mean(axis=0)
+            centroids = self._normalize(centroids)
+
+        self.centroids = centroids
+        self._lists = [{} for _ in range(n_lists)]
+        self._insert(ids, vectors)
+
+    def add(self, ids: List[int], matrix: np.ndarray):
+        """Insert or replace vectors"""
+        if not ids:
+            return
+        self.remove([content_id for content_id in ids if content_id in self._vectors])
+        self._insert(ids, self._normalize(matrix))
+
+    def remove(self, ids: Iterable[int]):
+        for content_id in ids:
+            if content_id not in self._vectors:
+                continue
+            list_no = self._assignments.pop(content_id)
+            del self._vectors[content_id]
+            self._lists[list_no].pop(content_id, None)
+            self._packed.pop(list_no, None)
+            self._packed.pop(self._ALL, None)
+
+    def _insert(self, ids: List[int], vectors: np.ndarray):
+        if self.centroids is None:
+            labels = np.zeros(len(ids), dtype=np.int64)
+        else:
+            labels = np.argmax(vectors @ self.centroids.T, axis=1)
+        for content_id, vector, list_no in zip(ids, vectors, labels):
+            list_no = int(list_no)
+            self._vectors[int(content_id)] = vector
+            self._assignments[int(content_id)] = list_no
+            self._lists[list_no][int(content_id)] = None
+            self._packed.pop(list_no, None)
+        self._packed.pop(self._ALL, None)
+
+    def _get_list(self, list_no: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Contiguous (ids, vectors) arrays for one cluster, rebuilt lazily after changes"""
+        packed = self._packed.get(list_no)
+        if packed is None:
+            ids = np.fromiter(self._lists[list_no].keys(), dtype=np.int64)
+            vectors = (
+                np.vstack([self._vectors[int(i)] for i in ids])
+                if len(ids) else np.empty((0, 0), dtype=np.float32)
+            )
+            packed = (ids, vectors)
+            self._packed[list_no] = packed
+        return packed
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 10,
+        exclude_ids: Iterable[int] = (),
+        n_probe: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """Approximate top-k (content id, cosine similarity) pairs, best first"""
+        if not self._vectors or k <= 0:
+            return []
+        query = self._normalize(query)
+        if self.centroids is None:
+            probe = [0]
+        else:
+            n_probe = min(n_probe or self.n_probe, len(self.centroids))
+            probe = np.argsort(-(self.centroids @ query))[:n_probe]
+
+        candidate_ids = []
+        candidate_scores = []
+        for list_no in probe:
+            ids, vectors = self._get_list(int(list_no))
+            if len(ids):
+                candidate_ids.append(ids)
+                candidate_scores.append(vectors @ query)
+        if not candidate_ids:
+            return []
+        return self._select(np.concatenate(candidate_ids), np.concatenate(candidate_scores), k, exclude_ids)
+
+    def search_exact(self, query: np.ndarray, k: int = 10, exclude_ids: Iterable[int] = ()) -> List[Tuple[int, float]]:
+        """Brute-force top-k over every indexed vector, used as the recall baseline"""
+        if not self._vectors or k <= 0:
+            return []
+        packed = self._packed.get(self._ALL)
+        if packed is None:
+            packed = (np.fromiter(self._vectors.keys(), dtype=np.int64), np.vstack(list(self._vectors.values())))
+            self._packed[self._ALL] = packed
+        ids, vectors = packed
+        return self._select(ids, vectors @ self._normalize(query), k, exclude_ids)
+
+    @staticmethod
+    def _select(ids: np.ndarray, scores: np.ndarray, k: int, exclude_ids: Iterable[int]) -> List[Tuple[int, float]]:
+        exclude = list(exclude_ids)
+        if exclude:
+            keep = ~np.isin(ids, exclude)
+            ids, scores = ids[keep], scores[keep]
+        if len(ids) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            ids, scores = ids[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return [(int(ids[i]), float(scores[i])) for i in order]
+
+    def save(self, path: str):
+        """Persist the index atomically so workers can reload it without retraining"""
+        ids = np.fromiter(self._vectors.keys(), dtype=np.int64)
+        vectors = np.vstack(list(self._vectors.values())) if len(ids) else np.empty((0, 0), dtype=np.float32)
+        assignments = np.array([self._assignments[int(i)] for i in ids], dtype=np.int64)
+        centroids = self.centroids if self.centroids is not None else np.empty((0, 0), dtype=np.float32)
+
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        # A temp file of its own: every worker may save at once when none has a snapshot yet
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(
+                    f,
+                    ids=ids,
+                    vectors=vectors,
+                    assignments=assignments,
+                    centroids=centroids,
+                    n_probe=np.array(self.n_probe)
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        with np.load(path) as data:
+            index = cls(n_probe=int(data["n_probe"]))
+            centroids = data["centroids"]
+            if centroids.size:
+                index.centroids = centroids
+                index.n_lists = len(centroids)
+                index._lists = [{} for _ in range(len(centroids))]
+            for content_id, vector, list_no in zip(data["ids"], data["vectors"], data["assignments"]):
+                content_id, list_no = int(content_id), int(list_no)
+                index._vectors[content_id] = vector
+                index._assignments[content_id] = list_no
+                index._lists[list_no][content_id] = None
+        logger.info(f"Loaded ANN index with {len(index)} vectors from {path}")
+        return index
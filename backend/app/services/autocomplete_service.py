@@ -0,0 +1,104 @@
+from typing import Dict, List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from datetime import datetime
+from ..models.content import Content, Category
+from ..models.user_progress import UserProgress
+from .prefix_index import PrefixIndex
+from .synced_index import SyncedIndex
+
+# No sync interval: refreshed in the background instead (see index_warmup)
+_prefixes: SyncedIndex[PrefixIndex] = SyncedIndex("autocomplete")
+
+class AutocompleteService:
+    """Search-as-you-type suggestions over content titles and category names, ranked by popularity"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def suggest(self, prefix: str, limit: int = 10, kind: Optional[str] = None) -> List[Dict]:
+        with _prefixes.lock:
+            return self.get_index().suggest(prefix, limit, kind)
+
+    def update(self, contents: List[Content] = (), categories: List[Category] = ()):
+        """Index new or renamed items written by this worker"""
+        with _prefixes.lock:
+            if _prefixes.index is None:
+                return
+            for content in contents:
+                _prefixes.index.add("content", content.id, str(content.title or ""))
+            for category in categories:
+                _prefixes.index.add("category", category.id, str(category.name or ""))
+
+    def get_index(self) -> PrefixIndex:
+        """The worker's index; only built here if startup did not manage to"""
+        return _prefixes.get(self._index_titles)
+
+    def refresh(self):
+        """Pull in titles changed or deleted by other workers and recompute popularity.
+
+        Run every AUTOCOMPLETE_SYNC_INTERVAL off the request path. The
+        popularity aggregate runs without the lock, so suggestions are only
+        held up by the id scan and while the results are applied.
+        """
+        if _prefixes.index is None:
+            self.build_index()
+            return
+        started_at = datetime.utcnow()
+        contents = _prefixes.changed_since(
+            self.db.query(Content.id, Content.title), Content.updated_at, _prefixes.synced_at
+        ).all()
+        categories = _prefixes.changed_since(
+            self.db.query(Category.id, Category.name), Category.updated_at, _prefixes.synced_at
+        ).all()
+        weights = self._popularity()
+
+        with _prefixes.lock:
+            index = _prefixes.index
+            for content_id, title in contents:
+                if title:
+                    index.add("content", content_id, str(title))
+            for category_id, name in categories:
+                if name:
+                    index.add("category", category_id, str(name))
+            # Read under the lock: an item this worker commits meanwhile is added by update() after this
+            live = {("content", content_id) for (content_id,) in self.db.query(Content.id)}
+            live.update(("category", category_id) for (category_id,) in self.db.query(Category.id))
+            for kind, item_id in _prefixes.deleted_ids(index.items(), live):
+                index.remove(kind, item_id)
+            index.set_weights(weights)
+            _prefixes.synced_at = started_at
+
+    def build_index(self) -> PrefixIndex:
+        return _prefixes.build(self._index_titles)
+
+    def _index_titles(self) -> PrefixIndex:
+        index = PrefixIndex()
+        index.extend(
+            ("content", content_id, str(title))
+            for content_id, title in self.db.query(Content.id, Content.title).all() if title
+        )
+        index.extend(
+            ("category", category_id, str(name))
+            for category_id, name in self.db.query(Category.id, Category.name).all() if name
+        )
+        index.set_weights(self._popularity())
+        return index
+
+    def _popularity(self) -> Dict:
+        """Learners per content item, and per category the total over its content; +1 so unseen items still rank"""
+        learners = dict(
+            self.db.query(UserProgress.content_id, func.count(func.distinct(UserProgress.user_id)))
+            .group_by(UserProgress.content_id)
+            .all()
+        )
+        weights: Dict = {}
+        category_weights: Dict[int, float] = {}
+        for content_id, category_id in self.db.query(Content.id, Content.category_id).all():
+            weight = 1.0 + learners.get(content_id, 0)
+            weights[("content", content_id)] = weight
+            if category_id is not None:
+                category_weights[category_id] = category_weights.get(category_id, 1.0) + weight
+        for category_id, weight in category_weights.items():
+            weights[("category", category_id)] = weight
+        return weights
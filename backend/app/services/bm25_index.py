@@ -0,0 +1,177 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from functools import lru_cache
+import gzip
+import heapq
+import json
+import math
+import os
+import re
+import tempfile
+from ..core.logging import logger
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_VOWELS = set("aeiouy")
+_STOPWORDS = frozenset("""
+a about an and are as at be but by can do does for from has have how i if in into is it its
+of on or our so such than that the their them then there these they this to was we were what
+when where which who why will with you your
+""".split())
+
+@lru_cache(maxsize=100000)
+def stem(word: str) -> str:
+    """Light inflectional stemmer: plurals, -ed, -ing and -ly, with y/e normalisation.
+
+    Not a full Porter stemmer; it only needs to map word forms onto the same
+    key consistently, e.g. code/codes/coding/coded -> "cod".
+    """
+    if len(word) <= 3 or word.isdigit():
+        return word
+
+    # Plurals
+    if word.endswith("sses"):
+        word = word[:-2]
+    elif word.endswith("ies"):
+        word = word[:-2]
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+
+    # Past tense, gerund and adverb endings, kept only if a vowel is left
+    for suffix in ("ing", "ed", "ly"):
+        if word.endswith(suffix):
+            base = word[:-len(suffix)]
+            if len(base) >= 3 and _VOWELS.intersection(base[:-1]):
+                word = base
+                if suffix != "ly" and base[-1] == base[-2] and base[-1] not in "lsz":
+                    word = base[:-1]
+            break
+
+    if word.endswith("y") and len(word) > 3 and _VOWELS.intersection(word[:-1]):
+        word = word[:-1] + "i"
+    if word.endswith("e") and len(word) > 3:
+        word = word[:-1]
+    return word
+
+def tokenize(text: str) -> List[str]:
+    return [
+        stem(token) for token in _TOKEN_PATTERN.findall(text.lower())
+        if token not in _STOPWORDS and (len(token) > 1 or token.isdigit())
+    ]
+
+class BM25Index:
+    """In-memory inverted index with Okapi BM25 ranking.
+
+    Documents are (title, body) pairs; title terms count title_weight times so
+    title matches outrank body matches. Adds and removes only touch the
+    postings of the document's own terms.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, title_weight: int = 2):
+        self.k1 = k1
+        self.b = b
+        self.title_weight = title_weight
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._doc_terms: Dict[int, Dict[str, int]] = {}
+        self._doc_lengths: Dict[int, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id in self._doc_terms
+
+    def ids(self) -> List[int]:
+        return list(self._doc_terms)
+
+    def term_counts(self, title: str, body: str) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for term in tokenize(title):
+            counts[term] = counts.get(term, 0) + self.title_weight
+        for term in tokenize(body):
+            counts[term] = counts.get(term, 0) + 1
+        return counts
+
+    def add(self, doc_id: int, title: str, body: str):
+        """Insert or replace a document"""
+        self._add_counts(doc_id, self.term_counts(title, body))
+
+    def _add_counts(self, doc_id: int, counts: Dict[str, int]):
+        if doc_id in self._doc_terms:
+            self.remove([doc_id])
+        self._doc_terms[doc_id] = counts
+        length = sum(counts.values())
+        self._doc_lengths[doc_id] = length
+        self._total_length += length
+        for term, frequency in counts.items():
+            self._postings.setdefault(term, {})[doc_id] = frequency
+
+    def remove(self, doc_ids: Iterable[int]):
+        for doc_id in doc_ids:
+            counts = self._doc_terms.pop(doc_id, None)
+            if counts is None:
+                continue
+            self._total_length -= self._doc_lengths.pop(doc_id)
+            for term in counts:
+                postings = self._postings[term]
+                del postings[doc_id]
+                if not postings:
+                    del self._postings[term]
+
+    def search(self, query: str, k: int = 10, after: Optional[Tuple[float, int]] = None) -> List[Tuple[int, float]]:
+        """Top k (doc_id, score) pairs for the query, best first.
+
+        after is the (score, doc_id) of the last result of the previous page;
+        only results ranked below it are returned.
+        """
+        if not self._doc_terms:
+            return []
+        n_docs = len(self._doc_terms)
+        average_length = self._total_length / n_docs
+        scores: Dict[int, float] = {}
+
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in postings.items():
+                length_norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + length_norm)
+
+        candidates = scores.items()
+        if after is not None:
+            last_score, last_id = after
+            candidates = [
+                (doc_id, score) for doc_id, score in candidates
+                if score < last_score or (score == last_score and doc_id > last_id)
+            ]
+        return heapq.nlargest(k, candidates, key=lambda item: (item[1], -item[0]))
+
+    def save(self, path: str):
+        """Persist the index atomically so workers can load it instead of re-tokenizing"""
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        # A temp file of its own: every worker may save at once when none has a snapshot yet
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8") as f:
+                json.dump({
+                    "k1": self.k1,
+                    "b": self.b,
+                    "title_weight": self.title_weight,
+                    "documents": self._doc_terms
+                }, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls(k1=data["k1"], b=data["b"], title_weight=data["title_weight"])
+        for doc_id, counts in data["documents"].items():
+            index._add_counts(int(doc_id), counts)
+        logger.info(f"Loaded BM25 index with {len(index)} documents from {path}")
+        return index
@@ -0,0 +1,107 @@
+from typing import Any, Dict, Optional
+import json
+import time
+import zlib
+from ..core.config import settings
+from ..core.logging import logger
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON = b"j"
+MSGPACK = b"m"
+COMPRESSED = b"z"
+
+class CacheCodec:
+    """Encodes cache entries to bytes: a one byte format tag, then the payload.
+
+    json always works; orjson (same JSON, several times faster) and msgpack
+    (smaller) are used when CACHE_CODEC names them and they are installed.
+    Encodings of at least CACHE_COMPRESS_MIN_BYTES are zlib-compressed when
+    that saves space, marked by a leading COMPRESSED byte. decode() goes by
+    the tags rather than the setting, so workers configured differently can
+    read each other's entries. Sizes and timings are counted per cache_type.
+    """
+
+    codecs = ("json", "orjson", "msgpack")
+    # Fast level: most of the saving at a fraction of the CPU of the default
+    compression_level = 1
+
+    def __init__(self, name: Optional[str] = None, compress_min_bytes: Optional[int] = None):
+        name = name or settings.CACHE_CODEC
+        if name not in self.codecs:
+            raise ValueError(f"Unknown cache codec: {name}")
+        if (name == "orjson" and orjson is None) or (name == "msgpack" and msgpack is None):
+            logger.warning(f"{name} is not installed, encoding cached values as json")
+            name = "json"
+        self.name = name
+        self.compress_min_bytes = settings.CACHE_COMPRESS_MIN_BYTES if compress_min_bytes is None else compress_min_bytes
+        self._counters: Dict[str, Dict[str, float]] = {}
+
+    def encode(self, value: Any, cache_type: str = "content") -> bytes:
+        """Raises TypeError for values the codec cannot represent"""
+        started = time.perf_counter()
+        if self.name == "msgpack":
+            data = MSGPACK + msgpack.packb(value)
+        elif self.name == "orjson":
+            # Non-str keys are stringified, as json.dumps does
+            data = JSON + orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+        else:
+            data = JSON + json.dumps(value, separators=(",", ":")).encode()
+
+        if self.compress_min_bytes and len(data) >= self.compress_min_bytes:
+            compressed = COMPRESSED + zlib.compress(data, self.compression_level)
+            if len(compressed) < len(data):
+                data = compressed
+        self._record(cache_type, "encode", time.perf_counter() - started, len(data))
+        return data
+
+    def decode(self, data: bytes, cache_type: str = "content") -> Any:
+        """Raises ValueError for data that encode() did not produce"""
+        started = time.perf_counter()
+        if data[:1] == COMPRESSED:
+            try:
+                data = zlib.decompress(data[1:])
+            except zlib.error as e:
+                raise ValueError(f"Corrupt compressed cache entry: {str(e)}")
+        tag, payload = data[:1], data[1:]
+        if tag == JSON:
+            value = orjson.loads(payload) if orjson is not None else json.loads(payload)
+        elif tag == MSGPACK:
+            if msgpack is None:
+                raise ValueError("Cache entry is msgpack but msgpack is not installed")
+            value = msgpack.unpackb(payload)
+        else:
+            raise ValueError(f"Unknown cache entry format {tag!r}")
+        self._record(cache_type, "decode", time.perf_counter() - started, len(data))
+        return value
+
+    def _record(self, cache_type: str, operation: str, seconds: float, size: int):
+        counters = self._counters.setdefault(cache_type, {
+            "encodes": 0, "encode_seconds": 0.0, "encoded_bytes": 0,
+            "decodes": 0, "decode_seconds": 0.0
+        })
+        counters[f"{operation}s"] += 1
+        counters[f"{operation}_seconds"] += seconds
+        if operation == "encode":
+            counters["encoded_bytes"] += size
+
+    def stats(self) -> Dict[str, Any]:
+        by_type = {}
+        for cache_type, counters in self._counters.items():
+            encodes, decodes = counters["encodes"], counters["decodes"]
+            by_type[cache_type] = {
+                "encodes": encodes,
+                "decodes": decodes,
+                "avg_bytes": counters["encoded_bytes"] / encodes if encodes else 0.0,
+                "avg_encode_ms": counters["encode_seconds"] * 1000 / encodes if encodes else 0.0,
+                "avg_decode_ms": counters["decode_seconds"] * 1000 / decodes if decodes else 0.0
+            }
+        return {"codec": self.name, "compress_min_bytes": self.compress_min_bytes, "by_type": by_type}
@@ -1,60 +1,396 @@
-from redis import Redis
-from typing import Optional, Any, Dict, List, Callable
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from typing import Optional, Any, Dict, Callable, Awaitable, Iterable, Tuple
+import asyncio
 import json
+import math
+import random
+import time
 from datetime import timedelta
+from sqlalchemy.orm import Session
 from ..core.config import settings
 from ..core.logging import logger
+from ..core.redis import get_redis
+from ..database.connection import SessionLocal
+from .cache_codec import CacheCodec
+from .locks import DistributedLock
+from .ttl_cache import SingleFlight, TTLCache
 
 class CacheManager:
+    """Read-through cache on the shared asyncio Redis pool.
+
+    Values must be JSON-compatible (services cache DTO dumps, not ORM rows)
+    and are stored encoded by CacheCodec. With CACHE_L1_ENABLED, decoded
+    values are also kept in process (L1) for a shorter, per cache_type TTL,
+    so hot keys skip the Redis round trip and the decode. invalidate()
+    publishes the keys it drops and every worker evicts them from its L1; a
+    worker that loses the subscription clears its L1 when it resubscribes,
+    since it may have missed messages.
+
+    When Redis stops answering the manager goes into degraded mode: lookups
+    skip Redis and call the fetch function directly, and Redis is probed
+    again after an exponentially growing pause, so an outage costs one
+    failed round trip per backoff period instead of one per request.
+    """
+
+    invalidation_channel = "cache:invalidate"
+
+    # Store an entry and add it to its tags' key sets, unless one of the tags was invalidated
+    # since the fetch started (ARGV[3], Redis time; '' skips the check). A fetch older than
+    # the invalidation markers live (ARGV[4]) can't be checked, so it isn't stored either.
+    # KEYS: the entry, then each tag's invalidated_at marker, then each tag's key set
+    _store_script = """
+    local tags = (#KEYS - 1) / 2
+    if ARGV[3] ~= '' then
+        local time = redis.call('TIME')
+        local started_at = tonumber(ARGV[3])
+        if tonumber(time[1]) + tonumber(time[2]) / 1000000 - started_at >= tonumber(ARGV[4]) then
+            return 0
+        end
+        for i = 2, tags + 1 do
+            local invalidated_at = redis.call('GET', KEYS[i])
+            if invalidated_at and tonumber(invalidated_at) >= started_at then
+                return 0
+            end
+        end
+    end
+    redis.call('SETEX', KEYS[1], ARGV[2], ARGV[1])
+    for i = tags + 2, #KEYS do
+        redis.call('SADD', KEYS[i], KEYS[1])
+        redis.call('EXPIRE', KEYS[i], ARGV[2])
+    end
+    return 1
+    """
+
+    # Stamp each tag's invalidated_at marker (KEYS[odd]) with Redis time for ARGV[1] seconds,
+    # then empty its key set (KEYS[even]) and return the keys it held
+    _invalidate_tags_script = """
+    local time = redis.call('TIME')
+    local now = time[1] .. '.' .. string.format('%06d', tonumber(time[2]))
+    local keys = {}
+    for i = 1, #KEYS, 2 do
+        redis.call('SET', KEYS[i], now, 'EX', ARGV[1])
+        for _, key in ipairs(redis.call('SMEMBERS', KEYS[i + 1])) do
+            table.insert(keys, key)
+        end
+        redis.call('DEL', KEYS[i + 1])
+    end
+    return keys
+    """
+
     def __init__(self):
-        self.redis: Optional[Redis] = None
+        self.redis: Optional[aioredis.Redis] = None
+        # Entries are read as bytes; everything else goes through the decoding client
+        self.binary_redis: Optional[aioredis.Redis] = None
+        self.codec = CacheCodec()
         self.cache_ttls = {
-            "recommendations": timedelta(hours=1),
+            # Long-lived because progress and content writes invalidate them by tag
+            "recommendations": timedelta(hours=12),
+            "learning_path": timedelta(hours=12),
             "content": timedelta(days=1),
             "quiz": timedelta(days=7),
             "user_progress": timedelta(minutes=30)
         }
+        # In-process copies expire well before Redis ones to bound staleness if an invalidation is missed
+        self.l1_ttls = {
+            "recommendations": timedelta(minutes=1),
+            "learning_path": timedelta(minutes=1),
+            "content": timedelta(minutes=5),
+            "quiz": timedelta(minutes=10),
+            "user_progress": timedelta(seconds=30)
+        }
+        # Values in L1 are shared by every caller; treat them as read-only
+        self.l1: Optional[TTLCache] = TTLCache(max_size=settings.CACHE_L1_MAX_SIZE) if settings.CACHE_L1_ENABLED else None
+        self._listener: Optional["asyncio.Task[None]"] = None
+        self._single_flight = SingleFlight()
+        self._revalidating: Dict[str, "asyncio.Task[None]"] = {}
+        self._failures = 0
+        self._retry_at = 0.0
+
+    @property
+    def available(self) -> bool:
+        return self.redis is not None and time.monotonic() >= self._retry_at
 
     async def init_cache(self):
+        self.redis = get_redis()
+        self.binary_redis = get_redis(binary=True)
         try:
-            self.redis = Redis.from_url(
-                settings.REDIS_URL, 
-                decode_responses=True,
-                socket_timeout=5
-            )
             await self.redis.ping()
+            self._mark_healthy()
             logger.info("Cache connection established")
-        except Exception as e:
-            logger.error(f"Cache connection failed: {str(e)}")
-            self.redis = None
+        except RedisError as e:
+            self._mark_failed(e)
+        if self.l1 is not None and self._listener is None:
+            self._listener = asyncio.create_task(self._listen_for_invalidations())
+
+    def _mark_healthy(self):
+        if self._failures:
+            logger.info("Cache connection restored")
+        self._failures = 0
+        self._retry_at = 0.0
+
+    def _mark_failed(self, e: Exception):
+        self._failures += 1
+        backoff = min(2 ** (self._failures - 1), settings.CACHE_RECONNECT_BACKOFF_MAX)
+        self._retry_at = time.monotonic() + backoff
+        logger.error(f"Cache unavailable, bypassing it for {backoff:.0f}s: {str(e)}")
 
     async def get_or_set(
-        self, 
-        key: str, 
-        fetch_func: Callable[[], Any], 
+        self,
+        key: str,
+        fetch_func: Callable[[], Awaitable[Any]],
         ttl: Optional[timedelta] = None,
-        cache_type: str = "content"
+        cache_type: str = "content",
+        tags: Iterable[str] = (),
+        refresh_func: Optional[Callable[[Session], Awaitable[Any]]] = None
     ) -> Any:
-        if not self.redis:
-            return await fetch_func()
-
-        try:
-            cached = await self.redis.get(key)
-            if cached:
-                logger.debug(f"Cache hit for key: {key}")
-                return json.loads(cached)
-
-            result = await fetch_func()
-            ttl_seconds = int(ttl.total_seconds()) if ttl else int(self.cache_ttls[cache_type].total_seconds())
-            
-            if result is not None:
-                await self.redis.setex(
-                    key,
-                    ttl_seconds,
-                    json.dumps(result)
-                )
+        """Cached value for key, or fetch_func's result, stored when not None.
+
+        Concurrent misses for a key share one fetch: in-process through
+        single-flight and across workers through a Redis lock, whose losers
+        re-read the value the winner stored.
+
+        refresh_func computes the same value as fetch_func in the Session it
+        is given. It runs after the response, so it must not touch the
+        caller's request-scoped session; the manager opens one per refresh.
+        With it, a value past its TTL is still served for CACHE_STALE_SECONDS
+        while one caller refreshes it in the background, and fresh values are
+        refreshed early with a probability that rises as expiry nears and
+        with how long the last fetch took (XFetch), so hot keys are usually
+        refreshed before they ever expire. Without it, a stale value is
+        refetched before returning, like a miss.
+
+        tags (e.g. "user:1", "category:2") name what the value depends on;
+        invalidate_tags() drops every entry stored with one of them.
+        """
+        ttl = ttl or self.cache_ttls.get(cache_type, self.cache_ttls["content"])
+        tags = tuple(tags)
+        if self.l1 is not None:
+            local = self.l1.get(key)
+            if local is not None:
+                return local
+
+        if not self.available:
+            return self._store_local(key, await self._single_flight.do(key, fetch_func), cache_type)
+
+        try:
+            entry = await self._read(key, cache_type)
+        except RedisError as e:
+            self._mark_failed(e)
+            return self._store_local(key, await self._single_flight.do(key, fetch_func), cache_type)
+        self._mark_healthy()
+
+        if entry is not None:
+            logger.debug(f"Cache hit for key: {key}")
+            remaining = entry["fresh_until"] - time.time()
+            if refresh_func is None:
+                if remaining > 0:
+                    return self._store_local(key, entry["value"], cache_type, remaining)
+                return await self._single_flight.do(key, lambda: self._fetch_once(key, fetch_func, ttl, cache_type, tags))
+            if remaining <= 0 or self._refresh_early(remaining, entry["delta"]):
+                self._revalidate_in_background(key, refresh_func, ttl, cache_type, tags)
+            if remaining <= 0:
+                # Stale copies stay out of L1 so they are not served past the refresh
+                return entry["value"]
+            return self._store_local(key, entry["value"], cache_type, remaining)
+
+        return await self._single_flight.do(key, lambda: self._fetch_once(key, fetch_func, ttl, cache_type, tags))
+
+    async def _read(self, key: str, cache_type: str) -> Optional[Dict[str, Any]]:
+        cached = await self.binary_redis.get(key)
+        if cached is None:
+            return None
+        try:
+            entry = self.codec.decode(cached, cache_type)
+        except ValueError as e:
+            logger.warning(f"Unreadable cache entry for key {key}, treating it as a miss: {str(e)}")
+            return None
+        # Anything not written by _store, e.g. by an older release, is treated as a miss
+        if not isinstance(entry, dict) or set(entry) != {"value", "fresh_until", "delta"}:
+            return None
+        return entry
+
+    @staticmethod
+    def _refresh_early(remaining: float, delta: float) -> bool:
+        """XFetch: refresh when delta * beta * -ln(U) exceeds the time left"""
+        return delta * settings.CACHE_EARLY_REFRESH_BETA * -math.log(1.0 - random.random()) >= remaining
+
+    async def _fetch_once(self, key: str, fetch_func: Callable[[], Awaitable[Any]], ttl: timedelta, cache_type: str, tags: Tuple[str, ...]) -> Any:
+        lock = DistributedLock(f"cache:{key}", ttl=settings.CACHE_LOCK_TTL, wait=settings.CACHE_LOCK_WAIT)
+        acquired = await lock.acquire()
+        try:
+            if acquired:
+                # Another worker may have filled the key while we waited for the lock
+                try:
+                    entry = await self._read(key, cache_type)
+                except RedisError:
+                    entry = None
+                if entry is not None and entry["fresh_until"] > time.time():
+                    return self._store_local(key, entry["value"], cache_type, entry["fresh_until"] - time.time())
+            else:
+                logger.warning(f"Timed out waiting for another worker to fill {key}, fetching it here")
+            return await self._fetch_and_store(key, fetch_func, ttl, cache_type, tags)
+        finally:
+            if acquired:
+                await lock.release()
+
+    async def _fetch_and_store(self, key: str, fetch_func: Callable[[], Awaitable[Any]], ttl: timedelta, cache_type: str, tags: Tuple[str, ...]) -> Any:
+        started_at = None
+        if tags:
+            try:
+                # On Redis' clock, which invalidate_tags() stamps its markers with
+                started_at = await self._redis_time()
+            except RedisError as e:
+                self._mark_failed(e)
+        timer = time.monotonic()
+        result = await fetch_func()
+        delta = time.monotonic() - timer
+        # A tagged value fetched without a start time can't be checked against invalidations
+        if result is None or (tags and started_at is None):
+            return result
+        if not await self._store(key, result, ttl, delta, cache_type, tags, started_at):
             return result
+        return self._store_local(key, result, cache_type)
+
+    async def _redis_time(self) -> float:
+        seconds, microseconds = await self.redis.time()
+        return seconds + microseconds / 1_000_000
 
+    def _revalidate_in_background(self, key: str, refresh_func: Callable[[Session], Awaitable[Any]], ttl: timedelta, cache_type: str, tags: Tuple[str, ...]):
+        if key in self._revalidating:
+            return
+        task = asyncio.create_task(self._revalidate(key, refresh_func, ttl, cache_type, tags))
+        self._revalidating[key] = task
+        task.add_done_callback(lambda _: self._revalidating.pop(key, None))
+
+    async def _revalidate(self, key: str, refresh_func: Callable[[Session], Awaitable[Any]], ttl: timedelta, cache_type: str, tags: Tuple[str, ...]):
+        # Don't wait: if another worker holds the lock it is already refreshing this key
+        lock = DistributedLock(f"cache:{key}", ttl=settings.CACHE_LOCK_TTL, wait=0)
+        if not await lock.acquire():
+            return
+        # The request that triggered the refresh has closed its session by now
+        db = SessionLocal()
+        try:
+            await self._fetch_and_store(key, lambda: refresh_func(db), ttl, cache_type, tags)
         except Exception as e:
+            logger.error(f"Background refresh failed for key {key}: {str(e)}")
+        finally:
+            db.close()
+            await lock.release()
+
+    def _store_local(self, key: str, value: Any, cache_type: str, max_ttl: Optional[float] = None) -> Any:
+        if self.l1 is not None and value is not None:
+            ttl = self.l1_ttls.get(cache_type, self.l1_ttls["content"]).total_seconds()
+            self.l1.set(key, value, min(ttl, max_ttl) if max_ttl is not None else ttl)
+        return value
+
+    async def invalidate(self, *keys: str):
+        """Drop keys from Redis and from every worker's L1"""
+        self._drop_local(keys)
+        if not self.available:
+            return
+        try:
+            await self.redis.delete(*keys)
+            if self.l1 is not None:
+                await self.redis.publish(self.invalidation_channel, json.dumps(list(keys)))
+        except RedisError as e:
+            self._mark_failed(e)
+
+    def _drop_local(self, keys: Iterable[str]):
+        if self.l1 is not None:
+            for key in keys:
+                self.l1.delete(key)
+
+    async def _listen_for_invalidations(self):
+        delay = 1.0
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(self.invalidation_channel)
+                # Whatever was published while we were not subscribed is lost
+                self.l1.clear()
+                delay = 1.0
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is not None:
+                        self._drop_local(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache invalidation listener disconnected, retrying in {delay:.0f}s: {str(e)}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, settings.CACHE_RECONNECT_BACKOFF_MAX)
+            finally:
+                await pubsub.reset()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "redis_available": self.available,
+            "l1": self.l1.stats() if self.l1 is not None else None,
+            "codec": self.codec.stats()
+        }
+
+    async def _store(
+        self,
+        key: str,
+        value: Any,
+        ttl: timedelta,
+        delta: float,
+        cache_type: str = "content",
+        tags: Tuple[str, ...] = (),
+        started_at: Optional[float] = None
+    ) -> bool:
+        """Store value as fresh for ttl and servable while stale for CACHE_STALE_SECONDS after that.
+
+        Returns False without storing if one of the tags was invalidated after
+        started_at (Redis time), since the value may have been computed from
+        the old data. The check and the write are one script, so an
+        invalidation can't land between them.
+        """
+        entry = {"value": value, "fresh_until": time.time() + ttl.total_seconds(), "delta": delta}
+        expires_in = int(ttl.total_seconds()) + settings.CACHE_STALE_SECONDS
+        try:
+            encoded = self.codec.encode(entry, cache_type)
+            keys = [key]
+            keys.extend(self._tag_key(tag, "invalidated_at") for tag in tags)
+            keys.extend(self._tag_key(tag) for tag in tags)
+            stored = await self.binary_redis.eval(
+                self._store_script, len(keys), *keys,
+                encoded, expires_in, "" if started_at is None else repr(started_at), settings.CACHE_INVALIDATION_MEMORY
+            )
+            if not stored:
+                logger.debug(f"Not caching {key}: its data changed while it was being computed")
+            return bool(stored)
+        except RedisError as e:
+            self._mark_failed(e)
+        except (TypeError, ValueError) as e:
             logger.error(f"Cache error for key {key}: {str(e)}")
-            return await fetch_func() 
\ No newline at end of file
+        return False
+
+    @staticmethod
+    def _tag_key(tag: str, suffix: str = "keys") -> str:
+        return f"cache:tag:{tag}:{suffix}"
+
+    async def invalidate_tags(self, *tags: str):
+        """Drop every entry stored with any of the tags, in Redis and in every worker's L1"""
+        if self.redis is None:
+            await self.init_cache()
+        if not self.available:
+            # The tagged keys are unknown without Redis; drop this worker's copies wholesale
+            if self.l1 is not None:
+                self.l1.clear()
+            return
+        try:
+            tag_keys = []
+            for tag in tags:
+                # The marker lets in-flight fetches that started before now see they must not store
+                tag_keys.extend((self._tag_key(tag, "invalidated_at"), self._tag_key(tag)))
+            keys = set(await self.redis.eval(
+                self._invalidate_tags_script, len(tag_keys), *tag_keys, settings.CACHE_INVALIDATION_MEMORY
+            ))
+        except RedisError as e:
+            self._mark_failed(e)
+            return
+        if keys:
+            await self.invalidate(*keys)
+        logger.debug(f"Invalidated {len(keys)} cache entries tagged {', '.join(tags)}")
@@ -0,0 +1,53 @@
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from datetime import datetime
+from ..models.content import Content
+from ..core.config import settings
+from .trigram_index import TrigramIndex
+from .synced_index import SyncedIndex
+
+_trigrams: SyncedIndex[TrigramIndex] = SyncedIndex(
+    "duplicate",
+    sync_interval=lambda: settings.DUPLICATE_INDEX_SYNC_INTERVAL
+)
+
+class ContentDuplicateIndex:
+    """The worker's trigram index over content titles, for duplicate checks before generation"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def find(self, title: str, threshold: float) -> Optional[int]:
+        """Id of the content whose title is most similar to title, if the ratio exceeds threshold"""
+        with _trigrams.lock:
+            match = self.get_index().find(title, threshold)
+        return match[0] if match else None
+
+    def update(self, contents: List[Content]):
+        """Index new or renamed content written by this worker"""
+        with _trigrams.lock:
+            if _trigrams.index is None:
+                return
+            for content in contents:
+                _trigrams.index.add(content.id, str(content.title or ""))
+
+    def get_index(self) -> TrigramIndex:
+        return _trigrams.get(self._index_titles, self._sync_index)
+
+    def build_index(self) -> TrigramIndex:
+        return _trigrams.build(self._index_titles)
+
+    def _index_titles(self) -> TrigramIndex:
+        index = TrigramIndex()
+        for content_id, title in self.db.query(Content.id, Content.title).all():
+            index.add(content_id, str(title or ""))
+        return index
+
+    def _sync_index(self, index: TrigramIndex, since: Optional[datetime]):
+        query = self.db.query(Content.id, Content.title)
+        for content_id, title in _trigrams.changed_since(query, Content.updated_at, since).all():
+            index.add(content_id, str(title or ""))
+
+        # Deleted content is no longer reported as a duplicate
+        for content_id in _trigrams.deleted_ids(index.ids(), (content_id for (content_id,) in self.db.query(Content.id))):
+            index.remove(content_id)
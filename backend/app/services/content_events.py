@@ -0,0 +1,37 @@
+from typing import List
+from sqlalchemy.orm import Session
+from ..models.content import Content, Category
+from ..core.logging import logger
+from ..core.dependencies import cache_manager
+from .ai_service import AIService
+from .autocomplete_service import AutocompleteService
+from .content_duplicate_index import ContentDuplicateIndex
+from .content_search_index import ContentSearchIndex
+from .embedding_store import EmbeddingStore
+from .search_cache import SearchResultCache
+
+async def content_indexed(db: Session, contents: List[Content]):
+    """Update this worker's in-memory indexes and drop cached search pages after content rows are committed"""
+    ContentSearchIndex(db).update(contents)
+    ContentDuplicateIndex(db).update(contents)
+    AutocompleteService(db).update(contents=contents)
+    await SearchResultCache().invalidate()
+    # New content can enter any recommendation and its category's learning paths
+    await cache_manager.invalidate_tags("catalog", *{f"category:{c.category_id}" for c in contents})
+
+async def content_saved(db: Session, ai_service: AIService, contents: List[Content]):
+    """Bring the derived search structures, embeddings included, up to date after content rows are committed"""
+    await content_indexed(db, contents)
+    try:
+        if await EmbeddingStore(db, ai_service).upsert(contents):
+            await content_embedded()
+    except Exception as e:
+        # The refresh job picks up anything that failed to embed here
+        logger.error(f"Error embedding content {[c.id for c in contents]}: {str(e)}")
+
+async def content_embedded():
+    """Drop cached search pages once new embeddings can change semantic results"""
+    await SearchResultCache().invalidate()
+
+def category_saved(db: Session, categories: List[Category]):
+    AutocompleteService(db).update(categories=categories)
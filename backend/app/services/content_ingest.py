@@ -0,0 +1,107 @@
+from typing import Any, AsyncIterator, Dict, List, Optional
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+import time
+from ..models.content import Content, Category
+from ..schemas.content_schema import ContentCreate
+from ..core.config import settings
+from ..core.logging import logger
+from .content_duplicate_index import ContentDuplicateIndex
+from .content_events import content_indexed
+from .generation_jobs import queue_embedding, queue_prerequisite_analysis, queue_quiz_generation
+from .trigram_index import TrigramIndex
+
+class ContentIngestService:
+    """Streams JSONL curriculum items into the contents table in batches.
+
+    Each line is validated as ContentCreate and skipped if its title is a
+    near duplicate of existing content or of an earlier line. Accepted
+    items are inserted one batch per statement; embedding and quiz
+    generation are queued as background jobs rather than run inline.
+    """
+
+    max_reported_errors = 100
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    async def ingest(
+        self,
+        lines: AsyncIterator[str],
+        batch_size: Optional[int] = None,
+        duplicate_threshold: Optional[float] = None,
+        queue_quizzes: bool = True
+    ) -> Dict[str, Any]:
+        batch_size = batch_size or settings.INGEST_BATCH_SIZE
+        threshold = duplicate_threshold if duplicate_threshold is not None else settings.INGEST_DUPLICATE_THRESHOLD
+        started = time.monotonic()
+        report: Dict[str, Any] = {"read": 0, "inserted": 0, "duplicates": 0, "invalid": 0, "errors": []}
+
+        category_ids = {category_id for (category_id,) in self.db.query(Category.id).all()}
+        existing = ContentDuplicateIndex(self.db)
+        # Titles accepted but not yet inserted, so duplicates within a batch are caught too
+        pending = TrigramIndex()
+        batch: List[ContentCreate] = []
+
+        line_number = 0
+        async for line in lines:
+            line_number += 1
+            if not line.strip():
+                continue
+            report["read"] += 1
+            try:
+                item = ContentCreate.model_validate_json(line)
+            except ValidationError as e:
+                self._reject(report, line_number, str(e))
+                continue
+            if item.category_id not in category_ids:
+                self._reject(report, line_number, f"Category {item.category_id} not found")
+                continue
+            if existing.find(item.title, threshold) is not None or pending.find(item.title, threshold):
+                report["duplicates"] += 1
+                continue
+
+            pending.add(len(batch), item.title)
+            batch.append(item)
+            if len(batch) >= batch_size:
+                await self._insert_batch(batch, report, queue_quizzes, started)
+                batch, pending = [], TrigramIndex()
+
+        if batch:
+            await self._insert_batch(batch, report, queue_quizzes, started)
+
+        report["seconds"] = round(time.monotonic() - started, 3)
+        report["rows_per_second"] = round(report["inserted"] / report["seconds"], 1) if report["seconds"] else 0.0
+        logger.info(
+            f"Ingested {report['inserted']} of {report['read']} items "
+            f"({report['duplicates']} duplicates, {report['invalid']} invalid) "
+            f"at {report['rows_per_second']} rows/s"
+        )
+        return report
+
+    async def _insert_batch(self, batch: List[ContentCreate], report: Dict[str, Any], queue_quizzes: bool, started: float):
+        rows = [item.model_dump() for item in batch]
+        # One executemany round trip per batch; ids come back in parameter order
+        content_ids = list(self.db.scalars(
+            insert(Content).returning(Content.id, sort_by_parameter_order=True),
+            rows
+        ))
+        self.db.commit()
+
+        contents = [Content(id=content_id, **row) for content_id, row in zip(content_ids, rows)]
+        await content_indexed(self.db, contents)
+        await queue_embedding(content_ids)
+        if queue_quizzes:
+            for content_id in content_ids:
+                await queue_quiz_generation(content_id)
+        await queue_prerequisite_analysis(row["category_id"] for row in rows)
+
+        report["inserted"] += len(content_ids)
+        elapsed = time.monotonic() - started
+        logger.info(f"Inserted {report['inserted']} content items ({report['inserted'] / elapsed:.0f} rows/s)")
+
+    def _reject(self, report: Dict[str, Any], line_number: int, error: str):
+        report["invalid"] += 1
+        if len(report["errors"]) < self.max_reported_errors:
+            report["errors"].append({"line": line_number, "error": error})
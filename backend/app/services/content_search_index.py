@@ -0,0 +1,64 @@
+from typing import List, Optional, Tuple
+from sqlalchemy.orm import Session
+from datetime import datetime
+from ..models.content import Content
+from ..core.config import settings
+from ..core.logging import logger
+from .bm25_index import BM25Index
+from .synced_index import SyncedIndex
+
+_bm25: SyncedIndex[BM25Index] = SyncedIndex(
+    "BM25",
+    sync_interval=lambda: settings.BM25_SYNC_INTERVAL,
+    snapshot_path=lambda: settings.BM25_INDEX_PATH,
+    load=BM25Index.load
+)
+
+class ContentSearchIndex:
+    """The worker's BM25 index over content titles and bodies"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def search(self, query: str, k: int = 50, after: Optional[Tuple[float, int]] = None) -> List[Tuple[int, float]]:
+        with _bm25.lock:
+            return self.get_index().search(query, k, after)
+
+    def update(self, contents: List[Content]):
+        """Index new or changed content written by this worker"""
+        with _bm25.lock:
+            if _bm25.index is None:
+                return
+            for content in contents:
+                _bm25.index.add(content.id, str(content.title or ""), str(content.content or ""))
+
+    def get_index(self) -> BM25Index:
+        """The worker's index, kept in sync with content written by other workers"""
+        return _bm25.get(self._index_rows, self._sync_index)
+
+    def build_index(self, batch_size: int = 1000) -> BM25Index:
+        """Index every content row and persist a snapshot"""
+        return _bm25.build(lambda: self._index_rows(batch_size))
+
+    def _index_rows(self, batch_size: int = 1000) -> BM25Index:
+        index = BM25Index()
+        rows = (
+            self.db.query(Content.id, Content.title, Content.content)
+            .order_by(Content.id)
+            .yield_per(batch_size)
+        )
+        for content_id, title, body in rows:
+            index.add(content_id, str(title or ""), str(body or ""))
+        return index
+
+    def _sync_index(self, index: BM25Index, since: Optional[datetime]):
+        query = self.db.query(Content.id, Content.title, Content.content)
+        rows = _bm25.changed_since(query, Content.updated_at, since).all()
+        for content_id, title, body in rows:
+            index.add(content_id, str(title or ""), str(body or ""))
+        if rows:
+            logger.info(f"Synced {len(rows)} changed content items into the BM25 index")
+
+        removed = _bm25.deleted_ids(index.ids(), (content_id for (content_id,) in self.db.query(Content.id)))
+        if removed:
+            index.remove(removed)
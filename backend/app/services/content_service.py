@@ -1,8 +1,11 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from sqlalchemy.orm import Session
 from ..models.content import Content
 from .ai_service import AIService
-from difflib import SequenceMatcher
+from .content_duplicate_index import ContentDuplicateIndex
+from .embedding_store import EmbeddingStore
+from .content_events import content_saved
+from .generation_jobs import queue_prerequisite_analysis
 
 class ContentService:
     def __init__(self, db: Session, ai_service: AIService):
@@ -27,20 +30,31 @@ class ContentService:
         )
         self.db.add(new_content)
         self.db.commit()
+
+        await content_saved(self.db, self.ai_service, [new_content])
+        await queue_prerequisite_analysis([category_id])
         
         return {"content": new_content, "is_duplicate": False}
 
     async def find_similar_content(self, topic: str, threshold: float = 0.85) -> Optional[Content]:
-        existing_content = self.db.query(Content).all()
-        
-        for content in existing_content:
-            similarity = SequenceMatcher(
-                None, 
-                topic.lower(), 
-                content.title.lower()
-            ).ratio()
-            
-            if similarity > threshold:
-                return content
-        
-        return None 
\ No newline at end of file
+        """Content whose title has a SequenceMatcher ratio above threshold with the topic, closest first"""
+        content_id = ContentDuplicateIndex(self.db).find(topic, threshold)
+        if content_id is None:
+            return None
+        return self.db.query(Content).filter(Content.id == content_id).first()
+
+    async def find_related_content(self, content: Content, limit: int = 5) -> List[Content]:
+        """Nearest neighbours of a content item by embedding, via the ANN index"""
+        store = EmbeddingStore(self.db, self.ai_service)
+        _, vectors = store.get_matrix([content.id])
+        if not len(vectors):
+            return []
+
+        matches = store.search(vectors[0], k=limit, exclude_ids=[content.id])
+        related = {
+            c.id: c
+            for c in self.db.query(Content).filter(
+                Content.id.in_([content_id for content_id, _ in matches])
+            ).all()
+        } if matches else {}
+        return [related[content_id] for content_id, _ in matches if content_id in related]
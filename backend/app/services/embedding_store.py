@@ -0,0 +1,173 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from datetime import datetime
+import hashlib
+import numpy as np
+from ..models.content import Content
+from ..models.content_embedding import ContentEmbedding
+from ..core.config import settings
+from ..core.logging import logger
+from .ai_service import AIService
+from .ann_index import IVFIndex
+from .openai_scheduler import Priority
+from .synced_index import SyncedIndex
+
+_ann: SyncedIndex[IVFIndex] = SyncedIndex(
+    "ANN",
+    sync_interval=lambda: settings.ANN_SYNC_INTERVAL,
+    snapshot_path=lambda: settings.ANN_INDEX_PATH,
+    load=IVFIndex.load
+)
+
+class EmbeddingStore:
+    """Persistent content embeddings, computed at write time and read in bulk"""
+
+    def __init__(self, db: Session, ai_service: AIService):
+        self.db = db
+        self.ai_service = ai_service
+
+    @staticmethod
+    def content_text(content: Content) -> str:
+        title = str(getattr(content, 'title', '') or '')
+        body = str(getattr(content, 'content', '') or '')
+        return f"{title}\n\n{body}"
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    async def upsert(self, contents: List[Content], priority: Priority = Priority.DEFAULT) -> int:
+        """Embed the given contents whose text changed since they were last embedded"""
+        content_ids = [c.id for c in contents if c.id is not None]
+        if not content_ids:
+            return 0
+
+        existing: Dict[int, ContentEmbedding] = {
+            row.content_id: row
+            for row in self.db.query(ContentEmbedding)
+            .filter(ContentEmbedding.content_id.in_(content_ids))
+            .all()
+        }
+
+        stale: List[Tuple[Content, str, str]] = []
+        for content in contents:
+            text = self.content_text(content)
+            digest = self.text_hash(text)
+            row = existing.get(content.id)
+            if row is None or row.text_hash != digest or row.model != self.ai_service.embedding_model:
+                stale.append((content, text, digest))
+
+        if not stale:
+            return 0
+
+        vectors = await self.ai_service.embed_texts([text for _, text, _ in stale], priority)
+        for (content, _, digest), vector in zip(stale, vectors):
+            array = np.asarray(vector, dtype=np.float32)
+            row = existing.get(content.id)
+            if row is None:
+                row = ContentEmbedding(content_id=content.id)
+                self.db.add(row)
+            row.text_hash = digest
+            row.model = self.ai_service.embedding_model
+            row.dimensions = int(array.shape[0])
+            row.vector = array.tobytes()
+
+        self.db.commit()
+        with _ann.lock:
+            if _ann.index is not None:
+                _ann.index.add([content.id for content, _, _ in stale], np.asarray(vectors, dtype=np.float32))
+        logger.info(f"Embedded {len(stale)} of {len(contents)} content items")
+        return len(stale)
+
+    def delete(self, content_ids: List[int]):
+        if not content_ids:
+            return
+        self.db.query(ContentEmbedding).filter(
+            ContentEmbedding.content_id.in_(content_ids)
+        ).delete(synchronize_session=False)
+        self.db.commit()
+        with _ann.lock:
+            if _ann.index is not None:
+                _ann.index.remove(content_ids)
+
+    async def refresh(self, batch_size: int = 500) -> int:
+        """Re-embed every content row whose embedding is missing or out of date"""
+        refreshed = 0
+        last_id = 0
+        while True:
+            batch = (
+                self.db.query(Content)
+                .filter(Content.id > last_id)
+                .order_by(Content.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not batch:
+                break
+            refreshed += await self.upsert(batch, Priority.BACKGROUND)
+            last_id = batch[-1].id
+        return refreshed
+
+    def get_matrix(self, content_ids: Optional[List[int]] = None) -> Tuple[List[int], np.ndarray]:
+        """Load embeddings as (content ids, dense float32 matrix with one row per id)"""
+        query = self.db.query(ContentEmbedding.content_id, ContentEmbedding.vector).filter(
+            ContentEmbedding.model == self.ai_service.embedding_model
+        )
+        if content_ids is not None:
+            if not content_ids:
+                return [], np.empty((0, 0), dtype=np.float32)
+            query = query.filter(ContentEmbedding.content_id.in_(content_ids))
+
+        rows = query.order_by(ContentEmbedding.content_id).all()
+        if not rows:
+            return [], np.empty((0, 0), dtype=np.float32)
+
+        ids = [row[0] for row in rows]
+        matrix = np.vstack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+        return ids, matrix
+
+    def search(self, vector: np.ndarray, k: int = 10, exclude_ids: Iterable[int] = ()) -> List[Tuple[int, float]]:
+        """Content closest to vector by cosine similarity; approximate once the catalogue is large.
+
+        The only way to query the shared index: searching it outside the lock
+        races with syncs running in other threads.
+        """
+        with _ann.lock:
+            index = self.get_index()
+            if len(index) >= settings.ANN_MIN_ITEMS:
+                return index.search(vector, k, exclude_ids)
+            return index.search_exact(vector, k, exclude_ids)
+
+    def get_index(self) -> IVFIndex:
+        """The worker's ANN index, kept in sync with embeddings written elsewhere"""
+        return _ann.get(self._train_index, self._sync_index)
+
+    def build_index(self) -> IVFIndex:
+        """Train a fresh index over every stored embedding and persist it"""
+        return _ann.build(self._train_index)
+
+    def _train_index(self) -> IVFIndex:
+        ids, matrix = self.get_matrix()
+        index = IVFIndex(n_probe=settings.ANN_N_PROBE)
+        index.build(ids, matrix)
+        return index
+
+    def _sync_index(self, index: IVFIndex, since: Optional[datetime]):
+        query = self.db.query(ContentEmbedding.content_id, ContentEmbedding.vector).filter(
+            ContentEmbedding.model == self.ai_service.embedding_model
+        )
+        rows = _ann.changed_since(query, ContentEmbedding.updated_at, since).all()
+        if rows:
+            index.add(
+                [row[0] for row in rows],
+                np.vstack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+            )
+
+        # Content re-embedded with another model is gone too
+        removed = _ann.deleted_ids(index.ids(), (
+            content_id for (content_id,) in self.db.query(ContentEmbedding.content_id).filter(
+                ContentEmbedding.model == self.ai_service.embedding_model
+            )
+        ))
+        if removed:
+            index.remove(removed)
@@ -0,0 +1,114 @@
+from typing import Any, Dict, Iterable, List, Optional
+from ..database.connection import SessionLocal
+from ..models.content import Content, DifficultyLevel
+from ..core.config import settings
+from ..core.logging import logger
+from ..core.dependencies import job_queue
+from .ai_service import AIService
+from .content_events import content_embedded, content_saved
+from .embedding_store import EmbeddingStore
+from .openai_scheduler import Priority
+from .prerequisite_service import PrerequisiteService
+from .quiz_service import QuizService
+from .job_queue import job_handler
+from .locks import DistributedLock
+
+# Jobs open their own session; they outlive the request that enqueued them
+
+async def queue_quiz_generation(content_id: int) -> Optional[Dict[str, Any]]:
+    """Generate the quiz ahead of the first view so that view is a plain read; returns the job, None if not queued"""
+    try:
+        return await job_queue.enqueue(
+            "generate_quiz",
+            {"content_id": content_id},
+            idempotency_key=f"content:{content_id}"
+        )
+    except Exception as e:
+        # pregenerate_quizzes picks up anything that could not be queued here
+        logger.error(f"Error queueing quiz generation for content {content_id}: {str(e)}")
+        return None
+
+async def queue_embedding(content_ids: List[int]):
+    """Embed content written in bulk off the write path"""
+    try:
+        await job_queue.enqueue("embed_content", {"content_ids": content_ids})
+    except Exception as e:
+        # refresh_embeddings picks up anything that could not be queued here
+        logger.error(f"Error queueing embeddings for {len(content_ids)} content items: {str(e)}")
+
+async def queue_prerequisite_analysis(category_ids: Iterable[int]):
+    """Place new content in its category's prerequisite graph off the write path"""
+    for category_id in set(category_ids):
+        try:
+            # No idempotency key: a run only analyzes what is still pending, so a
+            # queued duplicate is cheap, while a deduplicated one could miss new content
+            await job_queue.enqueue("analyze_prerequisites", {"category_id": category_id})
+        except Exception as e:
+            # analyze_prerequisites picks up anything that could not be queued here
+            logger.error(f"Error queueing prerequisite analysis for category {category_id}: {str(e)}")
+
+@job_handler("generate_content")
+async def generate_content_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    db = SessionLocal()
+    try:
+        ai_service = AIService()
+        difficulty = DifficultyLevel(payload["difficulty"])
+        generated_content = await ai_service.generate_content(payload["topic"], difficulty.value)
+
+        content = Content(
+            title=generated_content["title"],
+            content=generated_content["content"],
+            difficulty=difficulty,
+            category_id=payload["category_id"]
+        )
+        db.add(content)
+        db.commit()
+        db.refresh(content)
+
+        await content_saved(db, ai_service, [content])
+        await queue_quiz_generation(content.id)
+        await queue_prerequisite_analysis([content.category_id])
+        return {"content_id": content.id}
+    finally:
+        db.close()
+
+@job_handler("generate_quiz")
+async def generate_quiz_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    db = SessionLocal()
+    try:
+        content = db.query(Content).filter(Content.id == payload["content_id"]).first()
+        if not content:
+            raise ValueError(f"Content {payload['content_id']} not found")
+
+        quiz = await QuizService(db, AIService()).get_or_create(content, Priority.BACKGROUND)
+        return {"quiz_id": quiz.id}
+    finally:
+        db.close()
+
+@job_handler("embed_content")
+async def embed_content_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    db = SessionLocal()
+    try:
+        contents = db.query(Content).filter(Content.id.in_(payload["content_ids"])).all()
+        embedded = await EmbeddingStore(db, AIService()).upsert(contents, Priority.BACKGROUND)
+        if embedded:
+            await content_embedded()
+        return {"embedded": embedded}
+    finally:
+        db.close()
+
+@job_handler("analyze_prerequisites")
+async def analyze_prerequisites_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    category_id = payload.get("category_id")
+    db = SessionLocal()
+    try:
+        # One analysis per category at a time; the next finds the items the first analyzed done
+        async with DistributedLock(
+            f"prerequisites:category:{category_id}",
+            ttl=settings.JOB_VISIBILITY_TIMEOUT,
+            wait=settings.JOB_VISIBILITY_TIMEOUT
+        ):
+            analyzed = await PrerequisiteService(db, AIService()).analyze_pending(category_id=category_id)
+        return {"analyzed": analyzed}
+    finally:
+        db.close()
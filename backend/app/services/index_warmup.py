@@ -0,0 +1,70 @@
+from typing import Callable, List, Set
+import asyncio
+from sqlalchemy.orm import Session
+from ..database.connection import SessionLocal
+from ..core.config import settings
+from ..core.logging import logger
+from .ai_service import AIService
+from .autocomplete_service import AutocompleteService
+from .content_duplicate_index import ContentDuplicateIndex
+from .content_search_index import ContentSearchIndex
+from .embedding_store import EmbeddingStore
+
+def _warm_embedding_index(db: Session):
+    EmbeddingStore(db, AIService()).get_index()
+
+def _warm_search_index(db: Session):
+    ContentSearchIndex(db).get_index()
+
+def _warm_autocomplete_index(db: Session):
+    AutocompleteService(db).get_index()
+
+def _warm_duplicate_index(db: Session):
+    ContentDuplicateIndex(db).get_index()
+
+# Each loads or builds one of the worker's in-process indexes
+_warmers: List[Callable[[Session], None]] = [
+    _warm_embedding_index,
+    _warm_search_index,
+    _warm_autocomplete_index,
+    _warm_duplicate_index
+]
+
+# Keeps the refresh loops referenced for as long as they run
+_background_tasks: Set["asyncio.Task[None]"] = set()
+
+def _run_with_session(task: Callable[[Session], None]):
+    db = SessionLocal()
+    try:
+        task(db)
+    except Exception as e:
+        # The index is then built by the first request that needs it, or refreshed next round
+        logger.error(f"Error in {task.__name__}: {str(e)}")
+    finally:
+        db.close()
+
+def _warm_all():
+    for warm in _warmers:
+        _run_with_session(warm)
+
+def _refresh_autocomplete(db: Session):
+    AutocompleteService(db).refresh()
+
+async def _refresh_autocomplete_periodically():
+    while True:
+        await asyncio.sleep(settings.AUTOCOMPLETE_SYNC_INTERVAL)
+        await asyncio.to_thread(_run_with_session, _refresh_autocomplete)
+
+async def warm_indexes():
+    """Load or build the in-process indexes before the worker serves requests.
+
+    Runs in a thread so the event loop stays responsive; nothing reads the
+    indexes until startup completes.
+    """
+    await asyncio.to_thread(_warm_all)
+
+def start_index_refresh():
+    """Refresh autocomplete titles and popularity in the background for as long as the worker runs"""
+    task = asyncio.create_task(_refresh_autocomplete_periodically())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
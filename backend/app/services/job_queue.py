@@ -0,0 +1,296 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from datetime import datetime
+import asyncio
+import enum
+import json
+import uuid
+from ..core.config import settings
+from ..core.logging import logger
+from ..core.redis import get_redis
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+_handlers: Dict[str, JobHandler] = {}
+
+def job_handler(kind: str):
+    """Register the coroutine that executes jobs of the given kind"""
+    def register(func: JobHandler) -> JobHandler:
+        _handlers[kind] = func
+        return func
+    return register
+
+class _RedisBackend:
+    """Jobs shared by every worker through Redis, with at-least-once delivery.
+
+    A popped job id moves atomically to a processing list and gets a lease
+    that its worker renews while the job runs. Any worker's reaper puts jobs
+    whose lease ran out, because their worker died, back on the queue.
+    Deadlines use the Redis clock, so hosts' clocks need not agree.
+    """
+
+    queue_key = "jobs:queue"
+    processing_key = "jobs:processing"
+    leases_key = "jobs:leases"
+
+    # Claim the idempotency key, save the record and queue it, all or nothing. A key whose
+    # job record has expired is taken over rather than pointing at nothing
+    _enqueue_script = """
+    if #KEYS == 3 then
+        local existing = redis.call('GET', KEYS[3])
+        if existing and redis.call('EXISTS', 'jobs:' .. existing) == 1 then
+            return existing
+        end
+        redis.call('SET', KEYS[3], ARGV[1], 'EX', ARGV[3])
+    end
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    redis.call('RPUSH', KEYS[2], ARGV[1])
+    return false
+    """
+
+    # Set a job's lease to expire after ARGV[2] seconds; with ARGV[3] == '1' only renew an existing one
+    _lease_script = """
+    local deadline = tonumber(redis.call('TIME')[1]) + tonumber(ARGV[2])
+    if ARGV[3] == '1' then
+        return redis.call('ZADD', KEYS[1], 'XX', 'CH', deadline, ARGV[1])
+    end
+    return redis.call('ZADD', KEYS[1], deadline, ARGV[1])
+    """
+
+    # Requeue processing jobs whose lease expired. A job without a lease (its worker died
+    # between the pop and the lease) gets one now, so it is requeued if nobody renews it
+    _reap_script = """
+    local now = tonumber(redis.call('TIME')[1])
+    local requeued = {}
+    for _, job_id in ipairs(redis.call('LRANGE', KEYS[1], 0, -1)) do
+        local deadline = redis.call('ZSCORE', KEYS[2], job_id)
+        if not deadline then
+            redis.call('ZADD', KEYS[2], now + tonumber(ARGV[1]), job_id)
+        elseif tonumber(deadline) < now then
+            redis.call('LREM', KEYS[1], 1, job_id)
+            redis.call('ZREM', KEYS[2], job_id)
+            redis.call('RPUSH', KEYS[3], job_id)
+            table.insert(requeued, job_id)
+        end
+    end
+    return requeued
+    """
+
+    async def create(self, job: Dict[str, Any], claim_key: Optional[str]) -> Optional[str]:
+        """Save and queue job, unless claim_key is already bound to another job; returns that job's id"""
+        keys = [f"jobs:{job['id']}", self.queue_key]
+        if claim_key:
+            keys.append(f"jobs:idempotency:{claim_key}")
+        return await get_redis().eval(
+            self._enqueue_script, len(keys), *keys, job["id"], json.dumps(job), settings.JOB_RESULT_TTL
+        )
+
+    async def save(self, job: Dict[str, Any]):
+        await get_redis().set(f"jobs:{job['id']}", json.dumps(job), ex=settings.JOB_RESULT_TTL)
+
+    async def load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = await get_redis().get(f"jobs:{job_id}")
+        return json.loads(raw) if raw else None
+
+    async def pop(self, timeout: float) -> Optional[str]:
+        job_id = await get_redis().blmove(self.queue_key, self.processing_key, timeout, "LEFT", "RIGHT")
+        if job_id is not None:
+            await get_redis().eval(self._lease_script, 1, self.leases_key, job_id, settings.JOB_VISIBILITY_TIMEOUT, 0)
+        return job_id
+
+    async def renew(self, job_id: str):
+        await get_redis().eval(self._lease_script, 1, self.leases_key, job_id, settings.JOB_VISIBILITY_TIMEOUT, 1)
+
+    async def ack(self, job_id: str):
+        pipe = get_redis().pipeline(transaction=True)
+        pipe.lrem(self.processing_key, 1, job_id)
+        pipe.zrem(self.leases_key, job_id)
+        await pipe.execute()
+
+    async def reap(self) -> List[str]:
+        return await get_redis().eval(
+            self._reap_script, 3, self.processing_key, self.leases_key, self.queue_key,
+            settings.JOB_VISIBILITY_TIMEOUT
+        )
+
+    async def depth(self) -> int:
+        return await get_redis().llen(self.queue_key)
+
+class _LocalBackend:
+    """Keeps everything in the current process; for development and single-process deployments"""
+
+    def __init__(self):
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.keys: Dict[str, str] = {}
+        self.queue: Optional[asyncio.Queue] = None
+
+    def _get_queue(self) -> asyncio.Queue:
+        if self.queue is None:
+            self.queue = asyncio.Queue()
+        return self.queue
+
+    async def create(self, job: Dict[str, Any], claim_key: Optional[str]) -> Optional[str]:
+        if claim_key:
+            existing = self.keys.get(claim_key)
+            if existing is not None and existing in self.jobs:
+                return existing
+            self.keys[claim_key] = job["id"]
+        await self.save(job)
+        self._get_queue().put_nowait(job["id"])
+        return None
+
+    async def save(self, job: Dict[str, Any]):
+        self.jobs[job["id"]] = dict(job)
+
+    async def load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.jobs.get(job_id)
+        return dict(job) if job else None
+
+    async def pop(self, timeout: float) -> Optional[str]:
+        try:
+            return await asyncio.wait_for(self._get_queue().get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    # Jobs die with the process here, so there is nothing to lease or recover
+    async def renew(self, job_id: str):
+        pass
+
+    async def ack(self, job_id: str):
+        pass
+
+    async def reap(self) -> List[str]:
+        return []
+
+    async def depth(self) -> int:
+        return self._get_queue().qsize()
+
+class JobQueue:
+    """Queue for slow generation work so HTTP requests only enqueue and poll"""
+
+    def __init__(self, backend: Optional[str] = None):
+        self.backend_name = backend or settings.JOB_QUEUE_BACKEND
+        self._backend = _LocalBackend() if self.backend_name == "local" else _RedisBackend()
+        self._local_workers: List[asyncio.Task] = []
+
+    async def enqueue(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        idempotency_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        if kind not in _handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        job = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "status": JobStatus.QUEUED.value,
+            "payload": payload,
+            "result": None,
+            "error": None,
+            "created_at": datetime.utcnow().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "attempts": 0
+        }
+        claim_key = f"{kind}:{idempotency_key}" if idempotency_key else None
+        existing_id = await self._backend.create(job, claim_key)
+        if existing_id is not None:
+            existing = await self._backend.load(existing_id)
+            if existing is not None:
+                return existing
+
+        if self.backend_name == "local":
+            self._ensure_local_workers()
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self._backend.load(job_id)
+
+    async def depth(self) -> int:
+        return await self._backend.depth()
+
+    async def run_worker(self, concurrency: Optional[int] = None):
+        """Process jobs forever with the given number of concurrent slots"""
+        concurrency = concurrency or settings.JOB_WORKER_CONCURRENCY
+        logger.info(f"Job worker started on {self.backend_name} backend with {concurrency} slots")
+        await asyncio.gather(self._reap_loop(), *[self._work_loop() for _ in range(concurrency)])
+
+    def _ensure_local_workers(self):
+        self._local_workers = [task for task in self._local_workers if not task.done()]
+        while len(self._local_workers) < settings.JOB_WORKER_CONCURRENCY:
+            self._local_workers.append(asyncio.create_task(self._work_loop()))
+
+    @staticmethod
+    def _pop_timeout() -> float:
+        # A blocking pop has to return before the Redis client's socket timeout fires
+        return max(1.0, settings.REDIS_SOCKET_TIMEOUT - 1.0)
+
+    async def _work_loop(self):
+        while True:
+            try:
+                job_id = await self._backend.pop(timeout=self._pop_timeout())
+                if job_id:
+                    await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job worker error: {str(e)}")
+                await asyncio.sleep(1)
+
+    async def _reap_loop(self):
+        """Requeue jobs whose worker stopped renewing their lease"""
+        while True:
+            await asyncio.sleep(settings.JOB_VISIBILITY_TIMEOUT / 4)
+            try:
+                for job_id in await self._backend.reap():
+                    logger.warning(f"Requeued job {job_id}: its worker stopped responding")
+            except Exception as e:
+                logger.error(f"Job reaper error: {str(e)}")
+
+    async def _keep_leased(self, job_id: str):
+        while True:
+            await asyncio.sleep(settings.JOB_VISIBILITY_TIMEOUT / 3)
+            try:
+                await self._backend.renew(job_id)
+            except Exception as e:
+                logger.error(f"Error renewing lease of job {job_id}: {str(e)}")
+
+    async def _run(self, job_id: str):
+        job = await self._backend.load(job_id)
+        if job is None or job["status"] in (JobStatus.SUCCEEDED.value, JobStatus.FAILED.value):
+            # Expired, or finished by a worker that died before acknowledging it
+            await self._backend.ack(job_id)
+            return
+
+        # A job that is already RUNNING was requeued after its worker died
+        job["attempts"] = job.get("attempts", 0) + 1
+        if job["attempts"] > settings.JOB_MAX_ATTEMPTS:
+            job["status"] = JobStatus.FAILED.value
+            job["error"] = f"Abandoned after {settings.JOB_MAX_ATTEMPTS} attempts whose worker stopped responding"
+            job["finished_at"] = datetime.utcnow().isoformat()
+            await self._backend.save(job)
+            await self._backend.ack(job_id)
+            return
+
+        job["status"] = JobStatus.RUNNING.value
+        job["started_at"] = datetime.utcnow().isoformat()
+        await self._backend.save(job)
+        heartbeat = asyncio.create_task(self._keep_leased(job_id))
+        try:
+            job["result"] = await _handlers[job["kind"]](job["payload"])
+            job["status"] = JobStatus.SUCCEEDED.value
+        except Exception as e:
+            logger.error(f"Job {job_id} ({job['kind']}) failed: {str(e)}", exc_info=True)
+            job["status"] = JobStatus.FAILED.value
+            job["error"] = str(e)
+        finally:
+            heartbeat.cancel()
+        job["finished_at"] = datetime.utcnow().isoformat()
+        await self._backend.save(job)
+        await self._backend.ack(job_id)
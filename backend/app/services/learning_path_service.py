@@ -24,7 +24,9 @@ class LearningPathService:
             return await self.cache.get_or_set(
                 cache_key,
                 lambda: self._create_personalized_path(user_id, category_id),
-                cache_type="learning_path"
+                cache_type="learning_path",
+                tags=[f"user:{user_id}", f"category:{category_id}"],
+                refresh_func=lambda db: LearningPathService(db, self.cache, self.ai_service)._create_personalized_path(user_id, category_id)
             )
         except Exception as e:
             logger.error(f"Error generating learning path: {str(e)}")
@@ -53,7 +55,7 @@ class LearningPathService:
             .all()
         )
 
-        # Analyze prerequisites for each content
+        # Prerequisites are precomputed by PrerequisiteService, so this is pure graph work
         nodes = []
         edges = []
         for content in content_items:
@@ -65,9 +67,7 @@ class LearningPathService:
             if not content_id:
                 continue
 
-            # Convert title to string for AI analysis
             title_str = str(content_title) if content_title else ""
-            prereq_analysis = await self.ai_service.analyze_prerequisites(title_str)
             
             difficulty_str = content_difficulty.value if content_difficulty else "beginner"
             
@@ -147,16 +147,16 @@ class LearningPathService:
         # Add NLP-based recommendations
         for rec in nlp_recommendations:
             content = rec.get("content")
-            if content and content.id not in seen_ids:
+            if content and content["id"] not in seen_ids:
                 recommendations.append({
-                    "id": content.id,
-                    "title": content.title,
-                    "difficulty": getattr(content, "difficulty", "beginner"),
+                    "id": content["id"],
+                    "title": content["title"],
+                    "difficulty": content.get("difficulty", "beginner"),
                     "recommendation_type": "nlp",
                     "confidence": rec.get("similarity", 0.0),
                     "reason": rec.get("reason", "")
                 })
-                seen_ids.add(content.id)
+                seen_ids.add(content["id"])
 
         # Sort by confidence and return top recommendations
         return sorted(
@@ -0,0 +1,83 @@
+from typing import Optional
+import asyncio
+import time
+import uuid
+import weakref
+from redis.exceptions import RedisError
+from ..core.logging import logger
+from ..core.redis import get_redis
+
+class LockTimeout(Exception):
+    """Raised when a lock could not be acquired within its wait limit"""
+
+class DistributedLock:
+    """Mutual exclusion across API and worker processes on a Redis key.
+
+    The key is set with NX and a TTL, so a crashed holder blocks others for
+    at most ttl seconds, and is only deleted by the token that set it. When
+    Redis is unreachable the lock degrades to a process-local one.
+    """
+
+    _release_script = """
+    if redis.call("get", KEYS[1]) == ARGV[1] then
+        return redis.call("del", KEYS[1])
+    end
+    return 0
+    """
+    _local_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    def __init__(self, name: str, ttl: float = 60.0, wait: float = 30.0):
+        self.name = f"locks:{name}"
+        self.ttl = ttl
+        self.wait = wait
+        self.token = uuid.uuid4().hex
+        self._local: Optional[asyncio.Lock] = None
+
+    async def acquire(self) -> bool:
+        """Wait up to self.wait seconds for the lock; returns whether it was acquired"""
+        deadline = time.monotonic() + self.wait
+        delay = 0.05
+        while True:
+            try:
+                if await get_redis().set(self.name, self.token, nx=True, px=int(self.ttl * 1000)):
+                    return True
+            except RedisError as e:
+                logger.warning(f"Redis unavailable for lock {self.name}, using a local lock: {str(e)}")
+                return await self._acquire_local(deadline)
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.5)
+
+    async def release(self):
+        if self._local is not None:
+            self._local.release()
+            self._local = None
+            return
+        try:
+            await get_redis().eval(self._release_script, 1, self.name, self.token)
+        except RedisError as e:
+            # The key expires on its own after ttl
+            logger.error(f"Error releasing lock {self.name}: {str(e)}")
+
+    async def _acquire_local(self, deadline: float) -> bool:
+        lock = self._local_locks.get(self.name)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._local_locks[self.name] = lock
+        try:
+            await asyncio.wait_for(lock.acquire(), timeout=max(0.05, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            return False
+        self._local = lock
+        return True
+
+    async def __aenter__(self) -> "DistributedLock":
+        if not await self.acquire():
+            raise LockTimeout(f"Timed out waiting for lock {self.name}")
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.release()
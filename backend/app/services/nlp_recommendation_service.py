@@ -4,9 +4,13 @@ from typing import List, Dict, Optional
 from ..models.user_progress import UserProgress
 from ..models.content import Content, Category
 from ..models.quiz_result import QuizResult
+from ..schemas.recommendation_schema import Recommendation
 from ..core.logging import logger
 from .cache_manager import CacheManager
 from .ai_service import AIService
+from .embedding_store import EmbeddingStore
+from .similarity_engine import SimilarityEngine
+import numpy as np
 
 class NLPRecommendationService:
     def __init__(self, db: Session, cache_manager: CacheManager, ai_service: AIService):
@@ -21,7 +25,9 @@ class NLPRecommendationService:
             return await self.cache.get_or_set(
                 cache_key,
                 lambda: self._generate_nlp_recommendations(user_id),
-                cache_type="recommendations"
+                cache_type="recommendations",
+                tags=[f"user:{user_id}", "catalog"],
+                refresh_func=lambda db: NLPRecommendationService(db, self.cache, self.ai_service)._generate_nlp_recommendations(user_id)
             )
         except Exception as e:
             logger.error(f"Error generating NLP recommendations: {str(e)}")
@@ -42,40 +48,40 @@ class NLPRecommendationService:
             if not completed_content:
                 return await self._get_beginner_recommendations()
 
-            # Extract content texts for NLP analysis
-            content_texts = [
-                str(getattr(content, 'content', '')) 
-                for content in completed_content
+            completed_ids = {c.id for c in completed_content}
+            store = EmbeddingStore(self.db, self.ai_service)
+            # Only the user's own vectors come from the table; candidates are scored in the worker's index
+            _, reference_matrix = store.get_matrix(list(completed_ids))
+            if not len(reference_matrix):
+                return await self._get_beginner_recommendations()
+            profile = SimilarityEngine.normalize(reference_matrix).mean(axis=0)
+            # The index scores against the unit profile; rescale to the mean similarity
+            profile_norm = float(np.linalg.norm(profile))
+            top_matches = [
+                (content_id, score * profile_norm)
+                for content_id, score in store.search(profile, k=5, exclude_ids=completed_ids)
+                if score * profile_norm > 0.7  # Threshold for similarity
             ]
+            if not top_matches:
+                return []
 
-            # Get content embeddings and similarities
-            content_analysis = await self.ai_service.analyze_content_relationships(content_texts)
-            
-            # Find similar content not yet completed
-            similar_content = self.db.query(Content).filter(
-                ~Content.id.in_([c.id for c in completed_content])
-            ).all()
+            content_by_id = {
+                content.id: content
+                for content in self.db.query(Content).filter(
+                    Content.id.in_([content_id for content_id, _ in top_matches])
+                ).all()
+            }
 
-            recommendations = []
-            for content in similar_content:
-                content_text = str(getattr(content, 'content', ''))
-                similarity_score = await self.ai_service.calculate_content_similarity(
-                    content_text,
-                    content_texts
+            return [
+                Recommendation.build(
+                    content_by_id[content_id],
+                    "nlp_recommended",
+                    "Based on your learning patterns",
+                    similarity=similarity_score
                 )
-                if similarity_score > 0.7:  # Threshold for similarity
-                    recommendations.append({
-                        "content": content,
-                        "type": "nlp_recommended",
-                        "similarity": similarity_score,
-                        "reason": "Based on your learning patterns"
-                    })
-
-            return sorted(
-                recommendations, 
-                key=lambda x: x["similarity"], 
-                reverse=True
-            )[:5]
+                for content_id, similarity_score in top_matches
+                if content_id in content_by_id
+            ]
 
         except Exception as e:
             logger.error(f"Error in NLP recommendations: {str(e)}")
@@ -88,12 +94,7 @@ class NLPRecommendationService:
             ).limit(5).all()
 
             return [
-                {
-                    "content": content,
-                    "type": "beginner",
-                    "similarity": 1.0,
-                    "reason": "Recommended for beginners"
-                }
+                Recommendation.build(content, "beginner", "Recommended for beginners", similarity=1.0)
                 for content in beginner_content
             ]
         except Exception as e:
@@ -0,0 +1,205 @@
+from typing import Any, Dict, List, Optional, Tuple
+from enum import IntEnum
+import asyncio
+import heapq
+import itertools
+import time
+from ..core.config import settings
+from ..core.logging import logger
+
+class Priority(IntEnum):
+    INTERACTIVE = 0  # A user is waiting on the response right now
+    DEFAULT = 1
+    BACKGROUND = 2   # Precomputation that can be deferred or dropped
+
+class SchedulerOverloaded(Exception):
+    """Raised when work is shed because the rate budget cannot serve it in time"""
+
+class TokenBucket:
+    """Refills continuously at capacity per minute"""
+
+    def __init__(self, capacity_per_minute: int):
+        self.capacity = float(capacity_per_minute)
+        self.rate = self.capacity / 60.0
+        self.available = self.capacity
+        self.updated_at = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def time_until(self, amount: float) -> float:
+        self.refill()
+        missing = min(amount, self.capacity) - self.available
+        return max(0.0, missing / self.rate)
+
+    def consume(self, amount: float):
+        self.refill()
+        self.available -= min(amount, self.capacity)
+
+    def adjust(self, amount: float):
+        """Give back (positive) or take away (negative) budget after the fact"""
+        self.refill()
+        self.available = min(self.capacity, self.available + amount)
+
+class RateLimitScheduler:
+    """Admits OpenAI calls within requests-per-minute and tokens-per-minute budgets.
+
+    Waiting calls are served strictly by priority, then arrival order. A call
+    whose projected wait exceeds the limit for its priority is shed with
+    SchedulerOverloaded instead of queueing behind the budget.
+    """
+
+    default_max_wait = {
+        Priority.INTERACTIVE: 5.0,
+        Priority.DEFAULT: 60.0,
+        Priority.BACKGROUND: 300.0
+    }
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_wait: Optional[Dict[Priority, float]] = None
+    ):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_wait = {**self.default_max_wait, **(max_wait or {})}
+        self._queue: List[Tuple[int, int, int, "asyncio.Future[None]"]] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._stats = {
+            priority: {"admitted": 0, "shed": 0, "total_wait": 0.0, "max_wait": 0.0}
+            for priority in Priority
+        }
+
+    async def acquire(self, tokens: int, priority: Priority = Priority.DEFAULT):
+        """Wait until the call fits in the budget"""
+        enqueued_at = time.monotonic()
+        if not self._queue and self._wait_time(tokens) == 0:
+            self._admit(tokens, priority, enqueued_at)
+            return
+
+        projected = self._projected_wait(tokens, priority)
+        if projected > self.max_wait[priority]:
+            self._stats[priority]["shed"] += 1
+            logger.warning(
+                f"Shedding {priority.name} OpenAI call on {self.name}: projected wait {projected:.1f}s"
+            )
+            raise SchedulerOverloaded(f"OpenAI rate budget exhausted for {self.name}")
+
+        future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (int(priority), next(self._sequence), tokens, future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if not future.done():
+                future.cancel()
+            self._dispatch()
+            raise
+        self._record_wait(priority, time.monotonic() - enqueued_at)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        """Correct the token budget once the real usage of a call is known"""
+        if actual_tokens is not None:
+            self.tokens.adjust(estimated_tokens - actual_tokens)
+
+    def _wait_time(self, tokens: int) -> float:
+        return max(self.requests.time_until(1), self.tokens.time_until(tokens))
+
+    def _projected_wait(self, tokens: int, priority: Priority) -> float:
+        """Time until the budget covers this call and everything queued ahead of it"""
+        ahead = [entry for entry in self._queue if entry[0] <= priority and not entry[3].done()]
+        needed_requests = len(ahead) + 1
+        needed_tokens = sum(entry[2] for entry in ahead) + tokens
+        self.requests.refill()
+        self.tokens.refill()
+        return max(
+            (needed_requests - self.requests.available) / self.requests.rate,
+            (needed_tokens - self.tokens.available) / self.tokens.rate,
+            0.0
+        )
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._queue:
+            priority, _, tokens, future = self._queue[0]
+            if future.done():
+                heapq.heappop(self._queue)
+                continue
+            wait = self._wait_time(tokens)
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            heapq.heappop(self._queue)
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+            self._stats[Priority(priority)]["admitted"] += 1
+            future.set_result(None)
+
+    def _admit(self, tokens: int, priority: Priority, enqueued_at: float):
+        self.requests.consume(1)
+        self.tokens.consume(tokens)
+        self._stats[priority]["admitted"] += 1
+        self._record_wait(priority, time.monotonic() - enqueued_at)
+
+    def _record_wait(self, priority: Priority, waited: float):
+        stats = self._stats[priority]
+        stats["total_wait"] += waited
+        stats["max_wait"] = max(stats["max_wait"], waited)
+
+    def metrics(self) -> Dict[str, Any]:
+        self.requests.refill()
+        self.tokens.refill()
+        queue_depth = {priority.name.lower(): 0 for priority in Priority}
+        for priority, _, _, future in self._queue:
+            if not future.done():
+                queue_depth[Priority(priority).name.lower()] += 1
+
+        by_priority = {}
+        for priority, stats in self._stats.items():
+            admitted = stats["admitted"]
+            by_priority[priority.name.lower()] = {
+                "admitted": admitted,
+                "shed": stats["shed"],
+                "avg_wait_ms": round(stats["total_wait"] / admitted * 1000, 2) if admitted else 0.0,
+                "max_wait_ms": round(stats["max_wait"] * 1000, 2)
+            }
+
+        return {
+            "queue_depth": queue_depth,
+            "requests_available": round(self.requests.available, 2),
+            "tokens_available": round(self.tokens.available, 2),
+            "priorities": by_priority
+        }
+
+_schedulers: Dict[str, RateLimitScheduler] = {}
+
+def get_scheduler(kind: str) -> RateLimitScheduler:
+    """Per-worker scheduler for "chat" or "embeddings" calls"""
+    scheduler = _schedulers.get(kind)
+    if scheduler is None:
+        if kind == "embeddings":
+            scheduler = RateLimitScheduler(
+                kind,
+                settings.OPENAI_EMBEDDING_REQUESTS_PER_MINUTE,
+                settings.OPENAI_EMBEDDING_TOKENS_PER_MINUTE
+            )
+        else:
+            scheduler = RateLimitScheduler(
+                kind,
+                settings.OPENAI_REQUESTS_PER_MINUTE,
+                settings.OPENAI_TOKENS_PER_MINUTE
+            )
+        _schedulers[kind] = scheduler
+    return scheduler
+
+def scheduler_metrics() -> Dict[str, Any]:
+    return {kind: scheduler.metrics() for kind, scheduler in _schedulers.items()}
@@ -0,0 +1,151 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from bisect import bisect_left, insort
+import heapq
+import re
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+Suggestion = Tuple[str, int]  # (kind, item id)
+_Key = Tuple[str, str, int]  # (normalized text from some word on, kind, item id)
+
+class PrefixIndex:
+    """Sorted-array prefix index for autocomplete.
+
+    A suggestion is found by a prefix of its whole text or, once the prefix is
+    min_word_prefix characters long, of any later word ("python decorators"
+    matches "py" and "deco"). A lookup is a binary search plus a scan of the
+    matching range; results are cached per prefix and only the prefixes an
+    insert or delete can affect are invalidated.
+    """
+
+    def __init__(self, min_word_prefix: int = 3, max_cached_prefixes: int = 4096):
+        self.min_word_prefix = min_word_prefix
+        self.max_cached_prefixes = max_cached_prefixes
+        self._text_keys: List[_Key] = []
+        self._word_keys: List[_Key] = []
+        self._texts: Dict[Suggestion, str] = {}
+        self._weights: Dict[Suggestion, float] = {}
+        self._results: Dict[Tuple[str, Optional[str], int], List[Dict]] = {}
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def items(self) -> List[Suggestion]:
+        return list(self._texts)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(_WORD_PATTERN.findall(text.lower()))
+
+    def _keys_for(self, kind: str, item_id: int, text: str) -> Tuple[_Key, List[_Key]]:
+        words = self.normalize(text).split(" ")
+        text_key = (" ".join(words), kind, item_id)
+        word_keys = [(" ".join(words[start:]), kind, item_id) for start in range(1, len(words))]
+        return text_key, word_keys
+
+    def add(self, kind: str, item_id: int, text: str, weight: Optional[float] = None):
+        """Insert or replace a suggestion; weight defaults to the existing one or 1"""
+        item = (kind, item_id)
+        if weight is None:
+            weight = self._weights.get(item, 1.0)
+        if item in self._texts:
+            self.remove(kind, item_id)
+
+        text_key, word_keys = self._keys_for(kind, item_id, text)
+        if not text_key[0]:
+            return
+        insort(self._text_keys, text_key)
+        for key in word_keys:
+            insort(self._word_keys, key)
+        self._texts[item] = text
+        self._weights[item] = weight
+        self._invalidate([text_key] + word_keys)
+
+    def extend(self, items: Iterable[Tuple[str, int, str]]):
+        """Bulk load (kind, id, text) items not yet indexed, with one sort instead of an insert each"""
+        for kind, item_id, text in items:
+            text_key, word_keys = self._keys_for(kind, item_id, text)
+            if not text_key[0]:
+                continue
+            self._text_keys.append(text_key)
+            self._word_keys.extend(word_keys)
+            self._texts[(kind, item_id)] = text
+            self._weights.setdefault((kind, item_id), 1.0)
+        self._text_keys.sort()
+        self._word_keys.sort()
+        self._results.clear()
+
+    def remove(self, kind: str, item_id: int):
+        item = (kind, item_id)
+        text = self._texts.pop(item, None)
+        if text is None:
+            return
+        self._weights.pop(item, None)
+        text_key, word_keys = self._keys_for(kind, item_id, text)
+        self._delete_key(self._text_keys, text_key)
+        for key in word_keys:
+            self._delete_key(self._word_keys, key)
+        self._invalidate([text_key] + word_keys)
+
+    @staticmethod
+    def _delete_key(keys: List[_Key], key: _Key):
+        position = bisect_left(keys, key)
+        if position < len(keys) and keys[position] == key:
+            del keys[position]
+
+    def _invalidate(self, keys: List[_Key]):
+        stale = [
+            cache_key for cache_key in self._results
+            if any(key[0].startswith(cache_key[0]) for key in keys)
+        ]
+        for cache_key in stale:
+            del self._results[cache_key]
+
+    def set_weights(self, weights: Dict[Suggestion, float]):
+        for item, weight in weights.items():
+            if item in self._weights:
+                self._weights[item] = weight
+        self._results.clear()
+
+    def suggest(self, prefix: str, limit: int = 10, kind: Optional[str] = None) -> List[Dict]:
+        """Most popular suggestions matching prefix; whole-text matches count double"""
+        prefix = self.normalize(prefix)
+        if not prefix:
+            return []
+        cache_key = (prefix, kind, limit)
+        cached = self._results.get(cache_key)
+        if cached is not None:
+            return cached
+
+        scores: Dict[Suggestion, float] = {}
+        self._scan(self._text_keys, prefix, kind, 2.0, scores)
+        if len(prefix) >= self.min_word_prefix:
+            self._scan(self._word_keys, prefix, kind, 1.0, scores)
+
+        best = heapq.nlargest(
+            limit,
+            scores.items(),
+            key=lambda entry: (entry[1], -len(self._texts[entry[0]]), -entry[0][1])
+        )
+        results = [
+            {"text": self._texts[item], "type": item[0], "id": item[1]}
+            for item, _ in best
+        ]
+        if len(self._results) >= self.max_cached_prefixes:
+            self._results.clear()
+        self._results[cache_key] = results
+        return results
+
+    def _scan(self, keys: List[_Key], prefix: str, kind: Optional[str], boost: float, scores: Dict[Suggestion, float]):
+        position = bisect_left(keys, (prefix,))
+        while position < len(keys):
+            key, item_kind, item_id = keys[position]
+            if not key.startswith(prefix):
+                break
+            position += 1
+            if kind is not None and item_kind != kind:
+                continue
+            item = (item_kind, item_id)
+            score = self._weights[item] * boost
+            if score > scores.get(item, 0.0):
+                scores[item] = score
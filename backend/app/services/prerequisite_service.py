@@ -0,0 +1,165 @@
+from typing import Dict, List, Optional, Set
+from collections import Counter
+from sqlalchemy.orm import Session
+from datetime import datetime
+import numpy as np
+from ..models.content import Content
+from ..models.prerequisites import Prerequisites
+from ..core.logging import logger
+from ..core.dependencies import cache_manager
+from .ai_service import AIService
+from .embedding_store import EmbeddingStore
+from .similarity_engine import SimilarityEngine
+
+class PrerequisiteService:
+    """Precomputes the prerequisite graph so learning paths never call the LLM"""
+
+    def __init__(self, db: Session, ai_service: AIService):
+        self.db = db
+        self.ai_service = ai_service
+
+    async def analyze_pending(
+        self,
+        category_id: Optional[int] = None,
+        batch_size: int = 20,
+        reanalyze: bool = False
+    ) -> int:
+        """Analyze every content item that has not been analyzed yet, category by category"""
+        query = self.db.query(Content.category_id).distinct()
+        if category_id is not None:
+            query = query.filter(Content.category_id == category_id)
+        if not reanalyze:
+            query = query.filter(Content.prerequisites_analyzed_at.is_(None))
+
+        analyzed = 0
+        for (pending_category_id,) in query.all():
+            analyzed += await self.analyze_category(pending_category_id, batch_size, reanalyze)
+        return analyzed
+
+    async def analyze_category(self, category_id: int, batch_size: int = 20, reanalyze: bool = False) -> int:
+        contents = (
+            self.db.query(Content)
+            .filter(Content.category_id == category_id)
+            .order_by(Content.id)
+            .all()
+        )
+        pending = [c for c in contents if reanalyze or c.prerequisites_analyzed_at is None]
+        if not pending:
+            return 0
+        pending_ids = {c.id for c in pending}
+
+        # Generated items share titles ("Learning {topic}"), so items are identified by id
+        title_counts = Counter(self._normalize(str(c.title or "")) for c in contents)
+        catalogue = {c.id: self._describe(c, title_counts) for c in contents}
+        # A title stands in for an id only when a single item has it
+        id_by_title = {
+            self._normalize(str(c.title)): c.id
+            for c in contents if c.title and title_counts[self._normalize(str(c.title))] == 1
+        }
+        graph: Dict[int, Set[int]] = {
+            c.id: set(c.prerequisites or []) for c in contents if c.id not in pending_ids
+        }
+        embedding_ids, embeddings = EmbeddingStore(self.db, self.ai_service).get_matrix([c.id for c in contents])
+        vectors = dict(zip(embedding_ids, SimilarityEngine.normalize(embeddings))) if embedding_ids else {}
+
+        analyzed = 0
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            # The whole category may not fit in the prompt, so it is offered nearest items first
+            analysis = await self.ai_service.analyze_prerequisites_batch(
+                {c.id: catalogue[c.id] for c in batch},
+                {item_id: catalogue[item_id] for item_id in self._rank_catalogue(batch, contents, vectors)}
+            )
+            for content in batch:
+                result = analysis.get(content.id)
+                if result is None:
+                    # Left pending so the next run retries it
+                    continue
+                self._apply(content, result, catalogue, id_by_title, graph)
+                analyzed += 1
+            self.db.commit()
+            # Learning paths cached since the content landed show it without these edges
+            await cache_manager.invalidate_tags(f"category:{category_id}")
+
+        logger.info(f"Analyzed prerequisites for {analyzed} of {len(pending)} items in category {category_id}")
+        return analyzed
+
+    def _apply(
+        self,
+        content: Content,
+        result: Dict,
+        catalogue: Dict[int, str],
+        id_by_title: Dict[str, int],
+        graph: Dict[int, Set[int]]
+    ):
+        prerequisite_ids: List[int] = []
+        graph[content.id] = set()
+        for entry in result.get("prerequisites") or []:
+            prerequisite_id = AIService.parse_item_id(entry)
+            if prerequisite_id not in catalogue:
+                prerequisite_id = id_by_title.get(self._normalize(str(entry)))
+            if prerequisite_id is None or prerequisite_id == content.id or prerequisite_id in prerequisite_ids:
+                continue
+            # Drop edges that would make the graph cyclic, otherwise neither node could ever unlock
+            if self._reaches(graph, prerequisite_id, content.id):
+                continue
+            prerequisite_ids.append(prerequisite_id)
+            graph[content.id].add(prerequisite_id)
+
+        self.db.query(Prerequisites).filter(
+            Prerequisites.content_id == content.id
+        ).delete(synchronize_session=False)
+        for prerequisite_id in prerequisite_ids:
+            self.db.add(Prerequisites(
+                content_id=content.id,
+                prerequisite_id=prerequisite_id,
+                relationship_type="required"
+            ))
+
+        content.prerequisites = prerequisite_ids
+        complexity = result.get("complexity")
+        if isinstance(complexity, (int, float)):
+            content.complexity_score = max(1, min(10, int(complexity)))
+        content.prerequisites_analyzed_at = datetime.utcnow()
+
+    @staticmethod
+    def _rank_catalogue(batch: List[Content], contents: List[Content], vectors: Dict[int, np.ndarray]) -> List[int]:
+        """Category ids for a batch's prompt: the batch itself, then the rest by similarity to
+        their closest batch item, then items without an embedding in id order"""
+        batch_ids = [c.id for c in batch]
+        batch_vectors = [vectors[content_id] for content_id in batch_ids if content_id in vectors]
+        others = [c.id for c in contents if c.id not in set(batch_ids)]
+        embedded = [content_id for content_id in others if content_id in vectors]
+        unembedded = [content_id for content_id in others if content_id not in vectors]
+        if batch_vectors and embedded:
+            scores = (np.vstack([vectors[content_id] for content_id in embedded]) @ np.vstack(batch_vectors).T).max(axis=1)
+            embedded = [embedded[i] for i in np.argsort(-scores, kind="stable")]
+        return batch_ids + embedded + unembedded
+
+    @staticmethod
+    def _reaches(graph: Dict[int, Set[int]], start: int, target: int) -> bool:
+        """Whether target is among the (transitive) prerequisites of start"""
+        stack = [start]
+        seen: Set[int] = set()
+        while stack:
+            node = stack.pop()
+            if node == target:
+                return True
+            if node in seen:
+                continue
+            seen.add(node)
+            stack.extend(graph.get(node, ()))
+        return False
+
+    @classmethod
+    def _describe(cls, content: Content, title_counts: Counter) -> str:
+        """How the item is shown to the model: its title, plus an excerpt when the title repeats"""
+        title = " ".join(str(content.title or "").split())
+        if title and title_counts[cls._normalize(title)] == 1:
+            return title
+        excerpt = " ".join(str(content.content or "").split())[:160]
+        return f"{title}: {excerpt}" if title else excerpt
+
+    @staticmethod
+    def _normalize(title: str) -> str:
+        return " ".join(title.lower().split())
@@ -0,0 +1,71 @@
+from typing import Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from ..models.content import Content
+from ..models.quiz import Quiz
+from .ai_service import AIService
+from .locks import DistributedLock
+from .openai_scheduler import Priority
+from .ttl_cache import SingleFlight
+
+class QuizService:
+    """Get-or-create for quizzes that generates each content item's quiz at most once.
+
+    Concurrent callers in one process share a single generation; callers in
+    other processes wait on a Redis lock and then read the stored quiz.
+    Requests pass a short lock_wait and raise LockTimeout rather than wait
+    out someone else's generation; jobs wait as long as the lock can be held.
+    """
+
+    _single_flight = SingleFlight()
+    lock_ttl = 180.0  # Covers a slow generation including scheduler wait and retry
+
+    def __init__(self, db: Session, ai_service: AIService):
+        self.db = db
+        self.ai_service = ai_service
+
+    def get(self, content_id: int) -> Optional[Quiz]:
+        return self.db.query(Quiz).filter(Quiz.content_id == content_id).first()
+
+    async def get_or_create(
+        self,
+        content: Content,
+        priority: Priority = Priority.DEFAULT,
+        lock_wait: Optional[float] = None
+    ) -> Quiz:
+        quiz = self.get(content.id)
+        if quiz:
+            return quiz
+
+        quiz_id = await self._single_flight.do(
+            f"quiz:{content.id}",
+            lambda: self._generate(content, priority, self.lock_ttl if lock_wait is None else lock_wait)
+        )
+        quiz = self.db.query(Quiz).filter(Quiz.id == quiz_id).first()
+        if quiz is None:
+            raise LookupError(f"Quiz {quiz_id} for content {content.id} disappeared")
+        return quiz
+
+    async def _generate(self, content: Content, priority: Priority, lock_wait: float) -> int:
+        async with DistributedLock(f"quiz:{content.id}", ttl=self.lock_ttl, wait=lock_wait):
+            # Another worker may have finished while we waited for the lock
+            quiz = self.get(content.id)
+            if quiz:
+                return quiz.id
+
+            questions = await self.ai_service.generate_quiz(str(getattr(content, 'content', '')), priority)
+            quiz = Quiz(
+                title=f"Quiz: {content.title}",
+                content_id=content.id,
+                questions=questions
+            )
+            self.db.add(quiz)
+            try:
+                self.db.commit()
+            except IntegrityError:
+                # Lost a race the lock could not prevent (e.g. Redis failover); keep the winner's quiz
+                self.db.rollback()
+                quiz = self.get(content.id)
+                if quiz is None:
+                    raise
+            return quiz.id
@@ -0,0 +1,20 @@
+from typing import Dict, List, Optional, Tuple
+
+def reciprocal_rank_fusion(
+    rankings: Dict[str, List[int]],
+    weights: Optional[Dict[str, float]] = None,
+    k: int = 60
+) -> List[Tuple[int, float]]:
+    """Merge ranked id lists into one ranking, best first.
+
+    Each list contributes weight / (k + rank) for every id it contains (ranks
+    start at 1), so only positions matter and scores from different retrievers
+    never need to be calibrated against each other.
+    """
+    weights = weights or {}
+    scores: Dict[int, float] = {}
+    for name, ranked_ids in rankings.items():
+        weight = weights.get(name, 1.0)
+        for rank, item_id in enumerate(ranked_ids, start=1):
+            scores[item_id] = scores.get(item_id, 0.0) + weight / (k + rank)
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
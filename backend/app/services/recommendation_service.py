@@ -5,6 +5,7 @@ from ..models.user_progress import UserProgress
 from ..models.content import Content, Category
 from ..models.quiz_result import QuizResult
 from ..models.learning_path import LearningPath
+from ..schemas.recommendation_schema import Recommendation
 from ..core.logging import logger
 from .cache_manager import CacheManager
 
@@ -20,7 +21,10 @@ class RecommendationService:
             return await self.cache.get_or_set(
                 cache_key,
                 lambda: self._fetch_recommendations(user_id),
-                cache_type="recommendations"
+                cache_type="recommendations",
+                # Built from this user's progress and the whole catalog
+                tags=[f"user:{user_id}", "catalog"],
+                refresh_func=lambda db: RecommendationService(db, self.cache)._fetch_recommendations(user_id)
             )
         except Exception as e:
             logger.error(f"Error fetching recommendations: {str(e)}")
@@ -78,11 +82,8 @@ class RecommendationService:
         ).all()
 
         return [
-            {
-                "content": content,
-                "type": "next_level",
-                "reason": "Next difficulty level based on your progress"
-            } for content in next_level_content
+            Recommendation.build(content, "next_level", "Next difficulty level based on your progress")
+            for content in next_level_content
         ]
 
     async def _get_similar_content_recommendations(self, user_id: int, completed_ids: List[int]) -> List[Dict]:
@@ -101,11 +102,8 @@ class RecommendationService:
         ).order_by(func.random()).limit(5).all()
         
         return [
-            {
-                "content": content,
-                "type": "similar",
-                "reason": "Similar to topics you've enjoyed"
-            } for content in similar_content
+            Recommendation.build(content, "similar", "Similar to topics you've enjoyed")
+            for content in similar_content
         ]
 
     async def _get_trending_recommendations(self, completed_ids: List[int]) -> List[Dict]:
@@ -119,9 +117,6 @@ class RecommendationService:
         ).limit(5).all()
         
         return [
-            {
-                "content": content,
-                "type": "trending",
-                "reason": f"Popular among learners ({popularity} completions)"
-            } for content, popularity in trending
+            Recommendation.build(content, "trending", f"Popular among learners ({popularity} completions)")
+            for content, popularity in trending
         ] 
\ No newline at end of file
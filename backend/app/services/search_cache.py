@@ -0,0 +1,97 @@
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import json
+from redis.exceptions import RedisError
+from ..core.config import settings
+from ..core.logging import logger
+from ..core.redis import get_redis
+from .ttl_cache import TTLCache
+
+class SearchResultCache:
+    """Search pages shared by all workers in Redis, keyed by normalized query and page.
+
+    Every key embeds a generation number that content writes increment, so
+    one INCR invalidates every cached page at once; the orphaned entries
+    simply expire. While Redis is unreachable pages are cached in process
+    and only this worker's writes invalidate them.
+
+    Other workers' indexes see a write only at their next sync, and may cache
+    pre-write results under the new generation meanwhile, so pages live no
+    longer than the BM25 and ANN sync intervals.
+    """
+
+    version_key = "search:results:version"
+
+    @staticmethod
+    def page_ttl() -> int:
+        return min(settings.SEARCH_RESULT_CACHE_TTL, settings.BM25_SYNC_INTERVAL, settings.ANN_SYNC_INTERVAL)
+
+    _local = TTLCache(max_size=settings.SEARCH_RESULT_CACHE_SIZE)
+    _local_version = 0
+    _counters: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "invalidations": 0, "errors": 0}
+
+    def __init__(self):
+        # Generation seen at lookup, as (in Redis?, number). A page computed after a
+        # miss is stored under it, so a write landing mid-computation orphans it
+        self._versions: Dict[str, Tuple[bool, int]] = {}
+
+    @staticmethod
+    def page_key(query: str, mode: str, limit: int, cursor: Optional[str]) -> str:
+        normalized = " ".join(query.lower().split())
+        payload = json.dumps([normalized, mode, limit, cursor])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def get(self, page_key: str) -> Optional[Dict[str, Any]]:
+        try:
+            redis = get_redis()
+            version = int(await redis.get(self.version_key) or 0)
+            self._versions[page_key] = (True, version)
+            cached = await redis.get(f"search:results:{version}:{page_key}")
+            result = json.loads(cached) if cached else None
+        except RedisError as e:
+            self._record_error("read", e)
+            self._versions[page_key] = (False, self._local_version)
+            result = self._local.get(f"{self._local_version}:{page_key}")
+
+        self._counters["hits" if result is not None else "misses"] += 1
+        return result
+
+    async def set(self, page_key: str, result: Dict[str, Any]):
+        """Store a page computed after get() missed for the same key"""
+        in_redis, version = self._versions.pop(page_key)
+        self._counters["stores"] += 1
+        if not in_redis:
+            self._local.set(f"{version}:{page_key}", result, self.page_ttl())
+            return
+        try:
+            await get_redis().set(
+                f"search:results:{version}:{page_key}",
+                json.dumps(result),
+                ex=self.page_ttl()
+            )
+        except RedisError as e:
+            self._record_error("write", e)
+
+    async def invalidate(self):
+        """Drop every cached page; called after content rows are written"""
+        cls = type(self)
+        cls._local_version += 1
+        self._local.clear()
+        self._counters["invalidations"] += 1
+        try:
+            await get_redis().incr(self.version_key)
+        except RedisError as e:
+            self._record_error("invalidation", e)
+
+    def _record_error(self, operation: str, e: Exception):
+        self._counters["errors"] += 1
+        logger.warning(f"Search cache {operation} fell back to process memory: {str(e)}")
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        lookups = cls._counters["hits"] + cls._counters["misses"]
+        return {
+            **cls._counters,
+            "hit_rate": cls._counters["hits"] / lookups if lookups else 0.0,
+            "local": cls._local.stats()
+        }
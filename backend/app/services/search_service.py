@@ -1,31 +1,100 @@
-from typing import List, Dict, Any
+from typing import Awaitable, List, Dict, Any, Optional, Set, Tuple
+from sqlalchemy import Float, and_, cast, func, or_
 from sqlalchemy.orm import Session
-from ..models.content import Content
+import asyncio
+import base64
+import binascii
+import json
+import numpy as np
+from ..models.content import Content, SEARCH_TEXT_CONFIG
 from ..models.category import Category
 from .ai_service import AIService
+from .content_search_index import ContentSearchIndex
+from .embedding_store import EmbeddingStore
+from .openai_scheduler import Priority
+from .rank_fusion import reciprocal_rank_fusion
+from .search_cache import SearchResultCache
+from .ttl_cache import TTLCache
+from ..core.config import settings
 from ..core.logging import logger
 from fastapi import HTTPException
 
+# (score, content id) of the last result on the previous page
+Cursor = Tuple[float, int]
+
 class SearchService:
+    search_modes = ("hybrid", "speculative", "fulltext", "bm25", "substring")
+
+    # AI rewrites keyed by normalized query, shared by every request in the worker
+    _enhancement_cache = TTLCache(
+        max_size=settings.SEARCH_ENHANCEMENT_CACHE_SIZE,
+        default_ttl=settings.SEARCH_ENHANCEMENT_CACHE_TTL
+    )
+    # Rewrites that missed their deadline keep running to warm the cache
+    _pending_enhancements: Set["asyncio.Task[str]"] = set()
+
     def __init__(self, db: Session, ai_service: AIService):
         self.db = db
         self.ai_service = ai_service
+        self.result_cache = SearchResultCache()
+        # Cleared when a retriever or the rewrite is skipped, so degraded pages are not cached
+        self._complete = True
+
+    async def search(
+        self,
+        query: str,
+        mode: str = "hybrid",
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """One page of results, best first, and the cursor for the next page (None on the last)"""
+        limit = min(limit or settings.SEARCH_PAGE_SIZE, settings.SEARCH_MAX_PAGE_SIZE)
+        if mode == "fulltext" and not self._supports_fulltext():
+            mode = "bm25"
+        # Later pages reuse the first page's rewrite so every page ranks the same query
+        after, rewrite = self.decode_cursor(cursor, mode) if cursor else (None, None)
+
+        page_key = self.result_cache.page_key(query, mode, limit, cursor)
+        cached = await self.result_cache.get(page_key)
+        if cached is not None:
+            logger.info(f"Serving cached search results for query: {query}")
+            return cached
 
-    async def search(self, query: str) -> List[Dict[str, Any]]:
         try:
-            # AI-enhanced search
-            enhanced_query = await self.ai_service.enhance_search_query(query)
-            logger.info(f"Enhanced query: {enhanced_query} (original: {query})")
-            
-            # Search in categories and content
-            results = self.db.query(Content).filter(
-                Content.title.ilike(f"%{enhanced_query}%") |
-                Content.content.ilike(f"%{enhanced_query}%")
-            ).all()
-            
+            if mode == "hybrid":
+                # The embedding retriever covers what the LLM rewrite was for, so skip it
+                enhanced_query = query
+                ranked = await self._hybrid_search(query, limit + 1, after)
+            elif mode == "speculative":
+                enhanced_query, ranked = await self._speculative_search(query, limit + 1, after, rewrite)
+            else:
+                # AI-enhanced search
+                enhanced_query = rewrite if rewrite is not None else await self.enhance_query(query)
+                logger.info(f"Enhanced query: {enhanced_query} (original: {query})")
+                if mode == "fulltext":
+                    ranked = self._fulltext_ranked(self.db, query, enhanced_query, limit + 1, after)
+                elif mode == "bm25":
+                    ranked = self._bm25_ranked(query, enhanced_query, limit + 1, after)
+                else:
+                    ranked = self._substring_ranked(enhanced_query, limit + 1, after)
+
+            # One extra result tells whether there is a next page without counting matches
+            page = ranked[:limit]
+            next_cursor = None
+            if len(ranked) > limit:
+                last_id, last_score = page[-1]
+                next_cursor = self.encode_cursor(
+                    mode, last_score, last_id,
+                    rewrite=None if mode == "hybrid" else enhanced_query
+                )
+
+            results = self._load_results([content_id for content_id, _ in page])
             logger.info(f"Found {len(results)} results for query: {enhanced_query}")
-            return [self.format_result(r) for r in results]
-            
+            response = {"results": results, "next_cursor": next_cursor}
+            if self._complete:
+                await self.result_cache.set(page_key, response)
+            return response
+
         except Exception as e:
             logger.error(f"Search failed: {str(e)}", exc_info=True)
             raise HTTPException(
@@ -33,11 +102,224 @@ class SearchService:
                 detail={"message": "Search failed", "error": str(e)}
             )
 
-    def format_result(self, result: Content) -> Dict[str, Any]:
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    async def enhance_query(self, query: str) -> str:
+        """AI rewrite of the query, cached per normalized query"""
+        key = self.normalize_query(query)
+        cached = self._enhancement_cache.get(key)
+        if cached is not None:
+            return cached
+        enhanced = await self.ai_service.enhance_search_query(query)
+        # The service answers with the raw query when the rewrite fails; don't pin that
+        if enhanced != query:
+            self._enhancement_cache.set(key, enhanced)
+        return enhanced
+
+    async def _speculative_search(
+        self,
+        query: str,
+        limit: int,
+        after: Optional[Cursor],
+        rewrite: Optional[str] = None
+    ) -> Tuple[str, List[Tuple[int, float]]]:
+        """Retrieve on the raw query while the rewrite is in flight.
+
+        The rewrite gets SEARCH_ENHANCE_DEADLINE_MS from the start of the
+        search. If it arrives in time its results are fused with the raw ones;
+        otherwise the raw results are returned and the rewrite finishes in the
+        background so the next search for the query finds it cached. Later
+        pages pass the rewrite their first page used, the raw query if it
+        missed, and skip the rewrite step.
+        """
+        deadline = asyncio.get_running_loop().time() + settings.SEARCH_ENHANCE_DEADLINE_MS / 1000
+        candidates = max(limit, settings.SEARCH_HYBRID_CANDIDATES)
+        enhancement = asyncio.ensure_future(self.enhance_query(query)) if rewrite is None else None
+
+        rankings = {
+            "raw": await self._within_budget("lexical", self._lexical_ids(query, candidates), settings.SEARCH_LEXICAL_BUDGET_MS)
+        }
+
+        enhanced_query = query if rewrite is None else rewrite
+        if enhancement is not None:
+            remaining = deadline - asyncio.get_running_loop().time()
+            done, _ = await asyncio.wait({enhancement}, timeout=max(0.0, remaining))
+            if enhancement in done and not enhancement.exception():
+                enhanced_query = enhancement.result()
+            elif not done:
+                logger.info(f"Query rewrite missed its deadline, answering with raw results for: {query}")
+                self._complete = False
+                self._pending_enhancements.add(enhancement)
+                enhancement.add_done_callback(self._pending_enhancements.discard)
+
+        if self.normalize_query(enhanced_query) != self.normalize_query(query):
+            rankings["enhanced"] = await self._within_budget(
+                "lexical",
+                self._lexical_ids(enhanced_query, candidates),
+                settings.SEARCH_LEXICAL_BUDGET_MS
+            )
+
+        fused = reciprocal_rank_fusion(rankings, k=settings.SEARCH_RRF_K)
+        return enhanced_query, self._page_after(fused, after, limit)
+
+    @staticmethod
+    def encode_cursor(mode: str, score: float, content_id: int, rewrite: Optional[str] = None) -> str:
+        payload = {"mode": mode, "score": score, "id": content_id}
+        if rewrite is not None:
+            payload["rewrite"] = rewrite
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str, mode: str) -> Tuple[Cursor, Optional[str]]:
+        """The position after which the next page starts, and the rewritten query the first page used"""
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if payload["mode"] != mode:
+                raise ValueError("cursor belongs to another search mode")
+            rewrite = payload.get("rewrite")
+            if rewrite is not None and not isinstance(rewrite, str):
+                raise ValueError("rewrite is not a string")
+            return (float(payload["score"]), int(payload["id"])), rewrite
+        except (binascii.Error, ValueError, KeyError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid search cursor: {str(e)}")
+
+    @staticmethod
+    def _page_after(ranked: List[Tuple[int, float]], after: Optional[Cursor], limit: int) -> List[Tuple[int, float]]:
+        """Slice a (content id, score) list sorted by score desc, id asc to the next page"""
+        if after is not None:
+            last_score, last_id = after
+            ranked = [
+                (content_id, score) for content_id, score in ranked
+                if score < last_score or (score == last_score and content_id > last_id)
+            ]
+        return ranked[:limit]
+
+    async def _hybrid_search(self, query: str, limit: int, after: Optional[Cursor]) -> List[Tuple[int, float]]:
+        """Keyword and embedding retrievers run concurrently and are merged by reciprocal rank fusion.
+
+        A retriever that fails or misses its latency budget is left out of the
+        fusion, so the search degrades to the other one instead of failing.
+        Pages past SEARCH_HYBRID_CANDIDATES results are not available.
+        """
+        candidates = max(limit, settings.SEARCH_HYBRID_CANDIDATES)
+        lexical, semantic = await asyncio.gather(
+            self._within_budget("lexical", self._lexical_ids(query, candidates), settings.SEARCH_LEXICAL_BUDGET_MS),
+            self._within_budget("semantic", self._semantic_ids(query, candidates), settings.SEARCH_SEMANTIC_BUDGET_MS)
+        )
+        fused = reciprocal_rank_fusion(
+            {"lexical": lexical, "semantic": semantic},
+            weights={
+                "lexical": settings.SEARCH_HYBRID_LEXICAL_WEIGHT,
+                "semantic": settings.SEARCH_HYBRID_SEMANTIC_WEIGHT
+            },
+            k=settings.SEARCH_RRF_K
+        )
+        return self._page_after(fused, after, limit)
+
+    async def _within_budget(self, name: str, retriever: Awaitable[List[int]], budget_ms: int) -> List[int]:
+        try:
+            return await asyncio.wait_for(retriever, timeout=budget_ms / 1000)
+        except asyncio.TimeoutError:
+            logger.warning(f"{name} retriever exceeded its {budget_ms}ms budget, searching without it")
+        except Exception as e:
+            logger.error(f"{name} retriever failed: {str(e)}")
+        self._complete = False
+        return []
+
+    # The retrievers run in threads with their own sessions, so their budget also bounds index
+    # syncs and database time, and a thread outliving its budget never shares the request's session
+
+    async def _lexical_ids(self, query: str, limit: int) -> List[int]:
+        def run() -> List[int]:
+            db = Session(bind=self.db.get_bind())
+            try:
+                if not self._supports_fulltext():
+                    return [content_id for content_id, _ in ContentSearchIndex(db).search(query, limit)]
+                return [content_id for content_id, _ in self._fulltext_ranked(db, query, query, limit)]
+            finally:
+                db.close()
+        return await asyncio.to_thread(run)
+
+    async def _semantic_ids(self, query: str, limit: int) -> List[int]:
+        """Nearest content by embedding, down to SEARCH_SEMANTIC_MIN_SIMILARITY.
+
+        Nearest neighbours exist for any query, so without the floor a query
+        matching nothing would still fill the page with its least bad matches.
+        """
+        vectors = await self.ai_service.embed_texts([query], Priority.INTERACTIVE)
+        vector = np.asarray(vectors[0], dtype=np.float32)
+
+        def run() -> List[int]:
+            db = Session(bind=self.db.get_bind())
+            try:
+                matches = EmbeddingStore(db, self.ai_service).search(vector, limit)
+            finally:
+                db.close()
+            return [content_id for content_id, score in matches if score >= settings.SEARCH_SEMANTIC_MIN_SIMILARITY]
+        return await asyncio.to_thread(run)
+
+    @staticmethod
+    def _fulltext_ranked(
+        db: Session,
+        query: str,
+        enhanced_query: str,
+        limit: int,
+        after: Optional[Cursor] = None
+    ) -> List[Tuple[int, float]]:
+        """Ranked match on the GIN-indexed search_vector; cost tracks matches, not table size"""
+        ts_query = func.websearch_to_tsquery(SEARCH_TEXT_CONFIG, query)
+        if enhanced_query != query:
+            # The rewrite adds related terms; OR them in so they widen rather than narrow the match
+            ts_query = ts_query.op("||")(func.websearch_to_tsquery(SEARCH_TEXT_CONFIG, enhanced_query))
+        # Compared as double precision so cursor scores round-trip exactly
+        rank = cast(func.ts_rank(Content.search_vector, ts_query), Float(53))
+
+        ranked = db.query(Content.id, rank).filter(Content.search_vector.op("@@")(ts_query))
+        if after is not None:
+            last_score, last_id = after
+            ranked = ranked.filter(or_(rank < last_score, and_(rank == last_score, Content.id > last_id)))
+        rows = ranked.order_by(rank.desc(), Content.id).limit(limit).all()
+        return [(content_id, float(score)) for content_id, score in rows]
+
+    def _bm25_ranked(self, query: str, enhanced_query: str, limit: int, after: Optional[Cursor]) -> List[Tuple[int, float]]:
+        """Ranked in this process by the BM25 index"""
+        terms = query if enhanced_query == query else f"{query} {enhanced_query}"
+        return ContentSearchIndex(self.db).search(terms, limit, after)
+
+    def _substring_ranked(self, query: str, limit: int, after: Optional[Cursor]) -> List[Tuple[int, float]]:
+        """Unranked scan, paged by id through the cursor so no match is cut off"""
+        matches = self.db.query(Content.id).filter(
+            Content.title.ilike(f"%{query}%") |
+            Content.content.ilike(f"%{query}%")
+        )
+        if after is not None:
+            matches = matches.filter(Content.id > after[1])
+        return [(content_id, 0.0) for (content_id,) in matches.order_by(Content.id).limit(limit).all()]
+
+    def _load_results(self, content_ids: List[int]) -> List[Dict[str, Any]]:
+        """Only the columns a result needs, with the preview cut in the database"""
+        if not content_ids:
+            return []
+        rows = self.db.query(
+            Content.id,
+            Content.title,
+            Content.category_id,
+            func.substr(Content.content, 1, settings.SEARCH_PREVIEW_LENGTH).label("preview")
+        ).filter(Content.id.in_(content_ids)).all()
+        by_id = {row.id: row for row in rows}
+        # Rows deleted since they were indexed are simply skipped
+        return [self.format_result(by_id[content_id]) for content_id in content_ids if content_id in by_id]
+
+    def _supports_fulltext(self) -> bool:
+        return self.db.get_bind().dialect.name == "postgresql"
+
+    def format_result(self, result) -> Dict[str, Any]:
         return {
             "id": result.id,
             "title": result.title,
             "type": "content",
             "category_id": result.category_id,
-            "preview": result.content[:200] + "..."
-        } 
\ No newline at end of file
+            "preview": (result.preview or "") + "..."
+        }
@@ -0,0 +1,50 @@
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+
+class SimilarityEngine:
+    """Scores every candidate embedding against a user profile in one matrix operation"""
+
+    def __init__(self, ids: List[int], matrix: np.ndarray):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.vectors = self.normalize(matrix) if len(ids) else np.empty((0, 0), dtype=np.float32)
+
+    @staticmethod
+    def normalize(matrix: np.ndarray) -> np.ndarray:
+        matrix = np.asarray(matrix, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def build_profile(self, reference_ids: Iterable[int]) -> Optional[np.ndarray]:
+        """Mean of the normalized reference vectors.
+
+        The dot product with this profile equals the mean cosine similarity
+        against each reference, so scoring needs a single matrix-vector product.
+        """
+        mask = np.isin(self.ids, list(reference_ids))
+        if not mask.any():
+            return None
+        return self.vectors[mask].mean(axis=0)
+
+    def top_k(
+        self,
+        profile: np.ndarray,
+        k: int = 5,
+        threshold: float = 0.7,
+        exclude_ids: Iterable[int] = ()
+    ) -> List[Tuple[int, float]]:
+        """Return up to k (content id, score) pairs above the threshold, best first"""
+        if not len(self.ids) or k <= 0:
+            return []
+
+        scores = self.vectors @ profile
+        exclude = list(exclude_ids)
+        if exclude:
+            scores[np.isin(self.ids, exclude)] = -np.inf
+
+        candidates = np.flatnonzero(scores > threshold)
+        if len(candidates) > k:
+            # Partial selection is O(n); only the k winners get fully sorted
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        ordered = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(self.ids[i]), float(scores[i])) for i in ordered]
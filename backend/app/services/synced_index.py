@@ -0,0 +1,95 @@
+from typing import Any, Callable, Generic, Hashable, Iterable, List, Optional, TypeVar
+from datetime import datetime, timedelta
+import os
+import threading
+from ..core.logging import logger
+
+T = TypeVar("T")
+
+class SyncedIndex(Generic[T]):
+    """One worker's in-memory index over database rows, shared by every request.
+
+    Loaded from its snapshot or built on first use (normally at startup, see
+    index_warmup), then caught up on rows written by other workers at most
+    every sync_interval seconds: rows whose updated_at is past the last sync,
+    and removals found by scanning the live ids. Searches run in threads, so
+    every read and write of the index goes through lock.
+    """
+
+    # Rows committed around the last sync are pulled again rather than missed
+    overlap = timedelta(seconds=5)
+
+    def __init__(
+        self,
+        name: str,
+        sync_interval: Optional[Callable[[], float]] = None,
+        snapshot_path: Optional[Callable[[], str]] = None,
+        load: Optional[Callable[[str], T]] = None
+    ):
+        self.name = name
+        self.sync_interval = sync_interval
+        self.snapshot_path = snapshot_path
+        self.load = load
+        self.index: Optional[T] = None
+        self.synced_at: Optional[datetime] = None
+        self.lock = threading.RLock()
+
+    def get(self, build: Callable[[], T], sync: Optional[Callable[[T, Optional[datetime]], None]] = None) -> T:
+        """The index, loaded or built if there is none yet, synced if it is due.
+
+        Indexes without a sync_interval are refreshed by their owner instead.
+        """
+        with self.lock:
+            now = datetime.utcnow()
+            if self.index is None:
+                snapshot = self._load_snapshot()
+                if snapshot is not None:
+                    # Catch up on everything written since the snapshot before serving from it
+                    sync(snapshot, datetime.utcfromtimestamp(os.path.getmtime(self.snapshot_path())))
+                    self.index, self.synced_at = snapshot, now
+                else:
+                    self.build(build)
+            elif self.sync_interval is not None and (
+                self.synced_at is None or now - self.synced_at > timedelta(seconds=self.sync_interval())
+            ):
+                sync(self.index, self.synced_at)
+                self.synced_at = now
+            return self.index
+
+    def build(self, build: Callable[[], T]) -> T:
+        """Replace the index with build()'s, saving a snapshot if the index has one.
+
+        Built outside the lock, so searches keep using the old index meanwhile.
+        """
+        started_at = datetime.utcnow()
+        index = build()
+        if self.snapshot_path is not None:
+            index.save(self.snapshot_path())
+        logger.info(f"Built {self.name} index over {len(index)} items")
+        with self.lock:
+            self.index, self.synced_at = index, started_at
+        return index
+
+    def changed_since(self, query: Any, updated_at: Any, since: Optional[datetime]) -> Any:
+        """query narrowed to rows changed since the last sync; all rows when since is None"""
+        if since is None:
+            return query
+        return query.filter(updated_at >= since - self.overlap)
+
+    def deleted_ids(self, indexed_ids: Iterable[Hashable], live_ids: Iterable[Hashable]) -> List[Hashable]:
+        """Indexed ids no longer among live_ids, i.e. deleted by any worker"""
+        live = set(live_ids)
+        removed = [item_id for item_id in indexed_ids if item_id not in live]
+        if removed:
+            logger.info(f"Removing {len(removed)} deleted items from the {self.name} index")
+        return removed
+
+    def _load_snapshot(self) -> Optional[T]:
+        """The saved index, or None when there is none or it can't be read (it is rebuilt then)"""
+        if self.snapshot_path is None or not os.path.exists(self.snapshot_path()):
+            return None
+        try:
+            return self.load(self.snapshot_path())
+        except Exception as e:
+            logger.error(f"Error loading {self.name} index from {self.snapshot_path()}, rebuilding it: {str(e)}")
+            return None
@@ -0,0 +1,113 @@
+from typing import Dict, List, Optional, Tuple
+from collections import Counter
+from difflib import SequenceMatcher
+import math
+
+def trigrams(text: str) -> Counter:
+    """Character trigrams of text padded with two spaces on each side (len(text) + 2 of them)"""
+    padded = f"  {text}  "
+    return Counter(padded[i:i + 3] for i in range(len(padded) - 2))
+
+class TrigramIndex:
+    """Near-duplicate lookup by difflib.SequenceMatcher ratio without comparing against every string.
+
+    A SequenceMatcher ratio above t implies an edit distance below
+    (1 - t) * (la + lb), and each edit changes at most three padded
+    trigrams, so a match must share a minimum number of trigrams with the
+    query. Only the postings of the query's rarest trigrams need to be read
+    to find every string that could share that many; the rest only top up
+    the shared counts of those candidates. Strings whose count is below the
+    bound for their own length are dropped and the survivors are verified
+    with the real ratio, so results are exactly those of a full scan.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._texts: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def ids(self) -> List[int]:
+        return list(self._texts)
+
+    def add(self, item_id: int, text: str):
+        """Insert or replace a string; compared case-insensitively"""
+        if item_id in self._texts:
+            self.remove(item_id)
+        text = text.lower()
+        self._texts[item_id] = text
+        for gram, count in trigrams(text).items():
+            self._postings.setdefault(gram, {})[item_id] = count
+
+    def remove(self, item_id: int):
+        text = self._texts.pop(item_id, None)
+        if text is None:
+            return
+        for gram in trigrams(text):
+            postings = self._postings[gram]
+            del postings[item_id]
+            if not postings:
+                del self._postings[gram]
+
+    @staticmethod
+    def min_shared(length: int, other_length: int, threshold: float) -> float:
+        """Shared trigram occurrences a pair of strings must exceed for their ratio to exceed threshold"""
+        max_edits = (1 - threshold) * (length + other_length)
+        return max(length, other_length) + 2 - 3 * max_edits
+
+    def find(self, text: str, threshold: float) -> Optional[Tuple[int, float]]:
+        """The (item id, ratio) most similar to text with ratio > threshold, if any"""
+        text = text.lower()
+        best: Optional[Tuple[int, float]] = None
+        for item_id, shared in self._shared_counts(text, threshold).items():
+            other = self._texts[item_id]
+            # ratio <= 2 * min(la, lb) / (la + lb), which rules out very different lengths
+            if 2 * min(len(text), len(other)) <= threshold * (len(text) + len(other)):
+                continue
+            if shared <= self.min_shared(len(text), len(other), threshold) - 1e-9:
+                continue
+            matcher = SequenceMatcher(None, text, other)
+            # quick_ratio() is an upper bound on ratio() and much cheaper
+            if matcher.quick_ratio() <= threshold:
+                continue
+            ratio = matcher.ratio()
+            if ratio > threshold and (best is None or (ratio, -item_id) > (best[1], -best[0])):
+                best = (item_id, ratio)
+        return best
+
+    def _shared_counts(self, text: str, threshold: float) -> Dict[int, int]:
+        """Trigram occurrences shared with text, for every string that could be within threshold"""
+        grams = sorted(trigrams(text).items(), key=lambda item: len(self._postings.get(item[0], ())))
+        total = len(text) + 2
+        # The bound is smallest when both strings have the same length
+        required = math.floor(self.min_shared(len(text), len(text), threshold)) + 1
+        shared: Dict[int, int] = {}
+        if required <= 0:
+            # Threshold too low for the bound to exclude anything; count against everything
+            required = 1
+            shared = dict.fromkeys(self._texts, 0)
+
+        # A string sharing `required` occurrences shares one of any total - required + 1 of them
+        scanned = 0
+        position = 0
+        while position < len(grams) and scanned < total - required + 1:
+            gram, count = grams[position]
+            for item_id, other_count in self._postings.get(gram, {}).items():
+                shared[item_id] = shared.get(item_id, 0) + min(count, other_count)
+            scanned += count
+            position += 1
+
+        # The commonest trigrams only add to the counts of strings already found
+        for gram, count in grams[position:]:
+            postings = self._postings.get(gram, {})
+            if len(postings) < len(shared):
+                for item_id, other_count in postings.items():
+                    if item_id in shared:
+                        shared[item_id] += min(count, other_count)
+            else:
+                for item_id in shared:
+                    other_count = postings.get(item_id)
+                    if other_count:
+                        shared[item_id] += min(count, other_count)
+        return shared
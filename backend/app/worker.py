@@ -0,0 +1,14 @@
+"""Background job worker. Run one or more of these next to the API:
+
+    python -m app.worker [--concurrency N]
+"""
+import argparse
+import asyncio
+from .services.job_queue import JobQueue
+from .services import generation_jobs  # noqa: F401 - registers the job handlers
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process queued generation jobs")
+    parser.add_argument("--concurrency", type=int, default=None, help="jobs processed at once")
+    args = parser.parse_args()
+    asyncio.run(JobQueue().run_worker(args.concurrency))
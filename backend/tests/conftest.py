@@ -0,0 +1,89 @@
+from typing import List
+import hashlib
+import numpy as np
+import pytest
+from fakeredis import FakeServer, aioredis as fake_aioredis
+from sqlalchemy import JSON, Text, create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import app.core.redis as core_redis
+from app.core.auth import get_current_user
+from app.database.connection import Base, get_db
+from app.models import (  # noqa: F401 - registers every table on Base
+    category, content, content_embedding, learning_path, prerequisites, quiz, quiz_result, user, user_progress
+)
+from app.models.content import Content
+from app.models.user import User
+
+# Tests run on SQLite: store the PostgreSQL-only columns as JSON and plain text
+Content.__table__.c.prerequisites.type = JSON()
+_search_vector = Content.__table__.c.search_vector
+_search_vector.type = Text()
+_search_vector.computed = None
+_search_vector.server_default = None
+
+@pytest.fixture
+def redis():
+    """Replace the shared Redis clients with in-memory fakes on one server"""
+    server = FakeServer()
+    clients = {
+        False: fake_aioredis.FakeRedis(server=server, decode_responses=True),
+        True: fake_aioredis.FakeRedis(server=server)
+    }
+    saved = dict(core_redis._clients)
+    core_redis._clients.clear()
+    core_redis._clients.update(clients)
+    yield clients[False]
+    core_redis._clients.clear()
+    core_redis._clients.update(saved)
+
+@pytest.fixture
+def db():
+    """Session on a fresh in-memory SQLite database"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+class FakeAI:
+    """Embeds text as a deterministic unit vector and counts embedding calls"""
+    embedding_model = "fake-embedding"
+
+    def __init__(self, dimensions: int = 16):
+        self.dimensions = dimensions
+        self.embedded: List[str] = []
+
+    async def embed_texts(self, texts, priority=None):
+        self.embedded.extend(texts)
+        return [self.vector(text) for text in texts]
+
+    def vector(self, text: str) -> List[float]:
+        digest = hashlib.sha256(text.encode()).digest()
+        vector = np.frombuffer(digest[:self.dimensions], dtype=np.uint8).astype(np.float32) - 127.5
+        return (vector / np.linalg.norm(vector)).tolist()
+
+@pytest.fixture
+def fake_ai():
+    return FakeAI()
+
+@pytest.fixture
+def api(db):
+    """Build a TestClient over the given routers, on the test database and signed in as a user"""
+    user = User(id=1, email="learner@example.com", username="learner", hashed_password="x")
+    db.add(user)
+    db.commit()
+
+    def make(*routers) -> TestClient:
+        app = FastAPI()
+        for router in routers:
+            app.include_router(router)
+        app.dependency_overrides[get_db] = lambda: db
+        app.dependency_overrides[get_current_user] = lambda: user
+        return TestClient(app)
+
+    make.user = user
+    return make
@@ -0,0 +1,32 @@
+import asyncio
+from types import SimpleNamespace
+from app.services.ai_service import AIService
+from app.services.openai_scheduler import Priority, RateLimitScheduler
+
+def test_async_client_and_semaphore_are_per_event_loop():
+    async def resources():
+        first = (AIService._get_async_client(), AIService._get_semaphore())
+        second = (AIService._get_async_client(), AIService._get_semaphore())
+        assert first[0] is second[0] and first[1] is second[1]
+        return first
+
+    client_a, semaphore_a = asyncio.run(resources())
+    client_b, semaphore_b = asyncio.run(resources())
+    assert client_a is not client_b
+    assert semaphore_a is not semaphore_b
+
+def test_call_openai_works_on_successive_event_loops():
+    service = AIService(use_async=True, timeout=5)
+    calls = []
+
+    async def create(timeout=None, **kwargs):
+        calls.append(timeout)
+        return SimpleNamespace(usage=SimpleNamespace(total_tokens=10))
+
+    async def call():
+        scheduler = RateLimitScheduler("test", requests_per_minute=1000, tokens_per_minute=100000)
+        return await service._call_openai(lambda client: create, None, scheduler, 10, Priority.DEFAULT)
+
+    asyncio.run(call())
+    asyncio.run(call())
+    assert calls == [5, 5]
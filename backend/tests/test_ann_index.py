@@ -0,0 +1,96 @@
+import asyncio
+import numpy as np
+from app.core.config import settings
+from app.models.content import Category, Content
+from app.services import embedding_store
+from app.services.ann_index import IVFIndex
+from app.services.embedding_store import EmbeddingStore
+
+def clustered(n=2000, dimensions=32, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(20, dimensions))
+    matrix = centers[rng.integers(len(centers), size=n)] + rng.normal(scale=0.3, size=(n, dimensions))
+    return list(range(1, n + 1)), matrix.astype(np.float32)
+
+def test_search_recall_against_exact():
+    ids, matrix = clustered()
+    index = IVFIndex(n_probe=8)
+    index.build(ids, matrix)
+    queries = matrix[:50] + 0.01
+    recall = np.mean([
+        len({i for i, _ in index.search(q, 10)} & {i for i, _ in index.search_exact(q, 10)}) / 10
+        for q in queries
+    ])
+    assert recall >= 0.9
+
+def test_exact_search_scores_are_cosine_and_sorted():
+    ids, matrix = clustered(200)
+    index = IVFIndex()
+    index.build(ids, matrix)
+    result = index.search_exact(matrix[0], 5, exclude_ids=[1])
+    assert 1 not in [i for i, _ in result]
+    scores = [score for _, score in result]
+    assert scores == sorted(scores, reverse=True)
+    unit = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+    assert abs(scores[0] - float(unit[result[0][0] - 1] @ unit[0])) < 1e-5
+
+def test_add_replace_and_remove():
+    ids, matrix = clustered(300)
+    index = IVFIndex()
+    index.build(ids, matrix)
+    index.add([1], -matrix[:1])
+    assert len(index) == 300
+    assert index.search_exact(-matrix[0], 1)[0][0] == 1
+    index.remove([1, 2, 999])
+    assert 1 not in index and 2 not in index and len(index) == 298
+    assert 1 not in [i for i, _ in index.search(-matrix[0], 10, n_probe=100)]
+
+def test_save_and_load_round_trip(tmp_path):
+    ids, matrix = clustered(300)
+    index = IVFIndex(n_probe=4)
+    index.build(ids, matrix)
+    path = str(tmp_path / "ann.npz")
+    index.save(path)
+    loaded = IVFIndex.load(path)
+    assert len(loaded) == len(index) and loaded.n_probe == 4
+    assert loaded.search(matrix[5], 10) == index.search(matrix[5], 10)
+
+def test_sync_drops_deleted_content(db, fake_ai, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "ANN_INDEX_PATH", str(tmp_path / "ann.npz"))
+    monkeypatch.setattr(embedding_store._ann, "index", None)
+    db.add(Category(id=1, name="Python"))
+    contents = [Content(id=i, title=f"Topic {i}", content="body", category_id=1) for i in range(1, 4)]
+    db.add_all(contents)
+    db.commit()
+    store = EmbeddingStore(db, fake_ai)
+    asyncio.run(store.upsert(contents))
+    index = store.build_index()
+    assert sorted(index.ids()) == [1, 2, 3]
+
+    # Deleted through another worker, so this worker's index was not told
+    db.query(embedding_store.ContentEmbedding).filter_by(content_id=2).delete()
+    db.commit()
+    monkeypatch.setattr(embedding_store._ann, "synced_at", None)
+    assert sorted(store.get_index().ids()) == [1, 3]
+
+def test_save_leaves_no_temp_files(tmp_path):
+    rng = np.random.default_rng(1)
+    index = IVFIndex()
+    index.build(list(range(1, 11)), rng.standard_normal((10, 8)).astype(np.float32))
+    index.save(str(tmp_path / "ann.npz"))
+    index.save(str(tmp_path / "ann.npz"))
+    assert [path.name for path in tmp_path.iterdir()] == ["ann.npz"]
+
+def test_unreadable_snapshot_is_rebuilt(db, fake_ai, monkeypatch, tmp_path):
+    path = tmp_path / "ann.npz"
+    path.write_bytes(b"interleaved writes from two workers")
+    monkeypatch.setattr(settings, "ANN_INDEX_PATH", str(path))
+    monkeypatch.setattr(embedding_store._ann, "index", None)
+    db.add(Category(id=1, name="Python"))
+    contents = [Content(id=i, title=f"Topic {i}", content="body", category_id=1) for i in range(1, 4)]
+    db.add_all(contents)
+    db.commit()
+    asyncio.run(EmbeddingStore(db, fake_ai).upsert(contents))
+
+    assert sorted(EmbeddingStore(db, fake_ai).get_index().ids()) == [1, 2, 3]
+    assert len(IVFIndex.load(str(path))) == 3
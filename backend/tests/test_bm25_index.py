@@ -0,0 +1,110 @@
+from concurrent.futures import ThreadPoolExecutor
+from app.core.config import settings
+from app.models.content import Category, Content
+from app.services import content_search_index
+from app.services.bm25_index import BM25Index, stem, tokenize
+from app.services.content_search_index import ContentSearchIndex
+
+def test_word_forms_share_a_stem():
+    assert {stem(word) for word in ["code", "codes", "coding", "coded"]} == {"cod"}
+    assert stem("classes") == stem("class")
+
+def test_tokenize_drops_stopwords_and_single_letters():
+    assert tokenize("What is a Python decorator?") == ["python", "decorator"]
+
+def test_title_match_outranks_body_match():
+    index = BM25Index()
+    index.add(1, "Cooking", "python appears only in the body here")
+    index.add(2, "Python basics", "variables and loops")
+    assert [doc_id for doc_id, _ in index.search("python")] == [2, 1]
+
+def test_pages_concatenate_to_the_full_ranking():
+    index = BM25Index()
+    for doc_id in range(1, 41):
+        index.add(doc_id, f"Lesson {doc_id}", "python " * (doc_id % 7 + 1))
+    full = index.search("python", k=100)
+    pages, after = [], None
+    while True:
+        page = index.search("python", k=7, after=after)
+        if not page:
+            break
+        pages.extend(page)
+        after = (page[-1][1], page[-1][0])
+    assert pages == full
+
+def test_replace_and_remove_keep_statistics_consistent():
+    index = BM25Index()
+    index.add(1, "Python", "loops")
+    index.add(2, "Rust", "ownership")
+    index.add(1, "Go", "channels")
+    assert index.search("python") == []
+    assert [doc_id for doc_id, _ in index.search("channels")] == [1]
+    index.remove([1, 2, 99])
+    assert len(index) == 0
+    assert index._total_length == 0 and index._postings == {}
+
+def test_save_and_load_round_trip(tmp_path):
+    index = BM25Index(title_weight=3)
+    index.add(1, "Python decorators", "wrapping functions")
+    index.add(2, "Rust", "ownership and borrowing")
+    path = str(tmp_path / "bm25.json.gz")
+    index.save(path)
+    loaded = BM25Index.load(path)
+    assert loaded.title_weight == 3
+    assert loaded.search("functions borrowing") == index.search("functions borrowing")
+
+def test_sync_drops_deleted_and_picks_up_changed_content(db, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "BM25_INDEX_PATH", str(tmp_path / "bm25.json.gz"))
+    monkeypatch.setattr(content_search_index._bm25, "index", None)
+    db.add(Category(id=1, name="Python"))
+    db.add_all([Content(id=i, title=f"Topic {i}", content="python", category_id=1) for i in range(1, 4)])
+    db.commit()
+    search_index = ContentSearchIndex(db)
+    assert sorted(search_index.build_index().ids()) == [1, 2, 3]
+
+    # Written through another worker, so this worker's index was not told
+    db.query(Content).filter(Content.id == 2).delete()
+    db.add(Content(id=4, title="Rust", content="ownership", category_id=1))
+    db.commit()
+    monkeypatch.setattr(content_search_index._bm25, "synced_at", None)
+    index = search_index.get_index()
+    assert sorted(index.ids()) == [1, 3, 4]
+    assert [doc_id for doc_id, _ in search_index.search("ownership")] == [4]
+
+def test_load_from_snapshot_catches_up(db, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "BM25_INDEX_PATH", str(tmp_path / "bm25.json.gz"))
+    db.add(Category(id=1, name="Python"))
+    db.add_all([Content(id=i, title=f"Topic {i}", content="python", category_id=1) for i in range(1, 3)])
+    db.commit()
+    ContentSearchIndex(db).build_index()
+    db.query(Content).filter(Content.id == 1).delete()
+    db.commit()
+
+    # A fresh worker starts from the snapshot
+    monkeypatch.setattr(content_search_index._bm25, "index", None)
+    assert ContentSearchIndex(db).get_index().ids() == [2]
+
+def test_concurrent_saves_leave_a_readable_snapshot(tmp_path):
+    path = str(tmp_path / "bm25.json.gz")
+    indexes = []
+    for worker in range(4):
+        index = BM25Index()
+        for doc_id in range(1, 200):
+            index.add(doc_id, f"Topic {doc_id}", f"worker {worker} body " * 20)
+        indexes.append(index)
+    # As when every worker builds at startup with no snapshot on disk
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda index: index.save(path), indexes))
+    assert len(BM25Index.load(path)) == 199
+    assert [entry.name for entry in tmp_path.iterdir()] == ["bm25.json.gz"]
+
+def test_unreadable_snapshot_is_rebuilt(db, monkeypatch, tmp_path):
+    path = tmp_path / "bm25.json.gz"
+    path.write_bytes(b"half-written")
+    monkeypatch.setattr(settings, "BM25_INDEX_PATH", str(path))
+    monkeypatch.setattr(content_search_index._bm25, "index", None)
+    db.add(Category(id=1, name="Python"))
+    db.add(Content(id=1, title="Decorators", content="python", category_id=1))
+    db.commit()
+    assert ContentSearchIndex(db).get_index().ids() == [1]
+    assert BM25Index.load(str(path)).ids() == [1]
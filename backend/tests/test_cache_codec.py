@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+import pytest
+from app.models.content import DifficultyLevel
+from app.schemas.recommendation_schema import Recommendation
+from app.services import cache_codec
+from app.services.cache_codec import CacheCodec
+
+ENTRY = {
+    "value": [{"content": {"id": 1, "title": "Généraux", "difficulty": "beginner"}, "similarity": 0.5}],
+    "fresh_until": 1760000000.25,
+    "delta": 0.125
+}
+
+@pytest.mark.parametrize("name", CacheCodec.codecs)
+def test_round_trip(name):
+    codec = CacheCodec(name, compress_min_bytes=0)
+    encoded = codec.encode(ENTRY)
+    assert codec.decode(encoded) == ENTRY
+
+@pytest.mark.parametrize("name", CacheCodec.codecs)
+def test_any_worker_decodes_any_codec(name):
+    encoded = CacheCodec(name, compress_min_bytes=1).encode({**ENTRY, "value": ENTRY["value"] * 50})
+    for reader in CacheCodec.codecs:
+        assert CacheCodec(reader).decode(encoded) == {**ENTRY, "value": ENTRY["value"] * 50}
+
+def test_msgpack_is_tagged():
+    assert CacheCodec("msgpack", compress_min_bytes=0).encode(ENTRY)[:1] == cache_codec.MSGPACK
+
+def test_compresses_only_large_entries():
+    codec = CacheCodec("json", compress_min_bytes=512)
+    small = codec.encode(ENTRY)
+    large = codec.encode({**ENTRY, "value": ENTRY["value"] * 50})
+    assert small[:1] == cache_codec.JSON
+    assert large[:1] == cache_codec.COMPRESSED
+    assert codec.decode(large)["value"] == ENTRY["value"] * 50
+
+def test_incompressible_entries_stay_uncompressed():
+    codec = CacheCodec("json", compress_min_bytes=1)
+    assert codec.encode({"v": 1})[:1] == cache_codec.JSON
+
+@pytest.mark.parametrize("data", [b"x{}", b"z" + b"not zlib", b"j{truncated"])
+def test_unreadable_entries_raise_value_error(data):
+    with pytest.raises(ValueError):
+        CacheCodec("json").decode(data)
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError):
+        CacheCodec("pickle")
+
+def test_missing_module_falls_back_to_json(monkeypatch):
+    monkeypatch.setattr(cache_codec, "msgpack", None)
+    codec = CacheCodec("msgpack", compress_min_bytes=0)
+    assert codec.name == "json"
+    assert codec.encode(ENTRY)[:1] == cache_codec.JSON
+
+def test_stats_are_counted_per_cache_type():
+    codec = CacheCodec("json", compress_min_bytes=0)
+    codec.decode(codec.encode(ENTRY, "quiz"), "quiz")
+    codec.encode(ENTRY, "learning_path")
+    by_type = codec.stats()["by_type"]
+    assert (by_type["quiz"]["encodes"], by_type["quiz"]["decodes"]) == (1, 1)
+    assert (by_type["learning_path"]["encodes"], by_type["learning_path"]["decodes"]) == (1, 0)
+    assert by_type["quiz"]["avg_bytes"] > 0
+
+def test_recommendation_of_sparse_content_is_cacheable():
+    content = SimpleNamespace(id=3, title=None, difficulty=None, category_id=None)
+    built = Recommendation.build(content, "trending", "Popular right now")
+    assert built == {
+        "content": {"id": 3, "title": None, "difficulty": None, "category_id": None},
+        "type": "trending",
+        "reason": "Popular right now"
+    }
+    codec = CacheCodec("msgpack", compress_min_bytes=0)
+    assert codec.decode(codec.encode(built)) == built
+
+def test_recommendation_keeps_similarity_when_given():
+    content = SimpleNamespace(id=3, title="Closures", difficulty=DifficultyLevel.BEGINNER, category_id=2)
+    built = Recommendation.build(content, "nlp_recommended", "Similar", similarity=0.75)
+    assert built["similarity"] == 0.75
+    assert built["content"]["difficulty"] == DifficultyLevel.BEGINNER.value
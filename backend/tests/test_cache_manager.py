@@ -0,0 +1,332 @@
+import asyncio
+import time
+from datetime import timedelta
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+from app.core import redis as core_redis
+from app.core.config import settings
+from app.services import cache_manager as cache_manager_module
+from app.services.cache_manager import CacheManager
+
+class DownRedis:
+    """Every command fails as if Redis were unreachable, and is counted"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __getattr__(self, name):
+        async def command(*args, **kwargs):
+            self.calls += 1
+            raise RedisConnectionError("Connection refused")
+        return command
+
+def run(scenario, l1=False):
+    """Run scenario(manager) on a manager initialised in a fresh event loop"""
+    async def main():
+        manager = CacheManager()
+        if not l1:
+            manager.l1 = None
+        await manager.init_cache()
+        try:
+            return await scenario(manager)
+        finally:
+            if manager._listener is not None:
+                manager._listener.cancel()
+    return asyncio.run(main())
+
+def counting_fetch(value="fresh"):
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return value
+    fetch.calls = calls
+    return fetch
+
+def test_read_through_stores_and_serves(redis):
+    fetch = counting_fetch({"items": [1, 2]})
+
+    async def scenario(manager):
+        first = await manager.get_or_set("k", fetch)
+        second = await manager.get_or_set("k", fetch)
+        return first, second, await redis.ttl("k")
+
+    first, second, ttl = run(scenario)
+    assert first == second == {"items": [1, 2]}
+    assert len(fetch.calls) == 1
+    assert ttl > 0
+
+def test_outage_bypasses_redis_with_growing_backoff(monkeypatch):
+    down = DownRedis()
+    monkeypatch.setattr(cache_manager_module, "get_redis", lambda binary=False: down)
+    fetch = counting_fetch()
+
+    async def scenario(manager):
+        # init_cache's ping failed, so lookups go straight to the fetch
+        assert not manager.available
+        calls_after_ping = down.calls
+        assert await manager.get_or_set("k", fetch) == "fresh"
+        assert await manager.get_or_set("k", fetch) == "fresh"
+        assert down.calls == calls_after_ping
+
+        # Once the backoff has passed one lookup probes Redis, fails and backs off longer
+        manager._retry_at = 0.0
+        assert await manager.get_or_set("k", fetch) == "fresh"
+        return down.calls - calls_after_ping, manager._failures, manager._retry_at - time.monotonic()
+
+    probes, failures, backoff = run(scenario)
+    assert len(fetch.calls) == 3
+    assert probes == 1
+    assert failures == 2
+    assert 1.5 < backoff <= 2.0
+
+def test_recovers_when_redis_answers_again(redis, monkeypatch):
+    down = DownRedis()
+    monkeypatch.setattr(cache_manager_module, "get_redis", lambda binary=False: down)
+    fetch = counting_fetch()
+
+    async def scenario(manager):
+        await manager.get_or_set("k", fetch)
+        manager.redis, manager.binary_redis = core_redis._clients[False], core_redis._clients[True]
+        manager._retry_at = 0.0
+        await manager.get_or_set("k", fetch)
+        await manager.get_or_set("k", fetch)
+        return manager._failures, manager.available
+
+    assert run(scenario) == (0, True)
+    assert len(fetch.calls) == 2
+
+def test_invalidate_during_an_outage_is_local_only(monkeypatch):
+    down = DownRedis()
+    monkeypatch.setattr(cache_manager_module, "get_redis", lambda binary=False: down)
+
+    async def scenario(manager):
+        calls = down.calls
+        await manager.invalidate("k")
+        await manager.invalidate_tags("user:1")
+        return down.calls - calls
+
+    assert run(scenario) == 0
+
+async def wait_until(predicate, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.01)
+
+async def subscribed(redis, listeners: int = 1):
+    """Wait until that many invalidation listeners are subscribed"""
+    deadline = time.monotonic() + 2.0
+    while (await redis.pubsub_numsub(CacheManager.invalidation_channel))[0][1] < listeners:
+        if time.monotonic() > deadline:
+            raise AssertionError("listeners did not subscribe in time")
+        await asyncio.sleep(0.01)
+
+def test_l1_hit_skips_redis(redis):
+    fetch = counting_fetch()
+
+    async def scenario(manager):
+        await manager.get_or_set("k", fetch)
+        await redis.delete("k")
+        return await manager.get_or_set("k", fetch)
+
+    assert run(scenario, l1=True) == "fresh"
+    assert len(fetch.calls) == 1
+
+def test_l1_ttl_is_capped_by_remaining_freshness(redis):
+    async def scenario(manager):
+        await manager._store("k", "cached", timedelta(seconds=2), 0.0)
+        await manager.get_or_set("k", counting_fetch())
+        expires_at, value = manager.l1._data["k"]
+        return value, expires_at - time.monotonic()
+
+    value, l1_ttl = run(scenario, l1=True)
+    assert value == "cached"
+    assert 0 < l1_ttl <= 2
+
+def test_invalidate_reaches_other_workers_l1(redis):
+    async def scenario(manager):
+        other = CacheManager()
+        await other.init_cache()
+        try:
+            await subscribed(redis, listeners=2)
+            await manager.get_or_set("k", counting_fetch("old"))
+            await other.get_or_set("k", counting_fetch("old"))
+            assert "k" in other.l1
+
+            await manager.invalidate("k")
+            assert "k" not in manager.l1
+            await wait_until(lambda: "k" not in other.l1)
+            return await other.get_or_set("k", counting_fetch("new"))
+        finally:
+            other._listener.cancel()
+
+    assert run(scenario, l1=True) == "new"
+
+def test_listener_clears_l1_after_reconnecting(redis):
+    async def scenario(manager):
+        await subscribed(redis)
+        manager.l1.set("k", "possibly stale")
+        # A missed invalidation can't be replayed, so a resubscribe starts from empty
+        manager._listener.cancel()
+        manager._listener = asyncio.create_task(manager._listen_for_invalidations())
+        await wait_until(lambda: "k" not in manager.l1)
+        return len(manager.l1)
+
+    assert run(scenario, l1=True) == 0
+
+class FakeSession:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+@pytest.fixture
+def sessions(monkeypatch):
+    """Sessions the manager opens for background refreshes"""
+    opened = []
+
+    def session_local():
+        opened.append(FakeSession())
+        return opened[-1]
+    monkeypatch.setattr(cache_manager_module, "SessionLocal", session_local)
+    return opened
+
+def test_concurrent_misses_across_workers_fetch_once(redis):
+    calls = []
+
+    async def slow_fetch():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "value"
+
+    async def scenario(manager):
+        other = CacheManager()
+        await other.init_cache()
+        return await asyncio.gather(*(
+            worker.get_or_set("k", slow_fetch)
+            for worker in (manager, other)
+            for _ in range(5)
+        ))
+
+    assert run(scenario) == ["value"] * 10
+    assert len(calls) == 1
+
+def test_stale_value_is_served_while_refreshed_in_own_session(redis, sessions):
+    fetch = counting_fetch("inline")
+    refreshed_with = []
+
+    async def refresh(db):
+        refreshed_with.append(db)
+        assert not db.closed
+        return "refreshed"
+
+    async def scenario(manager):
+        await manager._store("k", "stale", timedelta(seconds=0), 0.0)
+        served = await manager.get_or_set("k", fetch, refresh_func=refresh)
+        await asyncio.gather(*manager._revalidating.values())
+        return served, await manager.get_or_set("k", fetch, refresh_func=refresh)
+
+    assert run(scenario) == ("stale", "refreshed")
+    assert fetch.calls == []
+    assert refreshed_with == sessions
+    assert len(sessions) == 1 and sessions[0].closed
+
+def test_one_background_refresh_per_key(redis, sessions):
+    async def refresh(db):
+        await asyncio.sleep(0.05)
+        return "refreshed"
+
+    async def scenario(manager):
+        await manager._store("k", "stale", timedelta(seconds=0), 0.0)
+        served = await asyncio.gather(*(
+            manager.get_or_set("k", counting_fetch(), refresh_func=refresh) for _ in range(5)
+        ))
+        await asyncio.gather(*manager._revalidating.values())
+        return served
+
+    assert run(scenario) == ["stale"] * 5
+    assert len(sessions) == 1
+
+def test_failed_background_refresh_closes_its_session(redis, sessions):
+    async def refresh(db):
+        raise RuntimeError("database went away")
+
+    async def scenario(manager):
+        await manager._store("k", "stale", timedelta(seconds=0), 0.0)
+        await manager.get_or_set("k", counting_fetch(), refresh_func=refresh)
+        await asyncio.gather(*manager._revalidating.values())
+        # The refresh lock was released, so the next refresh can run
+        return await redis.get("locks:cache:k")
+
+    assert run(scenario) is None
+    assert sessions[0].closed
+
+def test_stale_value_without_refresh_func_is_refetched_inline(redis, sessions):
+    fetch = counting_fetch("fresh")
+
+    async def scenario(manager):
+        await manager._store("k", "stale", timedelta(seconds=0), 0.0)
+        return await manager.get_or_set("k", fetch), manager._revalidating
+
+    assert run(scenario) == ("fresh", {})
+    assert len(fetch.calls) == 1
+    assert sessions == []
+
+def test_invalidate_tags_drops_tagged_entries(redis):
+    async def scenario(manager):
+        await manager.get_or_set("a", counting_fetch(), tags=["user:1"])
+        await manager.get_or_set("b", counting_fetch(), tags=["user:2"])
+        await manager.invalidate_tags("user:1")
+        seconds, _ = await redis.time()
+        marker = await redis.get("cache:tag:user:1:invalidated_at")
+        return (
+            await redis.exists("a"), await redis.exists("b"),
+            float(marker) - seconds, await redis.ttl("cache:tag:user:1:invalidated_at")
+        )
+
+    a, b, marker_age, marker_ttl = run(scenario)
+    assert (a, b) == (0, 1)
+    # Stamped on Redis' clock and remembered for longer than any fetch
+    assert -1 < marker_age <= 1
+    assert marker_ttl == pytest.approx(settings.CACHE_INVALIDATION_MEMORY, abs=1)
+
+def test_value_fetched_across_an_invalidation_is_not_stored(redis):
+    async def scenario(manager):
+        async def fetch():
+            # The progress write lands while the old data is being read
+            await manager.invalidate_tags("user:1")
+            return "computed from old data"
+        served = await manager.get_or_set("k", fetch, tags=["user:1"])
+        return served, await redis.exists("k"), await redis.smembers("cache:tag:user:1:keys")
+
+    assert run(scenario) == ("computed from old data", 0, set())
+
+def test_value_fetched_after_an_invalidation_is_stored(redis):
+    async def scenario(manager):
+        await manager.invalidate_tags("user:1")
+        await manager.get_or_set("k", counting_fetch(), tags=["user:1"])
+        return await redis.exists("k"), await redis.smembers("cache:tag:user:1:keys")
+
+    assert run(scenario) == (1, {"k"})
+
+def test_fetch_outliving_the_invalidation_memory_is_not_stored(redis, monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_INVALIDATION_MEMORY", 0)
+
+    async def scenario(manager):
+        await manager.get_or_set("tagged", counting_fetch(), tags=["user:1"])
+        await manager.get_or_set("untagged", counting_fetch())
+        return await redis.exists("tagged"), await redis.exists("untagged")
+
+    assert run(scenario) == (0, 1)
+
+def test_redis_pools_share_the_connection_budget(monkeypatch):
+    monkeypatch.setattr(settings, "REDIS_MAX_CONNECTIONS", 30)
+    monkeypatch.setattr(settings, "REDIS_BINARY_CONNECTIONS", 10)
+    monkeypatch.setattr(core_redis, "_clients", {})
+    text, binary = core_redis.get_redis(), core_redis.get_redis(binary=True)
+    assert core_redis.get_redis() is text
+    assert text.connection_pool.max_connections + binary.connection_pool.max_connections == 30
+    assert binary.connection_pool.max_connections == 10
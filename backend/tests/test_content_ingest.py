@@ -0,0 +1,102 @@
+import asyncio
+import json
+import pytest
+from app.api.endpoints import content as content_endpoints
+from app.core.config import settings
+from app.models.content import Category, Content
+from app.services import content_duplicate_index, content_ingest
+from app.services.content_ingest import ContentIngestService
+
+class StreamedRequest:
+    def __init__(self, chunks, headers=None):
+        self.chunks = chunks
+        self.headers = headers or {}
+
+    async def stream(self):
+        for chunk in self.chunks:
+            yield chunk
+
+def read_lines(request):
+    async def collect():
+        return [line async for line in content_endpoints._request_lines(request)]
+    return asyncio.run(collect())
+
+def test_lines_split_across_chunks():
+    chunks = [b'{"a"', b': 1}\n{"b": 2}\n\n{"c"', b"", b": 3}"]
+    assert read_lines(StreamedRequest(chunks)) == ['{"a": 1}', '{"b": 2}', "", '{"c": 3}']
+
+def test_multibyte_characters_split_across_chunks():
+    encoded = "café\n".encode("utf-8")
+    assert read_lines(StreamedRequest([encoded[:4], encoded[4:]])) == ["café"]
+
+def test_declared_oversized_body_is_refused_before_reading(monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_MAX_BYTES", 10)
+    with pytest.raises(Exception) as error:
+        read_lines(StreamedRequest([], headers={"content-length": "11"}))
+    assert error.value.status_code == 413
+
+def test_streamed_body_over_the_limits_is_refused(monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_MAX_BYTES", 10)
+    with pytest.raises(Exception) as error:
+        read_lines(StreamedRequest([b"12345\n", b"678901"]))
+    assert error.value.status_code == 413
+
+    monkeypatch.setattr(settings, "INGEST_MAX_BYTES", 1000)
+    monkeypatch.setattr(settings, "INGEST_MAX_LINES", 2)
+    assert read_lines(StreamedRequest([b"a\nb"])) == ["a", "b"]
+    with pytest.raises(Exception) as error:
+        read_lines(StreamedRequest([b"a\nb\nc"]))
+    assert error.value.status_code == 413
+
+@pytest.fixture
+def queued(monkeypatch):
+    """Record what ingestion hands to the background jobs instead of queueing it, on a fresh duplicate index"""
+    calls = {"embedding": [], "quizzes": [], "prerequisites": []}
+
+    async def queue_embedding(content_ids):
+        calls["embedding"].extend(content_ids)
+
+    async def queue_quiz_generation(content_id):
+        calls["quizzes"].append(content_id)
+
+    async def queue_prerequisite_analysis(category_ids):
+        calls["prerequisites"].extend(category_ids)
+
+    monkeypatch.setattr(content_duplicate_index._trigrams, "index", None)
+    monkeypatch.setattr(content_ingest, "queue_embedding", queue_embedding)
+    monkeypatch.setattr(content_ingest, "queue_quiz_generation", queue_quiz_generation)
+    monkeypatch.setattr(content_ingest, "queue_prerequisite_analysis", queue_prerequisite_analysis)
+    return calls
+
+def item(title, category_id=1):
+    return json.dumps({"title": title, "content": f"About {title}", "difficulty": "beginner", "category_id": category_id})
+
+def test_ingest_skips_invalid_and_duplicate_lines(db, redis, queued):
+    db.add(Category(id=1, name="Python"))
+    db.add(Content(id=1, title="Python Decorators", content="x", category_id=1))
+    db.commit()
+
+    async def lines():
+        for line in [item("Async IO"), "not json", item("Rust", category_id=9), item("Python decorators!"), item("async io"), item("Generators")]:
+            yield line
+
+    report = asyncio.run(ContentIngestService(db).ingest(lines(), batch_size=1))
+    assert (report["read"], report["inserted"], report["duplicates"], report["invalid"]) == (6, 2, 2, 2)
+    assert [error["line"] for error in report["errors"]] == [2, 3]
+    assert sorted(title for (title,) in db.query(Content.title)) == ["Async IO", "Generators", "Python Decorators"]
+    assert len(queued["embedding"]) == len(queued["quizzes"]) == 2
+    assert set(queued["prerequisites"]) == {1}
+
+def test_ingest_endpoint_is_staff_only(db, redis, api, queued, monkeypatch):
+    db.add(Category(id=1, name="Python"))
+    db.commit()
+    client = api(content_endpoints.router)
+    body = "\n".join([item("Async IO"), item("Generators")])
+
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", "")
+    assert client.post("/content/ingest", content=body).status_code == 403
+
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", f"someone@example.com, {api.user.email.upper()}")
+    response = client.post("/content/ingest", content=body)
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 2
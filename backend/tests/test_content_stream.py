@@ -0,0 +1,82 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from app.api.endpoints import content as content_endpoints
+from app.models.content import Category, Content
+from app.services.ai_service import AIService
+
+def chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+def parse_events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+def test_stream_content_yields_fragments_from_async_client(monkeypatch):
+    async def create(stream, timeout, **request):
+        async def chunks():
+            for text in ["Hello", None, " world"]:
+                yield chunk(text)
+        return chunks()
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(AIService, "_get_async_client", classmethod(lambda cls: client))
+
+    async def collect():
+        return [part async for part in AIService(use_async=True).stream_content("Python", "beginner")]
+
+    assert asyncio.run(collect()) == ["Hello", " world"]
+
+def test_stream_content_with_sync_client():
+    service = AIService(use_async=False)
+    service.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+        create=lambda stream, timeout, **request: iter([chunk("a"), chunk("b")])
+    )))
+
+    async def collect():
+        return [part async for part in service.stream_content("Python", "beginner")]
+
+    assert asyncio.run(collect()) == ["a", "b"]
+
+def test_stream_endpoint_sends_tokens_then_saved_content(db, api, monkeypatch):
+    db.add(Category(id=1, name="Python"))
+    db.commit()
+    queued = []
+
+    async def stream_content(self, topic, difficulty):
+        for part in ["Intro. ", "Body."]:
+            yield part
+
+    async def content_saved(db, ai_service, contents):
+        pass
+
+    async def queue_quiz_generation(content_id):
+        queued.append(content_id)
+
+    monkeypatch.setattr(AIService, "stream_content", stream_content)
+    monkeypatch.setattr(content_endpoints, "content_saved", content_saved)
+    monkeypatch.setattr(content_endpoints, "queue_quiz_generation", queue_quiz_generation)
+
+    response = api(content_endpoints.router).post("/content/generate/stream?category_id=1&difficulty=beginner")
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_events(response.text)
+    assert events[:2] == [("token", {"text": "Intro. "}), ("token", {"text": "Body."})]
+    name, saved = events[2]
+    assert name == "done" and saved["content"] == "Intro. Body." and saved["title"] == "Learning Python"
+    assert db.get(Content, saved["id"]) is not None and queued == [saved["id"]]
+
+def test_stream_endpoint_reports_failures(db, api, monkeypatch):
+    db.add(Category(id=1, name="Python"))
+    db.commit()
+
+    async def stream_content(self, topic, difficulty):
+        yield "partial"
+        raise RuntimeError("upstream closed")
+
+    monkeypatch.setattr(AIService, "stream_content", stream_content)
+    response = api(content_endpoints.router).post("/content/generate/stream?category_id=1&difficulty=beginner")
+    assert [name for name, _ in parse_events(response.text)] == ["token", "error"]
+    assert db.query(Content).count() == 0
@@ -0,0 +1,79 @@
+import asyncio
+import numpy as np
+from app.core.config import settings
+from app.models.content import Category, Content
+from app.models.content_embedding import ContentEmbedding
+from app.models.user_progress import UserProgress
+from app.services import embedding_store
+from app.services.ann_index import IVFIndex
+from app.services.content_service import ContentService
+from app.services.embedding_store import EmbeddingStore
+from app.services.nlp_recommendation_service import NLPRecommendationService
+
+def add_contents(db, titles):
+    db.add(Category(id=1, name="Python"))
+    contents = [Content(id=i, title=title, content="body", category_id=1) for i, title in enumerate(titles, 1)]
+    db.add_all(contents)
+    db.commit()
+    return contents
+
+def test_upsert_embeds_only_new_or_changed_text(db, fake_ai):
+    contents = add_contents(db, ["Decorators", "Generators"])
+    store = EmbeddingStore(db, fake_ai)
+    assert asyncio.run(store.upsert(contents)) == 2
+    assert asyncio.run(store.upsert(contents)) == 0
+
+    contents[1].title = "Generator expressions"
+    db.commit()
+    assert asyncio.run(store.upsert(contents)) == 1
+    assert fake_ai.embedded[-1] == "Generator expressions\n\nbody"
+    assert db.query(ContentEmbedding).count() == 2
+
+def test_model_change_invalidates_embeddings(db, fake_ai):
+    contents = add_contents(db, ["Decorators"])
+    store = EmbeddingStore(db, fake_ai)
+    asyncio.run(store.upsert(contents))
+    fake_ai.embedding_model = "other-model"
+    assert asyncio.run(store.upsert(contents)) == 1
+
+def test_get_matrix_rows_follow_ids(db, fake_ai):
+    contents = add_contents(db, ["Decorators", "Generators", "Closures"])
+    store = EmbeddingStore(db, fake_ai)
+    asyncio.run(store.upsert(contents))
+
+    ids, matrix = store.get_matrix([3, 1])
+    assert ids == [1, 3]
+    assert matrix.dtype == np.float32
+    np.testing.assert_allclose(matrix[1], fake_ai.vector("Closures\n\nbody"), rtol=1e-6)
+    ids, matrix = store.get_matrix([])
+    assert ids == [] and matrix.size == 0
+
+def test_delete_removes_embeddings(db, fake_ai):
+    contents = add_contents(db, ["Decorators", "Generators"])
+    store = EmbeddingStore(db, fake_ai)
+    asyncio.run(store.upsert(contents))
+    store.delete([1])
+    assert store.get_matrix()[0] == [2]
+
+def test_index_is_only_searched_under_its_lock(db, fake_ai, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "ANN_INDEX_PATH", str(tmp_path / "ann.npz"))
+    monkeypatch.setattr(embedding_store._ann, "index", None)
+    contents = add_contents(db, ["Decorators", "Generators", "Closures"])
+    db.add(UserProgress(user_id=1, content_id=1, score=90))
+    db.commit()
+    asyncio.run(EmbeddingStore(db, fake_ai).upsert(contents))
+
+    searched = []
+    for name in ("search", "search_exact"):
+        original = getattr(IVFIndex, name)
+
+        def locked_only(self, *args, _original=original, **kwargs):
+            # Syncs in search threads add and remove vectors under this lock
+            assert embedding_store._ann.lock._is_owned()
+            searched.append(1)
+            return _original(self, *args, **kwargs)
+        monkeypatch.setattr(IVFIndex, name, locked_only)
+
+    asyncio.run(ContentService(db, fake_ai).find_related_content(contents[0]))
+    asyncio.run(NLPRecommendationService(db, None, fake_ai)._generate_nlp_recommendations(1))
+    assert len(searched) == 2
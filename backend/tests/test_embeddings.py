@@ -0,0 +1,46 @@
+import asyncio
+from types import SimpleNamespace
+import httpx
+import openai
+from app.core.config import settings
+from app.services.ai_service import AIService
+
+class FakeEmbeddings(AIService):
+    """Embeds each text as [len(text)] and answers in reverse order, like the API may"""
+
+    def __init__(self, max_batch: int = 1000):
+        super().__init__(use_async=True)
+        self.max_batch = max_batch
+        self.requests = []
+
+    async def _create_embedding(self, **kwargs):
+        batch = kwargs["input"]
+        self.requests.append(len(batch))
+        if len(batch) > self.max_batch:
+            response = httpx.Response(400, request=httpx.Request("POST", "https://api.openai.com/v1/embeddings"))
+            raise openai.BadRequestError("too many inputs", response=response, body=None)
+        data = [SimpleNamespace(index=i, embedding=[float(len(text))]) for i, text in enumerate(batch)]
+        return SimpleNamespace(data=list(reversed(data)))
+
+def test_embed_texts_batches_and_preserves_order(monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_BATCH_SIZE", 3)
+    service = FakeEmbeddings()
+    texts = ["a" * n for n in range(1, 8)]
+    assert asyncio.run(service.embed_texts(texts)) == [[float(n)] for n in range(1, 8)]
+    assert sorted(service.requests) == [1, 3, 3]
+
+def test_batches_respect_token_limit(monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_BATCH_MAX_TOKENS", 10)
+    service = AIService(use_async=True)
+    # Each 15-character text is estimated at 6 tokens
+    assert [len(batch) for batch in service._build_embedding_batches(["x" * 15] * 3)] == [1, 1, 1]
+
+def test_empty_texts_are_sent_as_a_space():
+    service = FakeEmbeddings()
+    assert asyncio.run(service.embed_texts(["", "ab"])) == [[1.0], [2.0]]
+
+def test_rejected_batch_is_split():
+    service = FakeEmbeddings(max_batch=2)
+    texts = ["a" * n for n in range(1, 6)]
+    assert asyncio.run(service.embed_texts(texts)) == [[float(n)] for n in range(1, 6)]
+    assert service.requests[0] == 5
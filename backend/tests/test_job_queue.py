@@ -0,0 +1,180 @@
+import asyncio
+import pytest
+from app.core.config import settings
+from app.services.job_queue import JobQueue, JobStatus, job_handler
+
+calls = []
+
+@job_handler("test_echo")
+async def echo_job(payload):
+    calls.append(payload)
+    return {"echo": payload["value"]}
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    calls.clear()
+
+def test_idempotent_enqueue_saves_one_record(redis):
+    async def scenario():
+        queue = JobQueue("redis")
+        first = await queue.enqueue("test_echo", {"value": 1}, idempotency_key="k")
+        second = await queue.enqueue("test_echo", {"value": 2}, idempotency_key="k")
+        records = [key async for key in redis.scan_iter("jobs:*") if key.count(":") == 1 and key != "jobs:queue"]
+        return first, second, records, await redis.lrange("jobs:queue", 0, -1)
+
+    first, second, records, queued = asyncio.run(scenario())
+    assert second["id"] == first["id"]
+    assert second["payload"] == {"value": 1}
+    # The losing request left no orphan record behind
+    assert records == [f"jobs:{first['id']}"]
+    assert queued == [first["id"]]
+
+def test_expired_claim_is_taken_over(redis):
+    async def scenario():
+        queue = JobQueue("redis")
+        first = await queue.enqueue("test_echo", {"value": 1}, idempotency_key="k")
+        await redis.delete(f"jobs:{first['id']}")
+        second = await queue.enqueue("test_echo", {"value": 2}, idempotency_key="k")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert second["id"] != first["id"]
+    assert second["payload"] == {"value": 2}
+
+def test_pop_leases_and_ack_releases(redis):
+    async def scenario():
+        queue = JobQueue("redis")
+        job = await queue.enqueue("test_echo", {"value": 1})
+        popped = await queue._backend.pop(timeout=1)
+        leased = (await redis.lrange("jobs:processing", 0, -1), await redis.zscore("jobs:leases", job["id"]))
+        await queue._backend.ack(popped)
+        released = (await redis.lrange("jobs:processing", 0, -1), await redis.zscore("jobs:leases", job["id"]))
+        return job, popped, leased, released, await redis.time()
+
+    job, popped, leased, released, now = asyncio.run(scenario())
+    assert popped == job["id"]
+    assert leased[0] == [job["id"]]
+    assert leased[1] >= now[0] + settings.JOB_VISIBILITY_TIMEOUT - 1
+    assert released == ([], None)
+
+def test_reaper_requeues_expired_leases_only(redis):
+    async def scenario():
+        queue = JobQueue("redis")
+        dead = await queue.enqueue("test_echo", {"value": 1})
+        alive = await queue.enqueue("test_echo", {"value": 2})
+        await queue._backend.pop(timeout=1)
+        await queue._backend.pop(timeout=1)
+        now = (await redis.time())[0]
+        await redis.zadd("jobs:leases", {dead["id"]: now - 1})
+        requeued = await queue._backend.reap()
+        return dead, alive, requeued, await redis.lrange("jobs:queue", 0, -1), await redis.lrange("jobs:processing", 0, -1)
+
+    dead, alive, requeued, queued, processing = asyncio.run(scenario())
+    assert requeued == [dead["id"]]
+    assert queued == [dead["id"]]
+    assert processing == [alive["id"]]
+
+def test_reaper_leases_a_job_popped_without_one(redis):
+    async def scenario():
+        queue = JobQueue("redis")
+        job = await queue.enqueue("test_echo", {"value": 1})
+        # A worker that died between BLMOVE and setting the lease
+        await redis.lmove("jobs:queue", "jobs:processing", "LEFT", "RIGHT")
+        requeued = await queue._backend.reap()
+        return job, requeued, await redis.zscore("jobs:leases", job["id"])
+
+    job, requeued, lease = asyncio.run(scenario())
+    assert requeued == []
+    assert lease is not None
+
+def test_redelivered_running_job_runs_again(redis):
+    async def scenario():
+        queue = JobQueue("redis")
+        job = await queue.enqueue("test_echo", {"value": 7})
+        job_id = await queue._backend.pop(timeout=1)
+        # As left by a worker that crashed mid-job
+        stale = await queue.get(job_id)
+        stale.update(status=JobStatus.RUNNING.value, attempts=1)
+        await queue._backend.save(stale)
+        await queue._run(job_id)
+        return await queue.get(job["id"]), await redis.lrange("jobs:processing", 0, -1)
+
+    job, processing = asyncio.run(scenario())
+    assert job["status"] == JobStatus.SUCCEEDED.value
+    assert job["result"] == {"echo": 7}
+    assert job["attempts"] == 2
+    assert processing == []
+
+def test_job_fails_after_max_attempts(redis, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_MAX_ATTEMPTS", 2)
+
+    async def scenario():
+        queue = JobQueue("redis")
+        job = await queue.enqueue("test_echo", {"value": 1})
+        stale = await queue.get(job["id"])
+        stale.update(status=JobStatus.RUNNING.value, attempts=2)
+        await queue._backend.save(stale)
+        await queue._run(await queue._backend.pop(timeout=1))
+        return await queue.get(job["id"])
+
+    job = asyncio.run(scenario())
+    assert job["status"] == JobStatus.FAILED.value
+    assert "Abandoned" in job["error"]
+    assert calls == []
+
+def test_finished_job_is_acked_not_rerun(redis):
+    async def scenario():
+        queue = JobQueue("redis")
+        job = await queue.enqueue("test_echo", {"value": 1})
+        job_id = await queue._backend.pop(timeout=1)
+        await queue._run(job_id)
+        # Redelivered after its worker died before the ack
+        await redis.rpush("jobs:processing", job_id)
+        await queue._run(job_id)
+        return await redis.lrange("jobs:processing", 0, -1)
+
+    assert asyncio.run(scenario()) == []
+    assert len(calls) == 1
+
+def test_failed_handler_records_error(redis):
+    @job_handler("test_broken")
+    async def broken_job(payload):
+        raise RuntimeError("boom")
+
+    async def scenario():
+        queue = JobQueue("redis")
+        job = await queue.enqueue("test_broken", {})
+        await queue._run(await queue._backend.pop(timeout=1))
+        return await queue.get(job["id"])
+
+    job = asyncio.run(scenario())
+    assert job["status"] == JobStatus.FAILED.value
+    assert job["error"] == "boom"
+
+def test_pop_returns_before_the_socket_timeout(monkeypatch):
+    monkeypatch.setattr(settings, "REDIS_SOCKET_TIMEOUT", 5.0)
+    assert JobQueue._pop_timeout() < 5.0
+    monkeypatch.setattr(settings, "REDIS_SOCKET_TIMEOUT", 1.5)
+    assert 0 < JobQueue._pop_timeout() < 1.5
+
+def test_local_backend_runs_jobs_and_dedupes():
+    async def scenario():
+        queue = JobQueue("local")
+        first = await queue.enqueue("test_echo", {"value": 3}, idempotency_key="k")
+        second = await queue.enqueue("test_echo", {"value": 4}, idempotency_key="k")
+        for _ in range(100):
+            job = await queue.get(first["id"])
+            if job["status"] == JobStatus.SUCCEEDED.value:
+                break
+            await asyncio.sleep(0.01)
+        for task in queue._local_workers:
+            task.cancel()
+        return first, second, job
+
+    first, second, job = asyncio.run(scenario())
+    assert second["id"] == first["id"]
+    assert job["result"] == {"echo": 3}
+
+def test_unknown_kind_is_rejected():
+    with pytest.raises(ValueError):
+        asyncio.run(JobQueue("local").enqueue("no_such_kind", {}))
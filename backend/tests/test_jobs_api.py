@@ -0,0 +1,42 @@
+from fastapi import APIRouter
+from app.api.endpoints import content, jobs
+from app.core.auth import get_current_user
+from app.models.content import Category
+from app.models.user import User
+
+def mounted(router, prefix):
+    """The router under its prefix in main.py, so routers with overlapping paths can share a test app"""
+    wrapper = APIRouter()
+    wrapper.include_router(router, prefix=prefix)
+    return wrapper
+
+def test_both_generate_endpoints_queue_the_same_job(api, db, redis):
+    db.add(Category(id=1, name="Python"))
+    db.commit()
+    client = api(mounted(content.router, "/content"), mounted(jobs.router, "/jobs"))
+    params = {"category_id": 1, "difficulty": "beginner"}
+    headers = {"Idempotency-Key": "k"}
+
+    first = client.post("/content/content/generate", params=params, headers=headers)
+    second = client.post("/jobs/content", params=params, headers=headers)
+    assert first.status_code == second.status_code == 202
+    assert first.json()["id"] == second.json()["id"]
+    assert first.json()["payload"] == {
+        "category_id": 1, "topic": "Python", "difficulty": "beginner", "requested_by": api.user.id
+    }
+    assert client.get(f"/jobs/{first.json()['id']}").json()["status"] == "queued"
+
+def test_generate_for_a_missing_category_is_404(api, redis):
+    client = api(mounted(content.router, "/content"))
+    response = client.post("/content/content/generate", params={"category_id": 9, "difficulty": "beginner"})
+    assert response.status_code == 404
+
+def test_other_users_jobs_are_hidden(api, db, redis):
+    db.add(Category(id=1, name="Python"))
+    db.commit()
+    client = api(mounted(content.router, "/content"), mounted(jobs.router, "/jobs"))
+    job = client.post("/jobs/content", params={"category_id": 1, "difficulty": "beginner"}).json()
+
+    client.app.dependency_overrides[get_current_user] = lambda: User(id=2, email="other@example.com")
+    assert client.get(f"/jobs/{job['id']}").status_code == 404
+    assert client.get(f"/jobs/{job['id']}/result").status_code == 404
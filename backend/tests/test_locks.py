@@ -0,0 +1,56 @@
+import asyncio
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+from app.services import locks
+from app.services.locks import DistributedLock, LockTimeout
+
+def test_second_holder_waits_for_release(redis):
+    async def scenario():
+        first = DistributedLock("job", ttl=5, wait=0)
+        assert await first.acquire()
+        blocked = await DistributedLock("job", ttl=5, wait=0.1).acquire()
+        waiter = asyncio.create_task(DistributedLock("job", ttl=5, wait=2).acquire())
+        await asyncio.sleep(0.1)
+        await first.release()
+        return blocked, await waiter
+
+    assert asyncio.run(scenario()) == (False, True)
+
+def test_expired_holder_does_not_release_the_next_ones_lock(redis):
+    async def scenario():
+        stale = DistributedLock("job", ttl=5, wait=0)
+        await stale.acquire()
+        # stale's ttl ran out and another worker took the lock
+        await redis.delete("locks:job")
+        current = DistributedLock("job", ttl=5, wait=0)
+        await current.acquire()
+        await stale.release()
+        return await redis.get("locks:job"), current.token
+
+    held_by, token = asyncio.run(scenario())
+    assert held_by == token
+
+def test_context_manager_raises_on_timeout(redis):
+    async def scenario():
+        async with DistributedLock("job", ttl=5, wait=0):
+            async with DistributedLock("job", ttl=5, wait=0.05):
+                pass
+
+    with pytest.raises(LockTimeout):
+        asyncio.run(scenario())
+
+def test_falls_back_to_a_local_lock_without_redis(monkeypatch):
+    class DownRedis:
+        async def set(self, *args, **kwargs):
+            raise RedisConnectionError("down")
+
+    monkeypatch.setattr(locks, "get_redis", lambda: DownRedis())
+
+    async def scenario():
+        first = DistributedLock("job", ttl=5, wait=0.05)
+        assert await first.acquire()
+        blocked = await DistributedLock("job", ttl=5, wait=0.05).acquire()
+        await first.release()
+        return blocked, await DistributedLock("job", ttl=5, wait=0.05).acquire()
+
+    assert asyncio.run(scenario()) == (False, True)
@@ -0,0 +1,41 @@
+import asyncio
+import pytest
+from app.core.config import settings
+from app.models.content import Category, Content
+from app.models.user_progress import UserProgress
+from app.services import embedding_store
+from app.services.embedding_store import EmbeddingStore
+from app.services.nlp_recommendation_service import NLPRecommendationService
+
+@pytest.fixture
+def catalogue(db, fake_ai, monkeypatch, tmp_path):
+    """Two items with the same text, one unrelated, and item 1 completed by user 1"""
+    monkeypatch.setattr(settings, "ANN_INDEX_PATH", str(tmp_path / "ann.npz"))
+    monkeypatch.setattr(embedding_store._ann, "index", None)
+    db.add(Category(id=1, name="Python"))
+    contents = [
+        Content(id=1, title="Decorators", content="wrapping functions", category_id=1),
+        Content(id=2, title="Decorators", content="wrapping functions", category_id=1),
+        Content(id=3, title="Packaging", content="wheels and sdists", category_id=1)
+    ]
+    db.add_all(contents)
+    db.add(UserProgress(user_id=1, content_id=1, score=90))
+    db.commit()
+    asyncio.run(EmbeddingStore(db, fake_ai).upsert(contents))
+
+def test_small_catalogue_reads_only_the_users_vectors(db, fake_ai, catalogue, monkeypatch):
+    loaded = []
+    get_matrix = EmbeddingStore.get_matrix
+
+    def spy(self, content_ids=None):
+        loaded.append(content_ids)
+        return get_matrix(self, content_ids)
+
+    EmbeddingStore(db, fake_ai).get_index()
+    monkeypatch.setattr(EmbeddingStore, "get_matrix", spy)
+    service = NLPRecommendationService(db, None, fake_ai)
+    recommendations = asyncio.run(service._generate_nlp_recommendations(1))
+
+    assert [item["content"]["id"] for item in recommendations] == [2]
+    assert recommendations[0]["similarity"] == pytest.approx(1.0, abs=1e-5)
+    assert loaded == [[1]]
@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+from app.services.openai_scheduler import Priority, RateLimitScheduler, SchedulerOverloaded
+
+def drained(**kwargs) -> RateLimitScheduler:
+    """20 requests per second with the burst already spent, so every call queues ~50ms"""
+    scheduler = RateLimitScheduler("test", requests_per_minute=1200, tokens_per_minute=10 ** 7, **kwargs)
+    scheduler.requests.available = 0
+    return scheduler
+
+def test_admits_immediately_within_budget():
+    scheduler = RateLimitScheduler("test", requests_per_minute=60, tokens_per_minute=1000)
+
+    async def run():
+        await scheduler.acquire(100)
+
+    asyncio.run(run())
+    metrics = scheduler.metrics()
+    assert metrics["priorities"]["default"]["admitted"] == 1
+    assert metrics["tokens_available"] < 1000
+
+def test_waiting_calls_are_served_by_priority_then_arrival():
+    scheduler = drained()
+    admitted = []
+
+    async def call(name, priority):
+        await scheduler.acquire(1, priority)
+        admitted.append(name)
+
+    async def run():
+        await asyncio.gather(
+            call("background", Priority.BACKGROUND),
+            call("default-1", Priority.DEFAULT),
+            call("interactive", Priority.INTERACTIVE),
+            call("default-2", Priority.DEFAULT)
+        )
+
+    asyncio.run(run())
+    assert admitted == ["interactive", "default-1", "default-2", "background"]
+
+def test_sheds_calls_whose_projected_wait_is_too_long():
+    scheduler = drained(max_wait={Priority.INTERACTIVE: 0.01})
+
+    async def run():
+        with pytest.raises(SchedulerOverloaded):
+            await scheduler.acquire(1, Priority.INTERACTIVE)
+        # Lower priorities tolerate longer waits and still get through
+        await scheduler.acquire(1, Priority.BACKGROUND)
+
+    asyncio.run(run())
+    assert scheduler.metrics()["priorities"]["interactive"]["shed"] == 1
+    assert scheduler.metrics()["priorities"]["background"]["admitted"] == 1
+
+def test_cancelled_waiter_gives_up_its_place():
+    scheduler = drained()
+
+    async def run():
+        first = asyncio.ensure_future(scheduler.acquire(1))
+        second = asyncio.ensure_future(scheduler.acquire(1))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.wait_for(second, timeout=1)
+        assert first.cancelled()
+
+    asyncio.run(run())
+    assert scheduler.metrics()["priorities"]["default"]["admitted"] == 1
+    assert sum(scheduler.metrics()["queue_depth"].values()) == 0
+
+def test_record_usage_corrects_token_estimate():
+    scheduler = RateLimitScheduler("test", requests_per_minute=60, tokens_per_minute=1000)
+
+    async def run():
+        await scheduler.acquire(500)
+
+    asyncio.run(run())
+    scheduler.record_usage(500, 100)
+    assert scheduler.tokens.available > 850
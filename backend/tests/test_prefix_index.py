@@ -0,0 +1,89 @@
+import random
+import pytest
+from app.models.content import Category, Content
+from app.models.user_progress import UserProgress
+from app.services import autocomplete_service
+from app.services.autocomplete_service import AutocompleteService
+from app.services.prefix_index import PrefixIndex
+
+def ids(results):
+    return [result["id"] for result in results]
+
+def test_matches_whole_text_and_later_words():
+    index = PrefixIndex()
+    index.extend([("content", 1, "Python Decorators"), ("content", 2, "Advanced Python")])
+    assert ids(index.suggest("py")) == [1]
+    # Word prefixes need min_word_prefix characters; whole-text matches rank first
+    assert ids(index.suggest("pyt")) == [1, 2]
+    assert ids(index.suggest("deco")) == [1]
+    assert index.suggest("  ") == []
+
+def test_popularity_and_kind_filter():
+    index = PrefixIndex()
+    index.extend([("content", 1, "Rust"), ("content", 2, "Ruby"), ("category", 3, "Rust")])
+    index.set_weights({("content", 2): 5.0})
+    assert ids(index.suggest("ru")) == [2, 1, 3]
+    assert [result["type"] for result in index.suggest("ru", kind="category")] == ["category"]
+
+def test_changes_invalidate_cached_results():
+    index = PrefixIndex()
+    index.add("content", 1, "Go basics")
+    assert ids(index.suggest("go")) == [1]
+    index.add("content", 2, "Go channels", weight=3.0)
+    assert ids(index.suggest("go")) == [2, 1]
+    index.add("content", 2, "Rust channels")
+    assert ids(index.suggest("go")) == [1]
+    index.remove("content", 1)
+    assert index.suggest("go") == []
+    assert index.items() == [("content", 2)]
+
+def test_matches_a_brute_force_scan():
+    rng = random.Random(0)
+    words = ["python", "pandas", "parsing", "rust", "ruby", "react", "regex", "go", "graphs"]
+    index = PrefixIndex()
+    texts = {}
+    for item_id in range(1, 300):
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(1, 3)))
+        texts[item_id] = text
+        index.add("content", item_id, text, weight=float(rng.randint(1, 5)))
+
+    for prefix in ["p", "pa", "pyt", "re", "gra", "ruby r", "zz"]:
+        expected = set()
+        for item_id, text in texts.items():
+            words_of = text.split(" ")
+            if text.startswith(prefix) or (
+                len(prefix) >= index.min_word_prefix
+                and any(" ".join(words_of[start:]).startswith(prefix) for start in range(1, len(words_of)))
+            ):
+                expected.add(item_id)
+        assert set(ids(index.suggest(prefix, limit=1000))) == expected
+
+@pytest.fixture
+def autocomplete(db, monkeypatch):
+    monkeypatch.setattr(autocomplete_service._prefixes, "index", None)
+    db.add(Category(id=1, name="Programming"))
+    db.add_all([
+        Content(id=1, title="Python basics", content="x", category_id=1),
+        Content(id=2, title="Python testing", content="x", category_id=1),
+    ])
+    db.commit()
+    service = AutocompleteService(db)
+    service.build_index()
+    return service
+
+def test_suggest_does_not_touch_the_database(autocomplete, monkeypatch):
+    def no_queries():
+        raise AssertionError("suggest ran a popularity query")
+
+    monkeypatch.setattr(autocomplete, "_popularity", no_queries)
+    monkeypatch.setattr(autocomplete_service._prefixes, "synced_at", autocomplete_service._prefixes.synced_at.replace(year=2000))
+    assert ids(autocomplete.suggest("pyth")) == [1, 2]
+
+def test_refresh_applies_popularity_renames_and_deletions(db, autocomplete):
+    db.add_all([UserProgress(user_id=user_id, content_id=2, score=1.0) for user_id in (1, 2)])
+    db.query(Content).filter(Content.id == 1).delete()
+    db.add(Content(id=3, title="Python typing", content="x", category_id=1))
+    db.commit()
+
+    autocomplete.refresh()
+    assert ids(autocomplete.suggest("python")) == [2, 3]
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import pytest
+from datetime import datetime
+from app.core.config import settings
+from app.models.content import Category, Content
+from app.models.prerequisites import Prerequisites
+from app.services.ai_service import AIService
+from app.services.embedding_store import EmbeddingStore
+from app.services import prerequisite_service
+from app.services.prerequisite_service import PrerequisiteService
+
+class FakeAnalyzer:
+    embedding_model = "fake-embedding"
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.requests = []
+
+    async def analyze_prerequisites_batch(self, topics, catalogue):
+        self.requests.append((topics, catalogue))
+        return {topic_id: self.answers[topic_id] for topic_id in topics if topic_id in self.answers}
+
+class InvalidationRecorder:
+    def __init__(self):
+        self.invalidated = []
+
+    async def invalidate_tags(self, *tags):
+        self.invalidated.append(tags)
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    recorder = InvalidationRecorder()
+    monkeypatch.setattr(prerequisite_service, "cache_manager", recorder)
+    return recorder
+
+def add_contents(db, items):
+    db.add(Category(id=1, name="Python"))
+    db.add_all([
+        Content(id=content_id, title=title, content=body, category_id=1)
+        for content_id, title, body in items
+    ])
+    db.commit()
+
+def test_items_with_the_same_title_get_their_own_analysis(db):
+    add_contents(db, [
+        (1, "Learning Python", "Variables and types"),
+        (2, "Learning Python", "Classes and inheritance"),
+        (3, "Decorators", "Wrapping functions")
+    ])
+    ai = FakeAnalyzer({
+        1: {"prerequisites": [], "complexity": 1},
+        2: {"prerequisites": [1], "complexity": 6},
+        3: {"prerequisites": ["[2]", "Decorators"], "complexity": 7}
+    })
+    assert asyncio.run(PrerequisiteService(db, ai).analyze_category(1)) == 3
+
+    topics, catalogue = ai.requests[0]
+    # Repeated titles are told apart by an excerpt of their text
+    assert catalogue[1] != catalogue[2] and "Classes" in catalogue[2]
+    assert catalogue[3] == "Decorators"
+
+    rows = {c.id: c for c in db.query(Content)}
+    assert rows[1].prerequisites == [] and rows[1].complexity_score == 1
+    assert rows[2].prerequisites == [1] and rows[2].complexity_score == 6
+    assert rows[3].prerequisites == [2]
+    assert {(p.content_id, p.prerequisite_id) for p in db.query(Prerequisites)} == {(2, 1), (3, 2)}
+
+def test_titles_resolve_only_when_unique(db):
+    add_contents(db, [
+        (1, "Learning Python", "a"),
+        (2, "Learning Python", "b"),
+        (3, "Decorators", "c"),
+        (4, "Closures", "d")
+    ])
+    ai = FakeAnalyzer({4: {"prerequisites": ["learning python", "DECORATORS"]}})
+    asyncio.run(PrerequisiteService(db, ai).analyze_category(1))
+    assert db.get(Content, 4).prerequisites == [3]
+    # Items the model skipped stay pending for the next run
+    assert db.get(Content, 1).prerequisites_analyzed_at is None
+
+def test_cyclic_edges_are_dropped(db):
+    add_contents(db, [(1, "A", ""), (2, "B", "")])
+    ai = FakeAnalyzer({1: {"prerequisites": [2]}, 2: {"prerequisites": [1]}})
+    asyncio.run(PrerequisiteService(db, ai).analyze_category(1))
+    assert db.get(Content, 1).prerequisites == [2]
+    assert db.get(Content, 2).prerequisites == []
+
+def test_learning_paths_are_invalidated_after_each_batch(db, cache):
+    add_contents(db, [(1, "A", ""), (2, "B", ""), (3, "C", "")])
+    ai = FakeAnalyzer({1: {"prerequisites": []}, 2: {"prerequisites": [1]}, 3: {"prerequisites": [2]}})
+    committed = []
+
+    async def invalidate_tags(*tags):
+        # The edges are visible to the path rebuilt after the invalidation
+        committed.append(db.get(Content, 3).prerequisites_analyzed_at is not None)
+        cache.invalidated.append(tags)
+
+    cache.invalidate_tags = invalidate_tags
+    asyncio.run(PrerequisiteService(db, ai).analyze_category(1, batch_size=2))
+    assert cache.invalidated == [("category:1",), ("category:1",)]
+    assert committed == [False, True]
+
+def test_batch_results_are_keyed_by_topic_id(monkeypatch):
+    service = AIService(use_async=True)
+    reply = {"1": {"prerequisites": [3]}, "[2]": {"prerequisites": []}, "Decorators": {"prerequisites": [1]}, "4": "bad"}
+
+    async def cached_completion(method, **kwargs):
+        return json.dumps(reply)
+
+    monkeypatch.setattr(service, "_cached_completion", cached_completion)
+    topics = {1: "Learning Python: a", 2: "Learning Python: b", 3: "Decorators", 4: "Closures"}
+    result = asyncio.run(service.analyze_prerequisites_batch(topics, topics))
+    assert result == {1: {"prerequisites": [3]}, 2: {"prerequisites": []}, 3: {"prerequisites": [1]}}
+
+def test_parse_item_id():
+    assert [AIService.parse_item_id(v) for v in [7, "7", " [7] ", "seven", True, None]] == [7, 7, 7, None, None, None]
+
+def test_catalogue_is_offered_nearest_first(db, fake_ai):
+    add_contents(db, [
+        (1, "Learning Decorators", "wrapping functions"),
+        (2, "Packaging", "wheels"),
+        (3, "Unembedded", "no vector yet"),
+        (4, "Learning Decorators", "wrapping functions"),
+    ])
+    asyncio.run(EmbeddingStore(db, fake_ai).upsert([db.get(Content, i) for i in (1, 2, 4)]))
+    for content_id in (1, 2, 3):
+        db.get(Content, content_id).prerequisites_analyzed_at = datetime.utcnow()
+    db.commit()
+
+    ai = FakeAnalyzer({})
+    asyncio.run(PrerequisiteService(db, ai).analyze_category(1))
+    topics, catalogue = ai.requests[0]
+    # Item 1 has the same text as the pending item, so the same embedding
+    assert list(topics) == [4]
+    assert list(catalogue) == [4, 1, 2, 3]
+
+def test_catalogue_is_cut_to_the_context_budget(monkeypatch):
+    monkeypatch.setattr(settings, "PREREQUISITE_CONTEXT_TOKENS", 8192)
+    service = AIService(use_async=True)
+    sent = {}
+
+    async def cached_completion(method, **kwargs):
+        sent.update(kwargs)
+        return "{}"
+
+    monkeypatch.setattr(service, "_cached_completion", cached_completion)
+    topics = {i: f"Learning topic {i}: " + "x" * 160 for i in range(1, 21)}
+    catalogue = {i: f"Learning topic {i}: " + "x" * 160 for i in range(1, 2001)}
+    asyncio.run(service.analyze_prerequisites_batch(topics, catalogue))
+
+    prompt = "".join(message["content"] for message in sent["messages"])
+    assert service._estimate_tokens(prompt) + sent["max_tokens"] <= 8192
+    # Most relevant entries come first, so they are the ones kept
+    assert "- [1] " in prompt and "- [2000] " not in prompt
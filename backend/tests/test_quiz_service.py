@@ -0,0 +1,112 @@
+import asyncio
+import time
+import pytest
+from fastapi import APIRouter
+from app.api.endpoints import jobs as jobs_endpoints
+from app.api.endpoints import quiz as quiz_endpoints
+from app.models.content import Category, Content
+from app.models.quiz import Quiz
+from app.services.locks import LockTimeout
+from app.services.quiz_service import QuizService
+
+class FakeQuizAI:
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_quiz(self, text, priority=None):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return [{"question": "Q?", "options": ["a", "b"], "correct_answer": "a"}]
+
+@pytest.fixture
+def content(db):
+    db.add(Category(id=1, name="Python"))
+    content = Content(id=1, title="Decorators", content="Wrapping functions", category_id=1)
+    db.add(content)
+    db.commit()
+    return content
+
+def test_concurrent_first_views_generate_once(db, redis, content):
+    ai = FakeQuizAI()
+
+    async def scenario():
+        service = QuizService(db, ai)
+        return await asyncio.gather(*[service.get_or_create(content) for _ in range(5)])
+
+    quizzes = asyncio.run(scenario())
+    assert ai.calls == 1
+    assert {quiz.id for quiz in quizzes} == {quizzes[0].id}
+    assert db.query(Quiz).count() == 1
+
+def test_request_gives_up_quickly_while_another_worker_generates(db, redis, content):
+    ai = FakeQuizAI()
+
+    async def scenario():
+        await redis.set("locks:quiz:1", "other-worker", px=60000)
+        started = time.monotonic()
+        with pytest.raises(LockTimeout):
+            await QuizService(db, ai).get_or_create(content, lock_wait=0.1)
+        return time.monotonic() - started
+
+    assert asyncio.run(scenario()) < 1
+    assert ai.calls == 0
+
+def test_waiter_reads_the_quiz_the_lock_holder_stored(db, redis, content):
+    ai = FakeQuizAI()
+
+    async def other_worker():
+        await asyncio.sleep(0.1)
+        db.add(Quiz(title="Quiz: Decorators", content_id=1, questions=[]))
+        db.commit()
+        await redis.delete("locks:quiz:1")
+
+    async def scenario():
+        await redis.set("locks:quiz:1", "other-worker", px=60000)
+        quiz, _ = await asyncio.gather(QuizService(db, ai).get_or_create(content, lock_wait=2), other_worker())
+        return quiz
+
+    assert asyncio.run(scenario()).content_id == 1
+    assert ai.calls == 0
+
+def test_endpoint_answers_202_with_the_job_on_contention(db, api, content, monkeypatch):
+    async def get_or_create(self, content, priority=None, lock_wait=None):
+        raise LockTimeout("busy")
+
+    async def queue_quiz_generation(content_id):
+        return {
+            "id": "job-1", "kind": "generate_quiz", "status": "running",
+            "payload": {"content_id": content_id}, "created_at": "2024-01-01T00:00:00"
+        }
+
+    monkeypatch.setattr(QuizService, "get_or_create", get_or_create)
+    monkeypatch.setattr(quiz_endpoints, "queue_quiz_generation", queue_quiz_generation)
+    response = api(quiz_endpoints.router).get("/quizzes/1")
+    assert response.status_code == 202
+    assert response.json()["id"] == "job-1"
+    assert int(response.headers["Retry-After"]) >= 1
+
+def test_endpoint_answers_503_when_the_job_cannot_be_queued(db, api, content, monkeypatch):
+    async def get_or_create(self, content, priority=None, lock_wait=None):
+        raise LockTimeout("busy")
+
+    async def queue_quiz_generation(content_id):
+        return None
+
+    monkeypatch.setattr(QuizService, "get_or_create", get_or_create)
+    monkeypatch.setattr(quiz_endpoints, "queue_quiz_generation", queue_quiz_generation)
+    assert api(quiz_endpoints.router).get("/quizzes/1").status_code == 503
+
+def test_job_handed_out_with_a_202_can_be_polled(db, api, redis, content, monkeypatch):
+    async def get_or_create(self, content, priority=None, lock_wait=None):
+        raise LockTimeout("busy")
+
+    monkeypatch.setattr(QuizService, "get_or_create", get_or_create)
+    jobs_router = APIRouter()
+    jobs_router.include_router(jobs_endpoints.router, prefix="/jobs")
+    client = api(quiz_endpoints.router, jobs_router)
+
+    job = client.get("/quizzes/1").json()
+    polled = client.get(f"/jobs/{job['id']}")
+    assert polled.status_code == 200
+    assert polled.json()["kind"] == "generate_quiz"
+    assert polled.json()["payload"] == {"content_id": 1}
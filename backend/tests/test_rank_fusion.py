@@ -0,0 +1,20 @@
+from app.services.rank_fusion import reciprocal_rank_fusion
+
+def test_items_found_by_both_rankings_come_first():
+    fused = reciprocal_rank_fusion({"lexical": [1, 2, 3], "semantic": [4, 3, 5]}, k=60)
+    assert fused[0][0] == 3
+    assert {item_id for item_id, _ in fused} == {1, 2, 3, 4, 5}
+
+def test_scores_follow_the_formula():
+    fused = dict(reciprocal_rank_fusion({"a": [7, 8], "b": [8]}, weights={"b": 2.0}, k=10))
+    assert fused[7] == 1 / 11
+    assert fused[8] == 1 / 12 + 2.0 / 11
+
+def test_weights_shift_the_order():
+    rankings = {"lexical": [1], "semantic": [2]}
+    assert reciprocal_rank_fusion(rankings, weights={"semantic": 2.0})[0][0] == 2
+    assert reciprocal_rank_fusion(rankings, weights={"lexical": 2.0})[0][0] == 1
+
+def test_ties_break_by_id_and_empty_rankings_are_ignored():
+    fused = reciprocal_rank_fusion({"a": [9], "b": [3], "c": []})
+    assert [item_id for item_id, _ in fused] == [3, 9]
@@ -0,0 +1,89 @@
+import asyncio
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+from app.models.content import Category, Content
+from app.services import generation_jobs, search_cache
+from app.services.search_cache import SearchResultCache
+
+PAGE = {"results": [{"id": 1}], "next_cursor": None}
+
+@pytest.fixture(autouse=True)
+def fresh_local_cache():
+    SearchResultCache._local.clear()
+
+def test_keys_ignore_case_and_spacing_but_not_the_page():
+    key = SearchResultCache.page_key("Python  Basics", "bm25", 20, None)
+    assert key == SearchResultCache.page_key(" python basics", "bm25", 20, None)
+    assert key != SearchResultCache.page_key("python basics", "bm25", 20, "cursor")
+    assert key != SearchResultCache.page_key("python basics", "hybrid", 20, None)
+
+def test_stored_page_is_served_until_invalidated(redis):
+    async def scenario():
+        cache = SearchResultCache()
+        assert await cache.get("k") is None
+        await cache.set("k", PAGE)
+        hit = await SearchResultCache().get("k")
+        await SearchResultCache().invalidate()
+        return hit, await SearchResultCache().get("k")
+
+    assert asyncio.run(scenario()) == (PAGE, None)
+
+def test_page_computed_across_a_write_is_not_served(redis):
+    async def scenario():
+        cache = SearchResultCache()
+        assert await cache.get("k") is None
+        # Content is written while the page is being computed
+        await SearchResultCache().invalidate()
+        await cache.set("k", PAGE)
+        return await SearchResultCache().get("k")
+
+    assert asyncio.run(scenario()) is None
+
+def test_falls_back_to_process_memory_without_redis(monkeypatch):
+    class DownRedis:
+        async def get(self, *args):
+            raise RedisConnectionError("down")
+        set = incr = get
+
+    monkeypatch.setattr(search_cache, "get_redis", lambda: DownRedis())
+
+    async def scenario():
+        cache = SearchResultCache()
+        await cache.get("k")
+        await cache.set("k", PAGE)
+        hit = await SearchResultCache().get("k")
+        await SearchResultCache().invalidate()
+        return hit, await SearchResultCache().get("k")
+
+    assert asyncio.run(scenario()) == (PAGE, None)
+
+def test_pages_expire_by_the_next_index_sync(redis, monkeypatch):
+    monkeypatch.setattr(search_cache.settings, "SEARCH_RESULT_CACHE_TTL", 600)
+    monkeypatch.setattr(search_cache.settings, "BM25_SYNC_INTERVAL", 60)
+    monkeypatch.setattr(search_cache.settings, "ANN_SYNC_INTERVAL", 45)
+
+    async def scenario():
+        cache = SearchResultCache()
+        await cache.get("k")
+        await cache.set("k", PAGE)
+        return [await redis.ttl(key) async for key in redis.scan_iter("search:results:*:k")]
+
+    assert asyncio.run(scenario()) == [45]
+
+def test_embedding_job_drops_cached_pages(db, redis, fake_ai, monkeypatch):
+    db.add(Category(id=1, name="Python"))
+    db.add(Content(id=1, title="Decorators", content="body", category_id=1))
+    db.commit()
+    monkeypatch.setattr(generation_jobs, "SessionLocal", lambda: db)
+    monkeypatch.setattr(generation_jobs, "AIService", lambda: fake_ai)
+    monkeypatch.setattr(db, "close", lambda: None)
+
+    async def scenario():
+        cache = SearchResultCache()
+        await cache.get("k")
+        await cache.set("k", PAGE)
+        # Bulk-ingested rows are searchable semantically only once this job has run
+        await generation_jobs.embed_content_job({"content_ids": [1]})
+        return await SearchResultCache().get("k")
+
+    assert asyncio.run(scenario()) is None
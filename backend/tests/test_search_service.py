@@ -0,0 +1,180 @@
+import asyncio
+import base64
+import json
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.models.content import Category, Content
+from app.schemas.search_schema import SearchResult
+from app.services import content_search_index, embedding_store
+from app.services.embedding_store import EmbeddingStore
+from app.services.search_service import SearchService
+from tests.conftest import FakeAI
+
+class FakeSearchAI(FakeAI):
+    """Rewrites queries through a fixed table; unknown queries come back unchanged"""
+
+    def __init__(self, rewrites=None):
+        super().__init__()
+        self.rewrites = rewrites or {}
+        self.rewritten = []
+
+    async def enhance_search_query(self, query):
+        self.rewritten.append(query)
+        return self.rewrites.get(query, query)
+
+@pytest.fixture
+def catalogue(db):
+    db.add(Category(id=1, name="Python"))
+    db.add_all([
+        Content(id=content_id, title=f"Lesson {content_id}", content=f"python topic {content_id}", category_id=1)
+        for content_id in range(1, 131)
+    ])
+    db.add(Content(id=200, title="Rust ownership", content="borrowing", category_id=1))
+    db.commit()
+
+@pytest.fixture(autouse=True)
+def fresh_rewrites():
+    SearchService._enhancement_cache.clear()
+    yield
+    SearchService._enhancement_cache.clear()
+
+@pytest.fixture
+def indexes(monkeypatch, tmp_path):
+    """Fresh per-worker BM25 and ANN indexes, persisted under tmp_path"""
+    monkeypatch.setattr(settings, "BM25_INDEX_PATH", str(tmp_path / "bm25.json.gz"))
+    monkeypatch.setattr(settings, "ANN_INDEX_PATH", str(tmp_path / "ann.npz"))
+    monkeypatch.setattr(content_search_index._bm25, "index", None)
+    monkeypatch.setattr(embedding_store._ann, "index", None)
+
+def collect_pages(service, query, mode, limit):
+    async def run():
+        pages, cursor = [], None
+        while True:
+            page = await service.search(query, mode=mode, limit=limit, cursor=cursor)
+            pages.append([result["id"] for result in page["results"]])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return pages
+    return asyncio.run(run())
+
+def test_substring_pages_reach_every_match(db, redis, catalogue):
+    pages = collect_pages(SearchService(db, FakeSearchAI()), "python", "substring", 50)
+    assert [len(page) for page in pages] == [50, 50, 30]
+    assert [content_id for page in pages for content_id in page] == list(range(1, 131))
+
+def test_substring_matches_the_rewrite(db, redis, catalogue):
+    service = SearchService(db, FakeSearchAI({"memory safety": "ownership"}))
+    page = asyncio.run(service.search("memory safety", mode="substring"))
+    assert [result["id"] for result in page["results"]] == [200]
+    assert page["next_cursor"] is None
+
+def test_cursor_of_another_mode_is_rejected(db, redis, catalogue):
+    service = SearchService(db, FakeSearchAI())
+    cursor = SearchService.encode_cursor("bm25", 1.0, 3)
+    with pytest.raises(Exception) as error:
+        asyncio.run(service.search("python", mode="substring", cursor=cursor))
+    assert getattr(error.value, "status_code", None) == 400
+
+def embedded(db, ai, contents):
+    asyncio.run(EmbeddingStore(db, ai).upsert(contents))
+
+def test_hybrid_keeps_close_semantic_matches_only(db, redis, indexes, monkeypatch):
+    monkeypatch.setattr(settings, "SEARCH_SEMANTIC_MIN_SIMILARITY", 0.99)
+    db.add(Category(id=1, name="Python"))
+    contents = [Content(id=i, title=f"Topic {i}", content=f"body {i}", category_id=1) for i in range(1, 6)]
+    db.add_all(contents)
+    db.commit()
+    ai = FakeSearchAI()
+    embedded(db, ai, contents)
+
+    # Shares no keyword with anything; its embedding equals item 3's
+    query = EmbeddingStore.content_text(contents[2])
+    monkeypatch.setattr(ai, "vector", lambda text, vector=ai.vector: vector(query))
+    page = asyncio.run(SearchService(db, ai).search("zzzz qqqq", mode="hybrid"))
+    assert [result["id"] for result in page["results"]] == [3]
+
+def test_hybrid_drops_semantic_matches_below_the_floor(db, redis, indexes):
+    db.add(Category(id=1, name="Python"))
+    contents = [Content(id=i, title=f"Topic {i}", content=f"body {i}", category_id=1) for i in range(1, 30)]
+    db.add_all(contents)
+    db.commit()
+    ai = FakeSearchAI()
+    embedded(db, ai, contents)
+
+    page = asyncio.run(SearchService(db, ai).search("zzzz qqqq", mode="hybrid", limit=50))
+    scores = [score for _, score in EmbeddingStore(db, ai).search(np.asarray(ai.vector("zzzz qqqq"), dtype=np.float32), 50)]
+    above_floor = sum(score >= settings.SEARCH_SEMANTIC_MIN_SIMILARITY for score in scores)
+    assert above_floor < len(contents)
+    assert len(page["results"]) == above_floor
+
+def test_retriever_over_budget_is_left_out_and_page_not_cached(db, redis, indexes, monkeypatch, catalogue):
+    async def slow_semantic(self, query, limit):
+        await asyncio.sleep(1)
+        return [200]
+
+    monkeypatch.setattr(SearchService, "_semantic_ids", slow_semantic)
+    monkeypatch.setattr(settings, "SEARCH_SEMANTIC_BUDGET_MS", 20)
+    service = SearchService(db, FakeSearchAI())
+    page = asyncio.run(service.search("python", mode="hybrid", limit=5))
+    assert len(page["results"]) == 5 and 200 not in [result["id"] for result in page["results"]]
+    assert service._complete is False
+    assert asyncio.run(redis.keys("search:results:*:*")) == []
+
+class ChangingRewriteAI(FakeSearchAI):
+    """A rewrite that differs on every call, as an uncached LLM may"""
+
+    async def enhance_search_query(self, query):
+        self.rewritten.append(query)
+        SearchService._enhancement_cache.clear()
+        return f"{query} variant{len(self.rewritten)}"
+
+def test_later_pages_reuse_the_first_pages_rewrite(db, redis, indexes, catalogue):
+    ai = ChangingRewriteAI()
+    service = SearchService(db, ai)
+    first = asyncio.run(service.search("python", mode="bm25", limit=10))
+    (_, rewrite) = SearchService.decode_cursor(first["next_cursor"], "bm25")
+    assert rewrite == "python variant1"
+
+    second = asyncio.run(service.search("python", mode="bm25", limit=10, cursor=first["next_cursor"]))
+    assert ai.rewritten == ["python"]
+    assert SearchService.decode_cursor(second["next_cursor"], "bm25")[1] == rewrite
+
+def test_pages_partition_the_ranking(db, redis, indexes, catalogue):
+    service = SearchService(db, FakeSearchAI())
+    pages = collect_pages(service, "python", "bm25", 25)
+    ids = [content_id for page in pages for content_id in page]
+    assert len(ids) == len(set(ids)) == 130
+
+def test_speculative_page_two_stays_raw_when_page_one_was(db, redis, indexes, catalogue, monkeypatch):
+    monkeypatch.setattr(settings, "SEARCH_ENHANCE_DEADLINE_MS", 10)
+
+    class SlowRewriteAI(FakeSearchAI):
+        async def enhance_search_query(self, query):
+            self.rewritten.append(query)
+            await asyncio.sleep(0.2)
+            return "python 77"
+
+    ai = SlowRewriteAI()
+
+    async def two_pages():
+        first = await SearchService(db, ai).search("python", mode="speculative", limit=10)
+        # The missed rewrite finishes and is cached before page two is asked for
+        await asyncio.sleep(0.3)
+        second = await SearchService(db, ai).search("python", mode="speculative", limit=10, cursor=first["next_cursor"])
+        return first, second
+
+    first, second = asyncio.run(two_pages())
+    assert SearchService._enhancement_cache.get("python") == "python 77"
+    assert SearchService.decode_cursor(first["next_cursor"], "speculative")[1] == "python"
+    raw_ranking = [content_id for content_id, _ in content_search_index.ContentSearchIndex(db).search("python", 20)]
+    assert [result["id"] for result in first["results"] + second["results"]] == raw_ranking
+
+def test_cursor_with_a_malformed_rewrite_is_rejected(db, redis, catalogue):
+    cursor = base64.urlsafe_b64encode(json.dumps({"mode": "bm25", "score": 1, "id": 1, "rewrite": 5}).encode()).decode()
+    with pytest.raises(Exception) as error:
+        asyncio.run(SearchService(db, FakeSearchAI()).search("python", mode="bm25", cursor=cursor))
+    assert getattr(error.value, "status_code", None) == 400
+
+def test_results_allow_untitled_content():
+    assert SearchResult(id=1, title=None, type="content", category_id=None, preview="...").title is None
@@ -0,0 +1,35 @@
+import numpy as np
+from app.services.similarity_engine import SimilarityEngine
+
+def test_top_k_matches_brute_force():
+    rng = np.random.default_rng(0)
+    ids = list(range(100, 300))
+    matrix = rng.normal(size=(len(ids), 8)).astype(np.float32)
+    engine = SimilarityEngine(ids, matrix)
+    profile = engine.build_profile([100, 101, 102])
+
+    unit = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+    scores = {content_id: float(score) for content_id, score in zip(ids, unit @ profile)}
+    expected = sorted(
+        (content_id for content_id, score in scores.items() if score > 0.1 and content_id not in (100, 101, 102)),
+        key=lambda content_id: -scores[content_id]
+    )[:7]
+
+    result = engine.top_k(profile, k=7, threshold=0.1, exclude_ids=[100, 101, 102])
+    assert [content_id for content_id, _ in result] == expected
+    assert all(abs(score - scores[content_id]) < 1e-5 for content_id, score in result)
+
+def test_profile_scores_are_mean_cosine_similarity():
+    engine = SimilarityEngine([1, 2, 3], np.array([[1, 0], [0, 2], [1, 1]], dtype=np.float32))
+    profile = engine.build_profile([1, 2])
+    ((content_id, score),) = engine.top_k(profile, k=1, threshold=0.0, exclude_ids=[1, 2])
+    assert content_id == 3
+    assert abs(score - np.sqrt(0.5)) < 1e-6
+
+def test_empty_cases():
+    engine = SimilarityEngine([], np.empty((0, 0)))
+    assert engine.build_profile([1]) is None
+    assert engine.top_k(np.ones(2)) == []
+    engine = SimilarityEngine([1], np.ones((1, 2)))
+    assert engine.build_profile([2]) is None
+    assert engine.top_k(np.ones(2), k=0) == []
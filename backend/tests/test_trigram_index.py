@@ -0,0 +1,60 @@
+import random
+from difflib import SequenceMatcher
+from app.models.content import Category, Content
+from app.services import content_duplicate_index
+from app.services.content_duplicate_index import ContentDuplicateIndex
+from app.services.trigram_index import TrigramIndex, trigrams
+
+def brute_force(texts, query, threshold):
+    best = None
+    for item_id, text in texts.items():
+        ratio = SequenceMatcher(None, query.lower(), text.lower()).ratio()
+        if ratio > threshold and (best is None or (ratio, -item_id) > (best[1], -best[0])):
+            best = (item_id, ratio)
+    return best
+
+def test_trigrams_are_padded():
+    grams = trigrams("ab")
+    assert sum(grams.values()) == len("ab") + 2
+    assert grams["  a"] == 1 and grams["b  "] == 1
+
+def test_finds_exactly_what_a_full_scan_finds():
+    rng = random.Random(0)
+    words = ["learning", "python", "rust", "async", "closures", "intro", "to", "advanced", "the", "basics"]
+    texts = {
+        item_id: " ".join(rng.choice(words) for _ in range(rng.randint(1, 5)))
+        for item_id in range(1, 200)
+    }
+    index = TrigramIndex()
+    for item_id, text in texts.items():
+        index.add(item_id, text)
+
+    queries = [rng.choice(list(texts.values())) for _ in range(15)]
+    queries += ["Learning Pythn", "rust async", "zzz", ""]
+    for query in queries:
+        for threshold in (0.3, 0.6, 0.85, 0.95):
+            assert index.find(query, threshold) == brute_force(texts, query, threshold), (query, threshold)
+
+def test_replace_and_remove():
+    index = TrigramIndex()
+    index.add(1, "Python Basics")
+    index.add(1, "Rust Basics")
+    assert index.find("python basics", 0.9) is None
+    assert index.find("rust basics", 0.9) == (1, 1.0)
+    index.remove(1)
+    index.remove(1)
+    assert len(index) == 0 and index._postings == {}
+
+def test_sync_drops_deleted_content(db, monkeypatch):
+    monkeypatch.setattr(content_duplicate_index._trigrams, "index", None)
+    db.add(Category(id=1, name="Python"))
+    db.add_all([Content(id=1, title="Learning Python", content="x", category_id=1)])
+    db.commit()
+    duplicates = ContentDuplicateIndex(db)
+    assert duplicates.find("learning python", 0.85) == 1
+
+    # Deleted through another worker, so this worker's index was not told
+    db.query(Content).filter(Content.id == 1).delete()
+    db.commit()
+    monkeypatch.setattr(content_duplicate_index._trigrams, "synced_at", None)
+    assert duplicates.find("learning python", 0.85) is None
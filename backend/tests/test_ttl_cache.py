@@ -0,0 +1,118 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from app.services import ttl_cache
+from app.services.ai_service import AIService
+from app.services.ttl_cache import SingleFlight, TTLCache
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ttl_cache.time, "monotonic", clock)
+    return clock
+
+def test_entries_expire(clock):
+    cache = TTLCache(default_ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=30)
+    clock.now += 20
+    assert cache.get("a") is None and cache.get("b") == 2
+    clock.now += 20
+    assert "b" not in cache and len(cache) == 0
+
+    forever = TTLCache()
+    forever.set("c", 3)
+    clock.now += 1e9
+    assert forever.get("c") == 3
+
+def test_least_recently_used_is_evicted():
+    cache = TTLCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "b" not in cache and cache.get("a") == 1 and cache.get("c") == 3
+
+def test_stats_count_hits_and_misses():
+    cache = TTLCache()
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("missing")
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    assert cache.stats()["hit_rate"] == 0.5
+
+def test_single_flight_shares_one_call():
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    async def run():
+        flight = SingleFlight()
+        results = await asyncio.gather(*[flight.do("key", fetch) for _ in range(10)])
+        assert "key" not in flight
+        return results
+
+    assert asyncio.run(run()) == [1] * 10
+
+def test_single_flight_shares_errors_and_survives_cancelled_waiters():
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def slow():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def run():
+        flight = SingleFlight()
+        results = await asyncio.gather(flight.do("bad", fail), flight.do("bad", fail), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+
+        leader = asyncio.ensure_future(flight.do("slow", slow))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("slow", slow))
+        await asyncio.sleep(0)
+        follower.cancel()
+        assert await leader == "done"
+
+    asyncio.run(run())
+
+def test_cached_completion_deduplicates_and_skips_invalid(monkeypatch):
+    monkeypatch.setattr(AIService, "_response_cache", TTLCache())
+    monkeypatch.setattr(AIService, "_single_flight", SingleFlight())
+    service = AIService(use_async=True)
+    replies = iter(["not json", '{"ok": true}'])
+    calls = 0
+
+    async def chat_completion(timeout=None, priority=None, **kwargs):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        text = next(replies)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+    service._chat_completion = chat_completion
+    request = {"model": "m", "messages": [{"role": "user", "content": "hi"}]}
+
+    async def run():
+        first = await asyncio.gather(*[
+            service._cached_completion("generate_quiz", validate=service._is_json, **request) for _ in range(3)
+        ])
+        assert first == ["not json"] * 3 and calls == 1
+        # The invalid reply was not cached
+        assert await service._cached_completion("generate_quiz", validate=service._is_json, **request) == '{"ok": true}'
+        assert await service._cached_completion("generate_quiz", validate=service._is_json, **request) == '{"ok": true}'
+        assert calls == 2
+
+    asyncio.run(run())
@@ -0,0 +1,25 @@
+from sqlalchemy import text
+from app.models.content import Category, Content
+from app.models.quiz import Quiz
+from app.models.quiz_result import QuizResult
+from app.models.user_progress import UserProgress
+from app.scripts.upgrade_schema import merge_duplicate_quizzes
+
+def test_duplicate_quizzes_merge_into_the_oldest(db):
+    # As on databases created before quizzes.content_id was unique
+    db.execute(text("DROP INDEX ix_quizzes_content_id"))
+    db.add(Category(id=1, name="Python"))
+    db.add_all([Content(id=1, title="A", category_id=1), Content(id=2, title="B", category_id=1)])
+    db.add_all([
+        Quiz(id=1, content_id=1), Quiz(id=2, content_id=1), Quiz(id=3, content_id=1), Quiz(id=4, content_id=2)
+    ])
+    db.add_all([QuizResult(id=1, quiz_id=2, user_id=1), QuizResult(id=2, quiz_id=4, user_id=1)])
+    db.add(UserProgress(id=1, quiz_id=3, content_id=1, user_id=1))
+    db.commit()
+
+    assert merge_duplicate_quizzes(db.connection()) == 2
+    db.commit()
+    assert sorted(quiz.id for quiz in db.query(Quiz)) == [1, 4]
+    assert {result.id: result.quiz_id for result in db.query(QuizResult)} == {1: 1, 2: 4}
+    assert db.get(UserProgress, 1).quiz_id == 1
+    assert merge_duplicate_quizzes(db.connection()) == 0